@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+"""Background music that never makes the game wait.
+
+Starting pygame's mixer and loading a music file can take hundreds of
+milliseconds.  :class:`AudioManager` does both on a worker thread while the
+level selection is shown: it starts the mixer and reads every track into
+memory.  The game only *asks* for music with :meth:`AudioManager.play` and
+:meth:`AudioManager.stop`; the worker carries the request out as soon as it
+can.  pygame is optional: without it (or without a sound device) the game
+simply stays silent.
+"""
+
+import io
+import queue
+import threading
+from pathlib import Path
+from typing import Dict
+
+# Track played when a requested track does not exist
+DEFAULT_TRACK = "default"
+
+
+class AudioManager:
+    """Preloads music tracks and plays them from a worker thread.
+
+    ``tracks`` maps a name to a music file.  :attr:`state` is ``"idle"``
+    before :meth:`start`, ``"loading"`` while the mixer starts and the files
+    are read, and then ``"ready"`` or ``"unavailable"``.  Requests made
+    before the worker is ready are remembered and carried out afterwards;
+    when several requests pile up only the newest one is carried out.
+    """
+
+    def __init__(self, tracks: Dict[str, str | Path]) -> None:
+        self.tracks = dict(tracks)
+        self.state = "idle"
+        # name of the track that is playing, ``None`` when silent
+        self.playing: str | None = None
+        self.error: Exception | None = None
+        self._data: Dict[str, bytes] = {}
+        self._commands: queue.Queue = queue.Queue()
+        self._finished = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def start(self) -> None:
+        """Start preloading in the background; later calls do nothing."""
+        if self._thread is None:
+            self.state = "loading"
+            self._thread = threading.Thread(target=self._run,
+                                            name="audio", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait until loading is over; ``True`` if it finished in time."""
+        return self._finished.wait(timeout)
+
+    def play(self, name: str = DEFAULT_TRACK, loops: int = -1) -> None:
+        """Play track ``name`` (or the default track) once it is loaded."""
+        self.start()
+        self._commands.put(("play", name, loops))
+
+    def stop(self) -> None:
+        self._commands.put(("stop", None, 0))
+
+    def close(self) -> None:
+        """Stop the music and end the worker thread."""
+        if self._thread is not None:
+            # ``None`` both stops the music and ends the worker, so no
+            # newer request can replace the stop
+            self._commands.put(None)
+
+    # ------------------------------------------------------------------
+    # Worker thread
+    # ------------------------------------------------------------------
+    def _open_mixer(self):
+        """Return an initialised ``pygame.mixer``."""
+        import pygame
+
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        return pygame.mixer
+
+    def _run(self) -> None:
+        try:
+            mixer = self._open_mixer()
+        except Exception as exc:  # pygame missing or no sound device
+            self.error = exc
+            self.state = "unavailable"
+            self._finished.set()
+            return
+        for name, path in self.tracks.items():
+            try:
+                self._data[name] = Path(path).read_bytes()
+            except OSError as exc:
+                self.error = exc
+        self.state = "ready"
+        self._finished.set()
+
+        while True:
+            command = self._commands.get()
+            # Only the newest request matters
+            while command is not None and not self._commands.empty():
+                command = self._commands.get()
+            kind, name, loops = command or ("stop", None, 0)
+            try:
+                if kind == "play":
+                    self._play(mixer, name, loops)
+                else:
+                    mixer.music.stop()
+                    self.playing = None
+            except Exception as exc:
+                self.error = exc
+            if command is None:
+                return
+
+    def _play(self, mixer, name: str, loops: int) -> None:
+        if name not in self._data:
+            name = DEFAULT_TRACK
+        if name == self.playing or name not in self._data:
+            return
+        hint = Path(self.tracks[name]).suffix.lstrip(".")
+        mixer.music.load(io.BytesIO(self._data[name]), hint)
+        mixer.music.play(loops)
+        self.playing = name
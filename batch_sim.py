@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+"""Play thousands of sessions without a window to tune the difficulty.
+
+Every session is a normal :class:`~simulation.Simulation` with its own seed,
+played by a bot instead of a person.  Bots are controllers just like
+:class:`player_controller.PlayerController`: the simulation polls them at
+the start of every tick and they answer with ordinary inputs.  Sessions are
+spread over a :class:`concurrent.futures.ProcessPoolExecutor`, so a sweep
+over all levels uses every core of the machine.
+
+Example::
+
+    python batch_sim.py --levels 1-20 --sessions 1000 --output stats.csv
+
+prints a line per level as soon as it is finished and writes the per-level
+statistics as CSV (or JSON if the output file ends in ``.json``).  With
+``--raw sessions.csv`` every single session is written as well, streamed
+while the sweep runs.  Seeds are derived from ``--seed``, the level and the
+session number, so a sweep can be repeated exactly.
+
+``--fruit-speed``, ``--spawn-interval`` and ``--spawn-weights`` change the
+difficulty settings (see :class:`simulation.Tuning`) without editing the
+source, so two settings can be compared with two runs::
+
+    python batch_sim.py --fruit-speed 3 --output faster.csv
+    python batch_sim.py --spawn-weights black=10,red=10 --output hard.csv
+
+The settings used are written into every row of the output file.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from fruit import DEFAULT_FRUIT, FRUIT_HITS
+from level_pack import load_level
+from simulation import (
+    FRUIT_RADIUS, INPUT_AIM, INPUT_SWING, START_LIVES, SWORD_LENGTH,
+    TICK_MS, Simulation, Tuning, World,
+)
+
+MAP_DIR = Path(__file__).with_name("maps")
+WIDTH, HEIGHT = 800, 600
+# Sessions handed to a worker process at once
+CHUNK_SIZE = 25
+
+SESSION_FIELDS = (
+    "level", "seed", "outcome", "survival_ms", "lives_lost", "peak_fruits",
+    "fruits_spawned", "ticks", "seconds",
+)
+
+
+# ---------------------------------------------------------------------------
+# Bots
+# ---------------------------------------------------------------------------
+class IdleBot:
+    """Never moves and never swings; shows the raw pressure of a level."""
+
+    def poll(self, sim: Simulation) -> None:
+        pass
+
+
+class SwordBot:
+    """Stands still and swings at the nearest fruit within ``reach``.
+
+    A new swing only starts once the previous one is over, roughly like a
+    player clicking as fast as the sword allows.
+    """
+
+    def __init__(self, reach: float = SWORD_LENGTH + FRUIT_RADIUS) -> None:
+        self.reach = reach
+
+    def poll(self, sim: Simulation) -> None:
+        store = sim.fruits
+        n = store.count
+        if not n or sim.sword_active:
+            return
+        dx = store.x[:n] - sim.base_x
+        dy = store.y[:n] - sim.base_y
+        dist2 = dx * dx + dy * dy
+        nearest = int(np.argmin(dist2))
+        if dist2[nearest] > self.reach * self.reach:
+            return
+        sim.apply_input(INPUT_AIM, int(store.x[nearest]),
+                        int(store.y[nearest]))
+        sim.apply_input(INPUT_SWING)
+
+
+BOTS = {"idle": IdleBot, "sword": SwordBot}
+
+
+# ---------------------------------------------------------------------------
+# Running sessions
+# ---------------------------------------------------------------------------
+def session_seed(base_seed: int, level: int, index: int) -> int:
+    """Return the seed of session ``index`` of ``level`` in a sweep."""
+    digest = hashlib.blake2b(f"{base_seed}:{level}:{index}".encode(),
+                             digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1
+
+
+def map_path(level: int) -> str:
+    return str(MAP_DIR / f"example_map{level}.txt")
+
+
+def run_session(world: World, level: int, seed: int, bot: str = "sword",
+                tuning: Tuning | None = None) -> Dict[str, object]:
+    """Play one session to the end and return its statistics."""
+    started = time.perf_counter()
+    sim = Simulation(world, level, seed=seed, controller=BOTS[bot](),
+                     tuning=tuning)
+    peak = spawned = 0
+    while sim.running:
+        sim.advance(TICK_MS)
+        for kind, _ in sim.drain_events():
+            spawned += kind == "spawn"
+        peak = max(peak, sim.fruits.count)
+    return {
+        "level": level,
+        "seed": seed,
+        "outcome": sim.outcome,
+        "survival_ms": sim.tick_count * TICK_MS,
+        "lives_lost": START_LIVES - sim.lives,
+        "peak_fruits": peak,
+        "fruits_spawned": spawned,
+        "ticks": sim.tick_count,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def run_chunk(level: int, seeds: List[int], bot: str, width: int,
+              height: int, tuning: Tuning | None = None
+              ) -> List[Dict[str, object]]:
+    """Play several sessions of one level; runs inside a worker process."""
+    world = World.from_map(load_level(map_path(level)), width, height)
+    return [run_session(world, level, seed, bot, tuning) for seed in seeds]
+
+
+def tuning_fields(tuning: Tuning) -> Dict[str, object]:
+    """Return the settings of ``tuning`` as columns of a summary row."""
+    weights = tuning.spawn_weights
+    return {
+        "fruit_speed": tuning.fruit_speed,
+        "spawn_interval_ms": tuning.spawn_interval_ms,
+        # empty when every level uses its own spawn table
+        "spawn_weights": ",".join(f"{color}={weight:g}" for color, weight
+                                  in weights.items()) if weights else "",
+    }
+
+
+def summarize(level: int, rows: List[Dict[str, object]]) -> Dict[str, object]:
+    """Combine the sessions of one level into a single row of statistics."""
+    survival = [row["survival_ms"] for row in rows]
+    lives_lost = [row["lives_lost"] for row in rows]
+    peaks = [row["peak_fruits"] for row in rows]
+    ticks = sum(row["ticks"] for row in rows)
+    seconds = sum(row["seconds"] for row in rows)
+    outcomes = defaultdict(int)
+    for row in rows:
+        outcomes[row["outcome"]] += 1
+    return {
+        "level": level,
+        "sessions": len(rows),
+        "survival_ms_mean": statistics.fmean(survival),
+        "survival_ms_min": min(survival),
+        "lives_lost_mean": statistics.fmean(lives_lost),
+        "lives_lost_p95": float(np.percentile(lives_lost, 95)),
+        "peak_fruits_mean": statistics.fmean(peaks),
+        "peak_fruits_max": max(peaks),
+        "completed": outcomes["complete"],
+        "timed_out": outcomes["time"],
+        "out_of_lives": outcomes["out of lives"],
+        "ticks_per_sec": ticks / seconds if seconds else 0.0,
+    }
+
+
+def sweep(levels: Iterable[int], sessions: int, bot: str = "sword",
+          seed: int = 0, workers: int | None = None,
+          chunk_size: int = CHUNK_SIZE, width: int = WIDTH,
+          height: int = HEIGHT, on_session=None, on_level=None,
+          tuning: Tuning | None = None) -> List[Dict[str, object]]:
+    """Run ``sessions`` sessions of every level and return one row per level.
+
+    ``on_session(row)`` is called for every finished session and
+    ``on_level(summary)`` for every finished level, both in the parent
+    process and in the order the results arrive.  Every session is played
+    with ``tuning``, and its settings are added to each level's row.
+    """
+    tuning = tuning or Tuning()
+    levels = list(dict.fromkeys(levels))
+    remaining = {level: sessions for level in levels}
+    results: Dict[int, List[Dict[str, object]]] = defaultdict(list)
+    summaries = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = []
+        for level in levels:
+            seeds = [session_seed(seed, level, i) for i in range(sessions)]
+            for start in range(0, sessions, chunk_size):
+                futures.append(pool.submit(
+                    run_chunk, level, seeds[start:start + chunk_size], bot,
+                    width, height, tuning))
+        for future in as_completed(futures):
+            rows = future.result()
+            level = rows[0]["level"]
+            results[level].extend(rows)
+            if on_session is not None:
+                for row in rows:
+                    on_session(row)
+            remaining[level] -= len(rows)
+            if not remaining[level]:
+                summaries[level] = summarize(level, results.pop(level))
+                summaries[level].update(tuning_fields(tuning))
+                if on_level is not None:
+                    on_level(summaries[level])
+    return [summaries[level] for level in levels if level in summaries]
+
+
+# ---------------------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------------------
+def parse_levels(text: str) -> List[int]:
+    """Turn ``"1-5,8"`` into ``[1, 2, 3, 4, 5, 8]``."""
+    levels = []
+    for part in text.split(","):
+        first, _, last = part.partition("-")
+        levels.extend(range(int(first), int(last or first) + 1))
+    return levels
+
+
+def parse_weights(text: str) -> Dict[str, float]:
+    """Turn ``"black=10,red=5"`` into spawn percentages per fruit colour.
+
+    Like :func:`fruit.spawn_probabilities`, green fruits get whatever is
+    left of 100 percent unless they are given explicitly.
+    """
+    weights = {}
+    for part in text.split(","):
+        color, _, weight = part.partition("=")
+        color = color.strip()
+        if color not in FRUIT_HITS:
+            raise ValueError(f"unknown fruit colour {color!r}")
+        weights[color] = float(weight)
+    weights.setdefault(DEFAULT_FRUIT[0], max(100 - sum(weights.values()), 0))
+    if sum(weights.values()) <= 0:
+        raise ValueError("spawn weights must not all be zero")
+    return weights
+
+
+def write_summary(rows: List[Dict[str, object]], path: str) -> None:
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"levels": rows}, fh, indent=2)
+        return
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        description="Simulate many seeded sessions per level with a bot.")
+    parser.add_argument("--levels", default="1-20", type=parse_levels,
+                        help="levels to play, e.g. 1-20 or 3,5,7")
+    parser.add_argument("--sessions", type=int, default=100,
+                        help="sessions per level")
+    parser.add_argument("--bot", choices=sorted(BOTS), default="sword")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="base seed of the sweep")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes")
+    parser.add_argument("--fruit-speed", type=float,
+                        default=Tuning.fruit_speed,
+                        help="speed of a level 0 fruit; each level adds one")
+    parser.add_argument("--spawn-interval", type=int,
+                        default=Tuning.spawn_interval_ms,
+                        help="ms between spawns before the level speed-up")
+    parser.add_argument("--spawn-weights", type=parse_weights,
+                        help="fixed spawn percentages for every level, "
+                             "e.g. black=10,red=5 (green gets the rest)")
+    parser.add_argument("--output", help="per-level statistics (.csv/.json)")
+    parser.add_argument("--raw", help="CSV file receiving every session")
+    args = parser.parse_args(argv)
+
+    raw_file = raw_writer = None
+    if args.raw:
+        raw_file = open(args.raw, "w", newline="", encoding="utf-8")
+        raw_writer = csv.DictWriter(raw_file, fieldnames=SESSION_FIELDS)
+        raw_writer.writeheader()
+
+    def print_level(row: Dict[str, object]) -> None:
+        print(f"level {row['level']:2d}: "
+              f"survived {row['survival_ms_mean'] / 1000:5.1f}s, "
+              f"lost {row['lives_lost_mean']:6.1f} lives, "
+              f"peak {row['peak_fruits_max']:3d} fruits, "
+              f"{row['ticks_per_sec']:,.0f} ticks/s", flush=True)
+
+    tuning = Tuning(args.fruit_speed, args.spawn_interval, args.spawn_weights)
+    started = time.perf_counter()
+    try:
+        rows = sweep(args.levels, args.sessions, bot=args.bot,
+                     seed=args.seed, workers=args.workers,
+                     on_session=raw_writer.writerow if raw_writer else None,
+                     on_level=print_level, tuning=tuning)
+    finally:
+        if raw_file is not None:
+            raw_file.close()
+    print(f"{len(args.levels) * args.sessions} sessions in "
+          f"{time.perf_counter() - started:.1f}s")
+    if args.output and rows:
+        write_summary(rows, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,20 @@
+"""Benchmarks for the gameplay hot paths.
+
+Every benchmark is a small function registered with :func:`workloads.benchmark`
+that prepares its data and returns the code to be timed.  Workloads come in
+several sizes so that slow growth with map size or fruit count shows up
+clearly.  Run them with::
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline benchmarks/baseline.json --threshold 25
+
+The second form exits with status 1 if any benchmark became more than 25
+percent slower than the stored baseline.  Timings depend on the computer, so
+``benchmarks/baseline.json`` (recorded on Linux with Python 3.11 and NumPy
+2.4) is only a starting point; record one on your own machine before making
+changes with::
+
+    python -m benchmarks --output benchmarks/baseline.json
+
+See ``python -m benchmarks --help`` for all options.
+"""
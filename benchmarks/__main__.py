@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+"""Command line runner for the benchmark suite."""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Make the game modules importable when run as ``python -m benchmarks``
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+from benchmarks.workloads import REGISTRY
+
+
+def time_call(func, min_time: float = 0.2, repeats: int = 5) -> Dict:
+    """Time ``func`` and return seconds per call.
+
+    The number of calls per repeat is chosen so a repeat takes about
+    ``min_time / repeats`` seconds; the median over repeats is reported.
+    """
+    func()  # warm up caches and lazy set-up
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / repeats or loops >= 1 << 20:
+            break
+        loops *= 2
+    samples = [elapsed / loops]
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - started) / loops)
+    return {
+        "seconds": statistics.median(samples),
+        "min_seconds": min(samples),
+        "loops": loops,
+        "repeats": repeats,
+    }
+
+
+def run_all(quick: bool = False, only: str | None = None,
+            min_time: float = 0.2) -> Dict:
+    """Run every registered benchmark and return the results document."""
+    results = {}
+    for name, (workload, sizes, quick_sizes) in REGISTRY.items():
+        if only and only not in name:
+            continue
+        for size in quick_sizes if quick else sizes:
+            key = f"{name}[{size}]"
+            results[key] = time_call(workload(size), min_time=min_time)
+            print(f"{key:32s} {results[key]['seconds'] * 1e6:12.1f} us",
+                  file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Return a message for every benchmark slower than the baseline.
+
+    ``threshold`` is the allowed slowdown in percent.  Benchmarks missing
+    from either document are ignored.
+    """
+    regressions = []
+    for key, entry in results["results"].items():
+        old = baseline.get("results", {}).get(key)
+        if not old:
+            continue
+        change = (entry["seconds"] / old["seconds"] - 1) * 100
+        if change > threshold:
+            regressions.append(
+                f"{key}: {old['seconds'] * 1e6:.1f} us -> "
+                f"{entry['seconds'] * 1e6:.1f} us (+{change:.0f}%)")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Time the gameplay hot paths and optionally compare the "
+                    "results with a baseline file.")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare with this results file")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="allowed slowdown in percent (default 20)")
+    parser.add_argument("--quick", action="store_true",
+                        help="skip the largest workload sizes")
+    parser.add_argument("--filter", help="only run benchmarks containing this")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="seconds to spend timing each benchmark")
+    args = parser.parse_args(argv)
+
+    results = run_all(quick=args.quick, only=args.filter,
+                      min_time=args.min_time)
+    document = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(document + "\n")
+    else:
+        print(document)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print("REGRESSION", line, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
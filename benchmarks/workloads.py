@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+"""The benchmark workloads themselves.
+
+Each workload function receives a size, builds whatever data it needs and
+returns a function without arguments that performs one measured call.  Setup
+work is never timed.
+"""
+
+import atexit
+import os
+import random
+import tempfile
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+import combat
+import fruit
+import raycast
+import simulation
+from flow_field import FlowField
+from map_loader import CELL_SIZE, OccupancyGrid, parse_map
+
+Workload = Callable[[int], Callable[[], object]]
+
+# name -> (workload, sizes, sizes used with --quick)
+REGISTRY: Dict[str, Tuple[Workload, List[int], List[int]]] = {}
+
+
+def benchmark(name: str, sizes: List[int], quick: List[int] | None = None):
+    """Register the decorated workload under ``name`` for ``sizes``."""
+
+    def register(func: Workload) -> Workload:
+        REGISTRY[name] = (func, sizes, quick if quick is not None else sizes)
+        return func
+
+    return register
+
+
+def random_map_text(cols: int, rows: int, wall_share: float = 0.2,
+                    seed: int = 0) -> str:
+    """Return map text with ``S`` and ``E`` and random walls."""
+    rng = random.Random(seed)
+    lines = []
+    for row in range(rows):
+        line = "".join("#" if rng.random() < wall_share else "."
+                       for _ in range(cols))
+        lines.append(line)
+    lines[0] = "S" + lines[0][1:-1] + "E"
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Map loading
+# ---------------------------------------------------------------------------
+@benchmark("parse_map", sizes=[5, 100, 1000], quick=[5, 100])
+def parse_map_workload(rows: int):
+    """Parse a square map (``rows`` x ``rows``; the smallest is 19 x 5)."""
+    cols = 19 if rows == 5 else rows
+    handle, path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(handle, "w") as fh:
+        fh.write(random_map_text(cols, rows))
+    atexit.register(os.remove, path)
+    return lambda: parse_map(path, merge=True)
+
+
+# ---------------------------------------------------------------------------
+# Player movement
+# ---------------------------------------------------------------------------
+@benchmark("move_player", sizes=[10, 1000, 100_000], quick=[10, 1000])
+def move_player_workload(walls: int):
+    """Move the player back and forth on a map with ``walls`` wall cells."""
+    side = max(int((walls * 4) ** 0.5), 4)
+    rng = np.random.default_rng(0)
+    cells = np.zeros(side * side, dtype=np.uint8)
+    cells[rng.choice(side * side, size=walls, replace=False)] = 1
+    # keep a free strip for the player to walk along
+    cells[:side * 2] = 0
+    grid = OccupancyGrid(side, side, bytearray(cells.tobytes()))
+    size = side * CELL_SIZE
+    world = simulation.World(size, size, grid=grid,
+                             start=(CELL_SIZE, CELL_SIZE // 2))
+    sim = simulation.Simulation(world, level=1, seed=0)
+    moves = [20, 20, -20, -20]
+    state = {"i": 0}
+
+    def run():
+        state["i"] += 1
+        sim.move_player(moves[state["i"] % 4], 0)
+
+    return run
+
+
+# ---------------------------------------------------------------------------
+# Path finding
+# ---------------------------------------------------------------------------
+@benchmark("flow_field", sizes=[100, 300, 1000], quick=[100])
+def flow_field_workload(side: int):
+    """Rebuild the flow field of a ``side`` x ``side`` map with 20% walls."""
+    cells = np.random.default_rng(0).random(side * side) < 0.2
+    grid = OccupancyGrid(side, side, bytearray(cells.astype(np.uint8)))
+    field = FlowField(grid, 0, 0)
+    # two free cells, so every call moves the target and searches again
+    free = np.flatnonzero(~cells)[[0, -1]]
+    targets = [((i % side + 0.5) * CELL_SIZE, (i // side + 0.5) * CELL_SIZE)
+               for i in free.tolist()]
+    state = {"i": 0}
+
+    def run():
+        state["i"] += 1
+        field.update(*targets[state["i"] % 2])
+
+    return run
+
+
+# ---------------------------------------------------------------------------
+# Ray casting
+# ---------------------------------------------------------------------------
+@benchmark("raycast_many", sizes=[64, 10_000], quick=[64])
+def raycast_many_workload(rays: int):
+    """Cast a fan of ``rays`` rays across a 100 x 100 cell random map."""
+    cells = np.random.default_rng(0).random(100 * 100) < 0.05
+    grid = OccupancyGrid(100, 100, bytearray(cells.astype(np.uint8)))
+    angles = np.linspace(0, 2 * np.pi, rays, endpoint=False)
+    centre = 50 * CELL_SIZE + CELL_SIZE / 2
+    return lambda: raycast.raycast_many(grid, centre, centre, np.cos(angles),
+                                        np.sin(angles))
+
+
+# ---------------------------------------------------------------------------
+# Fruits
+# ---------------------------------------------------------------------------
+@benchmark("update_fruits", sizes=[10, 1000, 100_000], quick=[10, 1000])
+def update_fruits_workload(count: int):
+    """Move and hit-test ``count`` fruits for one tick, sword swinging."""
+    data = parse_map(os.path.join(os.path.dirname(__file__), os.pardir,
+                                  "maps", "example_map.txt"), merge=True)
+    world = simulation.World.from_map(data, 1920, 1080)
+    sim = simulation.Simulation(world, level=20, seed=0)
+    sim.base_x, sim.base_y = 960, 540
+    sim.aim_sword(1060, 540)
+    rng = np.random.default_rng(0)
+    store = fruit.FruitStore(capacity=count)
+    for _ in range(count):
+        store.add(fruit.Fruit(20, 0, 0, color="black", hits=5))
+    store.x[:count] = rng.uniform(0, 1920, count)
+    store.y[:count] = rng.uniform(0, 1080, count)
+    sim.fruits = store
+    saved = {name: getattr(store, name).copy() for name in store._COLUMNS}
+
+    def run():
+        for name, column in saved.items():
+            np.copyto(getattr(store, name), column)
+        store.count = count
+        sim.running = True
+        sim.swing_sword()
+        sim.update_fruits()
+        sim.events.clear()
+
+    return run
+
+
+@benchmark("fire", sizes=[10, 1000, 100_000], quick=[10, 1000])
+def fire_workload(count: int):
+    """Resolve a tick's worth of shots (a fan of 5) among ``count`` fruits."""
+    rng = np.random.default_rng(0)
+    store = fruit.FruitStore(capacity=count)
+    for _ in range(count):
+        store.add(fruit.Fruit(20, 0, 0, color="black", hits=5))
+    store.x[:count] = rng.uniform(0, 1920, count)
+    store.y[:count] = rng.uniform(0, 1080, count)
+    saved = {name: getattr(store, name).copy() for name in store._COLUMNS}
+    angles = np.linspace(0, 2 * np.pi, 5, endpoint=False)
+
+    def run():
+        for name, column in saved.items():
+            np.copyto(getattr(store, name), column)
+        combat.fire(store, None, 960, 540, np.cos(angles), np.sin(angles))
+
+    return run
+
+
+# ---------------------------------------------------------------------------
+# Spawning
+# ---------------------------------------------------------------------------
+@benchmark("spawn_probabilities", sizes=[1000])
+def spawn_probabilities_workload(calls: int):
+    """Compute the spawn table for every level, ``calls`` times."""
+
+    def run():
+        for i in range(calls):
+            fruit.spawn_probabilities(i % 20 + 1)
+
+    return run
+
+
+@benchmark("choose_fruit_type", sizes=[1000])
+def choose_fruit_type_workload(calls: int):
+    """Draw ``calls`` fruit types one at a time like ``spawn_fruit`` does."""
+    world = simulation.World(800, 600)
+    sim = simulation.Simulation(world, level=20, seed=0)
+
+    def run():
+        for _ in range(calls):
+            sim.choose_fruit_type()
+
+    return run
+
+
+@benchmark("sample_codes", sizes=[1000, 1_000_000], quick=[1000])
+def sample_codes_workload(count: int):
+    """Draw ``count`` fruit types in one batch."""
+    sampler = fruit.spawn_sampler(20)
+    rng = np.random.default_rng(0)
+    return lambda: sampler.sample_codes(count, rng)
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+"""Ranged combat: a gun with a fire rate, a magazine and hitscan shots.
+
+Combat is optional.  A :class:`~simulation.Simulation` only shoots when it is
+given a :class:`Weapon`.  Shots are "hitscan": they hit instantly along a
+straight line.  A shot stops at the nearest wall, found with
+:func:`raycast.raycast_many`, or at the nearest fruit in front of that wall.
+Every hit takes ``damage`` off the fruit's ``hp``, so a black fruit needs as
+many shots as sword hits (see :data:`fruit.FRUIT_HITS`).
+
+With hundreds of fruits on screen, testing every fruit against every shot
+would be slow.  So :class:`FruitHash` first sorts the fruits into the cells
+of a coarse grid, and a shot only tests the fruits in the cells along its
+line.  All shots fired in one tick are resolved together by :func:`fire`.
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+from fruit import Fruit, FruitStore
+from map_loader import OccupancyGrid
+from raycast import raycast_many
+
+# ---------------------------------------------------------------------------
+# Configuration values
+# ---------------------------------------------------------------------------
+# Time between two shots while the trigger is held
+FIRE_INTERVAL_MS = 100
+MAGAZINE_SIZE = 30
+RESERVE_AMMO = 90
+RELOAD_MS = 1500
+GUN_DAMAGE = 1
+GUN_RANGE = 1000
+FRUIT_RADIUS = Fruit.radius
+# Edge length of the cells of :class:`FruitHash`
+HASH_CELL = 64
+
+
+class Weapon:
+    """Fire rate, magazine and reload of a gun.
+
+    The simulation sets :attr:`trigger` while the fire button is held and
+    calls :meth:`tick` once per tick.  :meth:`tick` returns how many shots
+    leave the gun during that tick; with an ``interval_ms`` shorter than a
+    tick that can be several.  An empty magazine is refilled from
+    :attr:`reserve` automatically, which takes ``reload_ms``.
+    """
+
+    def __init__(self, interval_ms: int = FIRE_INTERVAL_MS,
+                 magazine: int = MAGAZINE_SIZE, reserve: int = RESERVE_AMMO,
+                 reload_ms: int = RELOAD_MS, damage: int = GUN_DAMAGE,
+                 max_range: float = GUN_RANGE) -> None:
+        self.interval_ms = interval_ms
+        self.magazine = magazine
+        self.ammo = magazine
+        self.reserve = reserve
+        self.reload_ms = reload_ms
+        self.damage = damage
+        self.max_range = max_range
+        self.trigger = False
+        self.reload_ms_left = 0
+        self.shots_fired = 0
+        # Time from the start of the next tick until the gun can fire again
+        self._cooldown_ms = 0
+
+    @property
+    def reloading(self) -> bool:
+        return self.reload_ms_left > 0
+
+    def reload(self) -> bool:
+        """Start reloading; ``False`` if there is nothing to reload."""
+        if self.reloading or self.ammo == self.magazine or not self.reserve:
+            return False
+        self.reload_ms_left = self.reload_ms
+        return True
+
+    def tick(self, ms: int) -> int:
+        """Let ``ms`` milliseconds pass and return the shots fired meanwhile."""
+        if self.reloading:
+            self.reload_ms_left -= ms
+            if self.reload_ms_left > 0:
+                return 0
+            self.reload_ms_left = 0
+            loaded = min(self.magazine - self.ammo, self.reserve)
+            self.ammo += loaded
+            self.reserve -= loaded
+
+        shots = 0
+        while self.trigger and self.ammo and self._cooldown_ms < ms:
+            shots += 1
+            self.ammo -= 1
+            self._cooldown_ms += self.interval_ms
+        # Time spent not shooting does not build up a burst of shots
+        self._cooldown_ms = max(self._cooldown_ms - ms, 0)
+        if not self.ammo:
+            self.reload()
+        self.shots_fired += shots
+        return shots
+
+
+# ---------------------------------------------------------------------------
+# Broadphase
+# ---------------------------------------------------------------------------
+class FruitHash:
+    """Fruit positions sorted into the square cells of a coarse grid.
+
+    Build one per tick from the fruit positions.  The grid only spans the
+    cells the fruits are in; :meth:`cell_index` numbers them and
+    :meth:`fruits_in` returns the fruits in any number of them without
+    looking at the other fruits.
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray,
+                 cell: float = HASH_CELL) -> None:
+        self.cell = cell
+        col = np.floor(x / cell).astype(np.int64)
+        row = np.floor(y / cell).astype(np.int64)
+        if len(x):
+            self.col0, self.row0 = int(col.min()), int(row.min())
+            self.cols = int(col.max()) - self.col0 + 1
+            self.rows = int(row.max()) - self.row0 + 1
+        else:
+            self.col0 = self.row0 = self.cols = self.rows = 0
+        cells = self.cols * self.rows
+        index = (col - self.col0) * self.rows + (row - self.row0)
+        # NumPy sorts 16 bit numbers with a much faster radix sort
+        if cells <= 1 << 16:
+            index = index.astype(np.uint16)
+        self.order = np.argsort(index, kind="stable")
+        # fruits of cell ``i`` are ``order[start[i]:start[i + 1]]``
+        self.start = np.zeros(cells + 1, dtype=np.int64)
+        np.cumsum(np.bincount(index, minlength=cells), out=self.start[1:])
+
+    @property
+    def cells(self) -> int:
+        return self.cols * self.rows
+
+    def cell_index(self, col: np.ndarray, row: np.ndarray) -> np.ndarray:
+        """Return the number of cell ``(col, row)``, ``-1`` outside the grid."""
+        col, row = col - self.col0, row - self.row0
+        inside = (col >= 0) & (col < self.cols) & (row >= 0) & (row < self.rows)
+        return np.where(inside, col * self.rows + row, -1)
+
+    def fruits_in(self, owner: np.ndarray, index: np.ndarray
+                  ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the fruits in the cells ``index`` as ``(owner, fruit)`` pairs.
+
+        ``owner`` holds one value per cell, for example the shot that asked
+        for it, and is repeated for every fruit found in that cell.  Cells
+        outside the grid (``-1``) hold no fruits.
+        """
+        inside = index >= 0
+        owner, index = owner[inside], index[inside]
+        start = self.start[index]
+        count = self.start[index + 1] - start
+        first = np.cumsum(count) - count
+        position = np.arange(int(count.sum())) + np.repeat(start - first,
+                                                           count)
+        return np.repeat(owner, count), self.order[position]
+
+
+def nearest_fruits(fruit_hash: FruitHash, x: np.ndarray, y: np.ndarray,
+                   ox: np.ndarray, oy: np.ndarray, dx: np.ndarray,
+                   dy: np.ndarray, limit: np.ndarray,
+                   radius: float = FRUIT_RADIUS,
+                   ignore: np.ndarray | None = None
+                   ) -> Tuple[np.ndarray, np.ndarray]:
+    """Find the first fruit along each shot.
+
+    Shot ``i`` starts at ``(ox[i], oy[i])``, flies in the unit direction
+    ``(dx[i], dy[i])`` and ends after ``limit[i]`` pixels.  Fruits are
+    circles at ``x, y``; fruits flagged in ``ignore`` are skipped.  Returns
+    the index of the fruit each shot hits (``-1`` for none) and the distance
+    at which the shot stopped.
+    """
+    shots = len(ox)
+    hit_fruit = np.full(shots, -1, dtype=np.int64)
+    distance = limit.astype(np.float64)
+    if not shots or not len(x):
+        return hit_fruit, distance
+
+    # Points every half cell along each shot, including both ends.  A fruit
+    # touching the shot has its centre within ``radius`` of one of them
+    # (plus a quarter cell), so the cells around them hold every candidate.
+    cell = fruit_hash.cell
+    samples = np.ceil(distance / (cell / 2)).astype(np.int64) + 1
+    shot = np.repeat(np.arange(shots), samples)
+    first = np.cumsum(samples) - samples
+    t = np.minimum((np.arange(len(shot)) - np.repeat(first, samples))
+                   * (cell / 2), distance[shot])
+    col = np.floor((ox[shot] + dx[shot] * t) / cell).astype(np.int64)
+    row = np.floor((oy[shot] + dy[shot] * t) / cell).astype(np.int64)
+    reach = math.ceil((radius + cell / 2) / cell)
+    around = np.arange(-reach, reach + 1)
+    near_col, near_row = np.meshgrid(around, around)
+    index = fruit_hash.cell_index(col[:, None] + near_col.ravel(),
+                                  row[:, None] + near_row.ravel())
+    # every cell once per shot
+    wanted = np.unique((shot[:, None] * (fruit_hash.cells + 1) + index + 1)
+                       .ravel())
+    shot, fruit = fruit_hash.fruits_in(wanted // (fruit_hash.cells + 1),
+                                       wanted % (fruit_hash.cells + 1) - 1)
+
+    # Exact test: where does each shot enter each candidate circle?
+    vx, vy = x[fruit] - ox[shot], y[fruit] - oy[shot]
+    along = vx * dx[shot] + vy * dy[shot]
+    centre2 = vx * vx + vy * vy
+    miss2 = centre2 - along * along
+    r2 = radius * radius
+    t = np.where(centre2 <= r2, 0.0,
+                 along - np.sqrt(np.maximum(r2 - miss2, 0.0)))
+    hit = (miss2 <= r2) & (t >= 0) & (t <= distance[shot])
+    if ignore is not None:
+        hit &= ~ignore[fruit]
+    shot, fruit, t = shot[hit], fruit[hit], t[hit]
+
+    order = np.lexsort((t, shot))
+    shot, fruit, t = shot[order], fruit[order], t[order]
+    winners, nearest = np.unique(shot, return_index=True)
+    hit_fruit[winners] = fruit[nearest]
+    distance[winners] = t[nearest]
+    return hit_fruit, distance
+
+
+# ---------------------------------------------------------------------------
+# Shooting
+# ---------------------------------------------------------------------------
+def fire(store: FruitStore, grid: OccupancyGrid | None, ox, oy, dx, dy,
+         max_range: float = GUN_RANGE, damage: int = GUN_DAMAGE,
+         radius: float = FRUIT_RADIUS) -> Tuple[np.ndarray, np.ndarray]:
+    """Fire a batch of shots at the fruits in ``store``, in order.
+
+    The arguments broadcast like those of :func:`raycast.raycast_many`; one
+    origin with a direction repeated ``n`` times fires ``n`` shots along the
+    same line.  Every hit takes ``damage`` off the fruit's ``hp``.  Once a
+    fruit is destroyed the later shots of the batch fly on to whatever is
+    behind it.  Destroyed fruits get their ``alive`` flag cleared; removing
+    them is left to the caller (see :meth:`FruitStore.remove_dead`).  Without
+    a ``grid`` shots only stop at fruits or after ``max_range``.
+
+    Returns the index of the fruit each shot hit (``-1`` for none) and the
+    distance at which each shot stopped.
+    """
+    ox, oy, dx, dy = (a.astype(np.float64).ravel() for a in
+                      np.broadcast_arrays(ox, oy, dx, dy))
+    if grid is not None:
+        limit, _, _ = raycast_many(grid, ox, oy, dx, dy, max_range)
+        limit = np.minimum(limit, max_range)
+    else:
+        limit = np.full(len(ox), float(max_range))
+    length = np.hypot(dx, dy)
+    # a shot without a direction goes nowhere
+    limit[length == 0] = 0.0
+    length[length == 0] = 1.0
+    dx, dy = dx / length, dy / length
+
+    n = store.count
+    x, y, hp = store.x[:n], store.y[:n], store.hp[:n]
+    fruit_hash = FruitHash(x, y)
+    hit_fruit = np.full(len(ox), -1, dtype=np.int64)
+    distance = limit.copy()
+    # fruits without hp left are already gone
+    destroyed = (hp <= 0) | ~store.alive[:n]
+    pending = np.arange(len(ox))
+    while len(pending):
+        target, stop = nearest_fruits(fruit_hash, x, y, ox[pending],
+                                      oy[pending], dx[pending], dy[pending],
+                                      limit[pending], radius, destroyed)
+        hit_fruit[pending], distance[pending] = target, stop
+        landed = target >= 0
+        shots, target = pending[landed], target[landed]
+
+        # Number the shots at each fruit in firing order; the shots beyond
+        # those needed to destroy it fly on in the next round
+        order = np.argsort(target, kind="stable")
+        shots, target = shots[order], target[order]
+        rank = np.arange(len(target)) - np.searchsorted(target, target)
+        needed = -(-hp[target] // damage)
+        counts = rank < needed
+        np.subtract.at(hp, target[counts], damage)
+        destroyed[target[counts]] |= hp[target[counts]] <= 0
+        pending = np.sort(shots[~counts])
+
+    store.alive[:n] &= ~destroyed
+    return hit_fruit, distance
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+"""Shared path finding for all fruits.
+
+Letting every fruit search its own path to the player would be far too slow
+once hundreds of fruits are alive.  Instead a :class:`FlowField` runs one
+breadth-first search over the map grid, starting from the player's cell, and
+remembers for every cell which neighbouring cell leads to the player fastest.
+A fruit then only has to look up the cell it is in to know where to go next.
+The search is repeated only when the player moves into another cell.  It
+works on whole rings of cells at once with NumPy, so even maps with a million
+cells are searched in a fraction of a second.
+"""
+
+import numpy as np
+
+from map_loader import OccupancyGrid
+
+# Neighbour offsets (column, row) a fruit may step to, diagonals last
+_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1),
+          (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+class FlowField:
+    """Next-cell lookup table leading every free cell towards one target.
+
+    The field covers the whole ``width`` x ``height`` play area, which may be
+    larger than the map itself; cells beyond the map are free.  Diagonal steps
+    are only taken when both cells beside the diagonal are free, so fruits do
+    not cut wall corners.
+    """
+
+    def __init__(self, grid: OccupancyGrid, width: int, height: int) -> None:
+        size = self.cell_size = grid.cell_size
+        self.cols = max(grid.cols, -(-width // size))
+        self.rows = max(grid.rows, -(-height // size))
+        walls = np.zeros((self.rows, self.cols), dtype=bool)
+        if grid.cols and grid.rows:
+            cells = np.frombuffer(grid.cells, dtype=np.uint8)
+            walls[:grid.rows, :grid.cols] = cells.reshape(
+                grid.rows, grid.cols) != 0
+        self.walls = walls
+        # distance in steps to the target cell, -1 where unreachable
+        self.distance = np.full((self.rows, self.cols), -1, dtype=np.int32)
+        # flat index of the next cell towards the target, -1 if there is none
+        self.next_cell = np.full(self.rows * self.cols, -1, dtype=np.int64)
+        self.target: tuple[int, int] | None = None
+
+    def cell_of(self, x: float, y: float) -> tuple[int, int]:
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def update(self, x: float, y: float) -> bool:
+        """Point the field at the cell containing ``(x, y)``.
+
+        Nothing happens while the target stays in the same cell.  Returns
+        ``True`` if the field had to be recomputed.
+        """
+        target = self.cell_of(x, y)
+        if target == self.target:
+            return False
+        self.target = target
+        self._search(*target)
+        return True
+
+    def _search(self, col: int, row: int) -> None:
+        """Breadth-first search over the four straight neighbours.
+
+        Each round takes all cells at the same distance (the frontier) and
+        finds their free, unvisited neighbours in one go.  The grid gets a
+        border of walls so no neighbour falls outside it.
+        """
+        cols, rows = self.cols, self.rows
+        width = cols + 2
+        free = np.zeros((rows + 2, width), dtype=bool)
+        free[1:-1, 1:-1] = ~self.walls
+        free = free.ravel()
+        distance = np.full(free.size, -1, dtype=np.int32)
+        if 0 <= col < cols and 0 <= row < rows and not self.walls[row, col]:
+            start = (row + 1) * width + col + 1
+            distance[start] = 0
+            # index of each cell in the list of new cells, used to drop cells
+            # reached from two sides in the same round
+            slot = np.zeros(free.size, dtype=np.int64)
+            offsets = np.array([-1, 1, -width, width])
+            frontier = np.array([start])
+            d = 0
+            while len(frontier):
+                d += 1
+                new = (frontier[:, None] + offsets).ravel()
+                new = new[free[new] & (distance[new] < 0)]
+                order = np.arange(len(new))
+                slot[new] = order
+                new = new[slot[new] == order]
+                distance[new] = d
+                frontier = new
+        self.distance = distance.reshape(rows + 2, width)[1:-1, 1:-1].copy()
+        self._pick_next_cells()
+
+    def _pick_next_cells(self) -> None:
+        """For every cell choose the reachable neighbour closest to the target.
+
+        This is done for all cells at once with shifted copies of the
+        distance array.
+        """
+        rows, cols = self.rows, self.cols
+        inf = np.iinfo(np.int32).max
+        padded = np.full((rows + 2, cols + 2), inf, dtype=np.int32)
+        padded[1:-1, 1:-1] = np.where(self.distance >= 0, self.distance, inf)
+        free = np.zeros((rows + 2, cols + 2), dtype=bool)
+        free[1:-1, 1:-1] = ~self.walls
+
+        best = padded[1:-1, 1:-1].copy()
+        # position of the chosen step in ``_STEPS``, -1 for none
+        choice = np.full((rows, cols), -1, dtype=np.int8)
+        better = np.empty((rows, cols), dtype=bool)
+        for k, (dc, dr) in enumerate(_STEPS):
+            candidate = padded[1 + dr:rows + 1 + dr, 1 + dc:cols + 1 + dc]
+            np.less(candidate, best, out=better)
+            better &= free[1 + dr:rows + 1 + dr, 1 + dc:cols + 1 + dc]
+            if dc and dr:
+                better &= free[1 + dr:rows + 1 + dr, 1:cols + 1]
+                better &= free[1:rows + 1, 1 + dc:cols + 1 + dc]
+            np.copyto(best, candidate, where=better)
+            np.copyto(choice, k, where=better)
+        # the extra last offset is picked by -1 and is replaced below
+        offsets = np.array([dr * cols + dc for dc, dr in _STEPS] + [0])
+        choice = choice.ravel()
+        next_cell = np.arange(rows * cols) + offsets[choice]
+        next_cell[choice < 0] = -1
+        self.next_cell = next_cell
+
+    def steer(self, x: np.ndarray, y: np.ndarray, target_x: float,
+              target_y: float) -> tuple[np.ndarray, np.ndarray]:
+        """Return the point each position at ``x, y`` should head for.
+
+        That is the centre of the next cell on the way to the target.  Where
+        the field has no advice (in the target cell itself, outside the play
+        area or where the target cannot be reached) the target position is
+        returned so the fruit homes in directly.
+        """
+        size, cols, rows = self.cell_size, self.cols, self.rows
+        col = np.floor_divide(x, size).astype(np.int64)
+        row = np.floor_divide(y, size).astype(np.int64)
+        inside = (col >= 0) & (col < cols) & (row >= 0) & (row < rows)
+        nxt = np.full(len(x), -1, dtype=np.int64)
+        nxt[inside] = self.next_cell[row[inside] * cols + col[inside]]
+        has_next = nxt >= 0
+        tx = np.where(has_next, (nxt % cols + 0.5) * size, target_x)
+        ty = np.where(has_next, (nxt // cols + 0.5) * size, target_y)
+        return tx, ty
@@ -5,99 +5,420 @@ from __future__ import annotations
 Separating the :class:`Fruit` class and spawn logic from the rest of the
 application keeps the main game code shorter and easier to understand.  The
 module also exposes :func:`spawn_probabilities` which describes how the
-difficulty ramps up with higher levels.
+difficulty ramps up with higher levels, and :class:`FruitStore` which keeps a
+whole population of fruits in NumPy arrays so they can be updated together.
+:class:`FruitPool` recycles the canvas items used to draw fruits and
+:func:`make_fruit_sprites` prepares the pictures they show.
 """
 
-from dataclasses import dataclass
-import tkinter as tk
+import base64
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:  # pragma: no cover - only needed for type hints
+    import tkinter as tk
 
 # base vertical speed of falling fruits
 FRUIT_BASE_SPEED = 2
 
+# ---------------------------------------------------------------------------
+# Spawn table
+# ---------------------------------------------------------------------------
+# Every kind of fruit in one place: colour, hits needed to destroy it and how
+# its spawn chance (in percent) develops.  A fruit type appears from
+# ``first_level`` on with ``base`` percent, growing by ``growth`` per level.
+# Chances are handed out from top to bottom until 100 percent are used up and
+# the basic green fruit gets whatever is left.
+SPAWN_TABLE = (
+    # colour, hits, base, growth, first_level
+    ("black", 5, 1, 1, 1),
+    ("red", 3, 3, 1, 1),
+    ("purple", 2, 5, 2, 1),
+    ("orange", 2, 2, 2, 2),
+)
+DEFAULT_FRUIT = ("green", 1)
+
+FRUIT_HITS = {DEFAULT_FRUIT[0]: DEFAULT_FRUIT[1]}
+FRUIT_HITS.update((color, hits) for color, hits, *_ in reversed(SPAWN_TABLE))
+
+# Every colour a fruit can have.  :class:`FruitStore` keeps the index into
+# this tuple instead of the colour name.
+FRUIT_COLORS = tuple(FRUIT_HITS)
+COLOR_CODES = {color: code for code, color in enumerate(FRUIT_COLORS)}
+
 
 def spawn_probabilities(level: int) -> dict:
     """Return spawn percentages for each fruit color at ``level``.
 
-    The allocation grows with the level while ensuring the total never exceeds
-    ``100``.  Orange fruits are not available on the very first level so their
-    probability is only allocated from level 2 onwards.  Any remaining
-    probability is assigned to green fruits.
+    The allocation follows :data:`SPAWN_TABLE` and grows with the level while
+    ensuring the total never exceeds ``100``.  Fruit types that are not
+    available yet (orange only appears from level 2) or that got no share are
+    left out.  Any remaining probability is assigned to green fruits.
     """
 
     remaining = 100
-
+    probs = {}
     # Always allocate in order of the more challenging fruit first
-    black = min(1 + (level - 1) * 1, remaining)
-    remaining -= black
+    for color, _, base, growth, first_level in SPAWN_TABLE:
+        if level < first_level:
+            continue
+        chance = min(base + (level - first_level) * growth, remaining)
+        if chance > 0:
+            probs[color] = chance
+            remaining -= chance
 
-    red = min(3 + (level - 1) * 1, remaining)
-    remaining -= red
+    # Whatever probability is left goes to the basic green fruit
+    probs[DEFAULT_FRUIT[0]] = remaining
+    return probs
 
-    purple = min(5 + (level - 1) * 2, remaining)
-    remaining -= purple
 
-    # Orange fruits appear only from level 2 upwards
-    orange = 0
-    if level > 1 and remaining > 0:
-        orange = min(2 + (level - 2) * 2, remaining)
-        remaining -= orange
+class SpawnSampler:
+    """Draw fruit types with fixed chances in constant time.
 
-    # Whatever probability is left goes to the basic green fruit
-    green = remaining
+    The weights are turned into the tables of Walker's alias method once:
+    every draw then picks a random column and flips one biased coin, no
+    matter how many fruit types there are.  Use :meth:`sample` for a single
+    fruit and :meth:`sample_codes` to draw a whole batch with NumPy.
+    """
+
+    def __init__(self, weights: Dict[str, float]) -> None:
+        self.colors = [color for color, weight in weights.items() if weight > 0]
+        self.hits = [FRUIT_HITS[color] for color in self.colors]
+        self.codes = np.array([COLOR_CODES[c] for c in self.colors],
+                              dtype=np.uint8)
+        count = len(self.colors)
+        total = sum(weights[color] for color in self.colors)
+        scaled = [weights[color] * count / total for color in self.colors]
+        prob = [1.0] * count
+        alias = list(range(count))
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = g
+            scaled[g] -= 1 - scaled[s]
+            (small if scaled[g] < 1 else large).append(g)
+        # Whatever is left over is (up to rounding) exactly 1
+        self.prob = prob
+        self.alias = alias
+        self._prob = np.array(prob)
+        self._alias = np.array(alias, dtype=np.int64)
+
+    def sample_index(self, rng) -> int:
+        """Return the index of one fruit type; ``rng`` needs ``random()``."""
+        u = rng.random() * len(self.prob)
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+    def sample(self, rng) -> Tuple[str, int]:
+        """Return ``(color, hits)`` of one random fruit type."""
+        i = self.sample_index(rng)
+        return self.colors[i], self.hits[i]
+
+    def sample_codes(self, count: int, rng: np.random.Generator) -> np.ndarray:
+        """Return the colour codes of ``count`` random fruits at once."""
+        columns = rng.integers(0, len(self.prob), size=count)
+        keep = rng.random(count) < self._prob[columns]
+        return self.codes[np.where(keep, columns, self._alias[columns])]
 
-    probs = {"black": black, "red": red, "purple": purple, "green": green}
-    if orange:
-        probs["orange"] = orange
-    return probs
 
+_samplers: Dict[int, SpawnSampler] = {}
 
-@dataclass
+
+def spawn_sampler(level: int) -> SpawnSampler:
+    """Return the (cached) :class:`SpawnSampler` for ``level``."""
+    sampler = _samplers.get(level)
+    if sampler is None:
+        sampler = _samplers[level] = SpawnSampler(spawn_probabilities(level))
+    return sampler
+
+
+@dataclass(eq=False)
 class Fruit:
     """Simple falling enemy that moves faster on higher levels.
 
     Fruits can require multiple hits to destroy depending on their colour.  The
     class is intentionally small so that beginners can easily grasp how it
-    works.  Each fruit draws a tiny sword icon on top for visual flair.
+    works.  It only stores the state of a fruit; drawing it (including the tiny
+    sword icon on top) is left to the user interface.
     """
 
-    canvas: tk.Canvas
     level: int
-    x: int
-    y: int
+    x: float
+    y: float
     color: str = "green"
     hits: int = 1
+    radius: int = 15
+    hp: int = field(init=False)
+    speed: int = field(init=False)
 
     def __post_init__(self) -> None:
         self.hp = self.hits
-        self.id = self.canvas.create_oval(
-            self.x - 15, self.y - 15, self.x + 15, self.y + 15, fill=self.color
-        )
-        # draw a tiny sword icon on top of the fruit
-        blade = self.canvas.create_line(self.x, self.y - 10, self.x, self.y + 10,
-                                       width=2, fill="black")
-        guard = self.canvas.create_line(self.x - 5, self.y + 5, self.x + 5,
-                                       self.y + 5, width=2, fill="black")
-        self.icon_ids = [blade, guard]
         # speed increases with level
         self.speed = FRUIT_BASE_SPEED + self.level
 
+    # -- geometry -------------------------------------------------------------
+    def bbox(self) -> tuple[float, float, float, float]:
+        """Return the bounding box ``(x1, y1, x2, y2)`` of the fruit."""
+        r = self.radius
+        return self.x - r, self.y - r, self.x + r, self.y + r
+
     # -- movement -------------------------------------------------------------
     def move(self, target_x: float, target_y: float) -> None:
         """Move the fruit towards a target position."""
-        x1, y1, x2, y2 = self.canvas.coords(self.id)
-        cx = (x1 + x2) / 2
-        cy = (y1 + y2) / 2
-        dx = target_x - cx
-        dy = target_y - cy
+        dx = target_x - self.x
+        dy = target_y - self.y
         dist = (dx ** 2 + dy ** 2) ** 0.5 or 1
-        move_x = dx / dist * self.speed
-        move_y = dy / dist * self.speed
-        self.canvas.move(self.id, move_x, move_y)
-        for icon in self.icon_ids:
-            self.canvas.move(icon, move_x, move_y)
-
-    def delete(self) -> None:
-        """Remove the fruit and its sword icon from the canvas."""
-        self.canvas.delete(self.id)
-        for icon in self.icon_ids:
-            self.canvas.delete(icon)
+        self.x += dx / dist * self.speed
+        self.y += dy / dist * self.speed
+
+
+class FruitStore:
+    """All live fruits of a level stored as a structure of arrays.
+
+    Instead of one object per fruit the store keeps one NumPy array per
+    attribute (``x``, ``y``, ``speed``, ``hp``, ``color`` and ``alive``).  Only
+    the first :attr:`count` entries are in use, so code working on the whole
+    population slices the arrays with ``[:store.count]``.  Every fruit also
+    gets a unique, never reused number in ``ids`` so that the user interface
+    can tell fruits apart even though removal moves them around.
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.count = 0
+        self._next_id = 0
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.hp = np.zeros(capacity, dtype=np.int32)
+        self.color = np.zeros(capacity, dtype=np.uint8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+
+    _COLUMNS = ("x", "y", "speed", "hp", "color", "alive", "ids")
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def capacity(self) -> int:
+        return len(self.x)
+
+    def _grow(self) -> None:
+        """Double the size of every array."""
+        for name in self._COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(len(old) * 2, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, fruit: Fruit) -> int:
+        """Append ``fruit`` to the store and return its id."""
+        if self.count == self.capacity:
+            self._grow()
+        i = self.count
+        self.x[i] = fruit.x
+        self.y[i] = fruit.y
+        self.speed[i] = fruit.speed
+        self.hp[i] = fruit.hp
+        self.color[i] = COLOR_CODES[fruit.color]
+        self.alive[i] = True
+        self.ids[i] = fid = self._next_id
+        self._next_id += 1
+        self.count += 1
+        return fid
+
+    def get(self, index: int, level: int = 1) -> Fruit:
+        """Return a :class:`Fruit` copy of the entry at ``index``."""
+        fruit = Fruit(level, float(self.x[index]), float(self.y[index]),
+                      color=FRUIT_COLORS[self.color[index]])
+        fruit.hp = int(self.hp[index])
+        fruit.speed = float(self.speed[index])
+        return fruit
+
+    def remove(self, index: int) -> None:
+        """Remove the entry at ``index`` by moving the last entry into it."""
+        last = self.count - 1
+        if index != last:
+            for name in self._COLUMNS:
+                column = getattr(self, name)
+                column[index] = column[last]
+        self.alive[last] = False
+        self.count = last
+
+    def remove_dead(self) -> np.ndarray:
+        """Swap-remove every entry whose ``alive`` flag is cleared.
+
+        Returns the ids of the removed fruits.
+        """
+        dead = np.flatnonzero(~self.alive[:self.count])
+        removed = self.ids[dead].copy()
+        # Going backwards means the entry swapped in is always a live one
+        for index in dead[::-1].tolist():
+            self.remove(index)
+        return removed
+
+    def move_towards(self, target_x: float | np.ndarray,
+                     target_y: float | np.ndarray, first: int = 0) -> None:
+        """Move fruits towards ``(target_x, target_y)`` by their speed.
+
+        Only entries from index ``first`` on are moved.  The target may be a
+        single point or one point per moved fruit.
+        """
+        n = self.count
+        x, y = self.x[first:n], self.y[first:n]
+        dx = target_x - x
+        dy = target_y - y
+        dist = np.hypot(dx, dy)
+        dist[dist == 0] = 1
+        step = self.speed[first:n] / dist
+        x += dx * step
+        y += dy * step
+
+
+# ---------------------------------------------------------------------------
+# Sprites
+# ---------------------------------------------------------------------------
+def _png(width: int, height: int, rows: List[bytes]) -> bytes:
+    """Encode RGBA ``rows`` as a PNG file."""
+
+    def chunk(kind: bytes, payload: bytes) -> bytes:
+        crc = zlib.crc32(kind + payload) & 0xFFFFFFFF
+        return struct.pack(">I", len(payload)) + kind + payload + \
+            struct.pack(">I", crc)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    raw = b"".join(b"\x00" + row for row in rows)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+            chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+def fruit_sprite_png(rgb: Tuple[int, int, int], radius: int = 15) -> bytes:
+    """Return a PNG picture of a fruit of colour ``rgb``.
+
+    The picture looks like the fruits drawn with canvas primitives: a circle
+    with a thin black outline and a tiny black sword (a blade plus a guard)
+    on top.  Pixels outside the circle are transparent and the edge is
+    smoothed by sampling every pixel sixteen times.
+    """
+
+    size = radius * 2 + 1
+    centre = radius + 0.5
+    rows = []
+    for py in range(size):
+        row = bytearray()
+        for px in range(size):
+            inside = outline = 0
+            for sy in range(4):
+                for sx in range(4):
+                    dx = px + (sx + 0.5) / 4 - centre
+                    dy = py + (sy + 0.5) / 4 - centre
+                    dist = (dx * dx + dy * dy) ** 0.5
+                    if dist <= radius:
+                        inside += 1
+                        if dist > radius - 1:
+                            outline += 1
+            # tiny sword icon: blade from -10 to +10, guard 5 below centre
+            ox, oy = px - radius, py - radius
+            icon = ((ox in (0, 1) and -10 <= oy <= 10) or
+                    (oy in (5, 6) and -5 <= ox <= 5))
+            if icon or outline * 2 > inside:
+                color = (0, 0, 0)
+            else:
+                color = rgb
+            row += bytes(color) + bytes([inside * 255 // 16])
+        rows.append(bytes(row))
+    return _png(size, size, rows)
+
+
+def make_fruit_sprites(master: tk.Misc, colors=FRUIT_COLORS,
+                       radius: int = 15) -> Dict[str, tk.PhotoImage]:
+    """Pre-render one :class:`tkinter.PhotoImage` per fruit colour.
+
+    Colour names are resolved by Tk itself so that ``"green"`` looks the same
+    as it did when fruits were drawn as ovals.  Keep the returned dictionary
+    alive for as long as the images are shown.
+    """
+
+    import tkinter as tk
+
+    sprites = {}
+    for color in colors:
+        rgb = tuple(value // 257 for value in master.winfo_rgb(color))
+        data = base64.b64encode(fruit_sprite_png(rgb, radius))
+        sprites[color] = tk.PhotoImage(master=master, data=data, format="png")
+    return sprites
+
+
+class FruitPool:
+    """Hand out canvas items for fruits and take them back for reuse.
+
+    Every fruit is a single image item showing one of the pre-rendered
+    ``sprites`` (see :func:`make_fruit_sprites`).  Creating and deleting
+    canvas items is slow and at higher levels thousands of fruits come and go
+    every minute.  Released items are therefore only hidden and kept for the
+    next fruit, which simply moves, re-skins and shows them again.  At most
+    ``max_idle`` hidden fruits are kept; anything beyond that is deleted.  The
+    counters ``created``, ``reused``, ``in_use`` and ``peak_in_use`` (the
+    high-water mark) show how well the pool works.
+    """
+
+    def __init__(self, canvas: tk.Canvas, sprites: Dict[str, tk.PhotoImage],
+                 max_idle: int = 256) -> None:
+        self.canvas = canvas
+        self.sprites = sprites
+        self.max_idle = max_idle
+        self._idle: List[int] = []
+        self.created = 0
+        self.reused = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    def stats(self) -> dict:
+        """Return the pool counters as a dictionary."""
+        return {
+            "created": self.created,
+            "reused": self.reused,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "idle": len(self._idle),
+        }
+
+    def prefill(self, count: int) -> None:
+        """Create hidden fruits up front so play starts without creation."""
+        while len(self._idle) < min(count, self.max_idle):
+            item = self._create(-100, -100, "green")
+            self.canvas.itemconfig(item, state="hidden")
+            self._idle.append(item)
+
+    def acquire(self, x: float, y: float, color: str) -> int:
+        """Return a canvas item showing a fruit of ``color`` at ``(x, y)``."""
+        if self._idle:
+            item = self._idle.pop()
+            self.canvas.coords(item, x, y)
+            self.canvas.itemconfig(item, image=self.sprites[color],
+                                   state="normal")
+            self.reused += 1
+        else:
+            item = self._create(x, y, color)
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        return item
+
+    def release(self, item: int) -> None:
+        """Give back the item of a fruit that left the game."""
+        self.in_use -= 1
+        if len(self._idle) < self.max_idle:
+            self.canvas.itemconfig(item, state="hidden")
+            self._idle.append(item)
+        else:
+            self.canvas.delete(item)
+
+    def _create(self, x: float, y: float, color: str) -> int:
+        self.created += 1
+        return self.canvas.create_image(x, y, image=self.sprites[color])
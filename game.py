@@ -2,40 +2,89 @@ from __future__ import annotations
 
 """Tkinter application implementing the sword game.
 
-The class in this module coordinates all other parts of the program.  Keeping
-the game logic separate from the helper modules makes it easier for learners
+The class in this module is the user interface of the program.  All gameplay
+rules live in :mod:`simulation`; :class:`SwordGameApp` only forwards keyboard
+and mouse input to a :class:`~simulation.Simulation` and draws its state.
+Keeping the game logic separate from the window makes it easier for learners
 to follow the flow of the program and experiment with changes.
+
+The gameplay modules pull in NumPy, which takes longer to import than it
+takes to open the window.  They are therefore imported where they are first
+needed, and a background thread imports them while the player is still
+looking at the level selection.  Once they are loaded, the fruit pictures
+are drawn while the menu is still shown, so starting a level does not have
+to wait for them.  Music is prepared the same way by
+:class:`audio.AudioManager`.
 """
 
+import importlib
 import random
+import threading
+import time
 import tkinter as tk
 from pathlib import Path
 from tkinter import messagebox
+from typing import TYPE_CHECKING, Dict
+
+from audio import DEFAULT_TRACK, AudioManager
+from profile_utils import ProfileWriter, load_profile, unlock_next_level
 
-from fruit import Fruit, spawn_probabilities
-from map_loader import load_map, CELL_SIZE
-from profile_utils import load_profile, save_profile, unlock_next_level
+if TYPE_CHECKING:  # pragma: no cover - only needed for type hints
+    from simulation import Simulation
 
 # ---------------------------------------------------------------------------
 # Configuration values
 # ---------------------------------------------------------------------------
 WIDTH, HEIGHT = 800, 600
-START_LIVES = 1000
-MOVE_SPEED = 20
-DURATION_MS = 60 * 1000  # 1 minute
+
+# How often Tk calls us back to advance the simulation and redraw.  The
+# simulation itself always runs in fixed steps of ``simulation.TICK_MS``.
+FRAME_MS = 15
+# Hidden fruit drawings kept around for reuse, see ``fruit.FruitPool``
+FRUIT_POOL_SIZE = 256
 
 # Map file used for all levels for now
 MAP_FILES = {lvl: f"maps/example_map{lvl}.txt" for lvl in range(1, 21)}
 MUSIC_FILE = Path(__file__).with_name("resources").joinpath("Attis-BBC.wav")
+# The inputs of the most recent level are kept here for ``replay.py``
+RECORDING_FILE = "last_session.rec"
+# F3 toggles the frame timing overlay, F4 writes the timings to this file
+PERF_DUMP_FILE = "perf_dump.json"
+# The overlay text is refreshed every this many frames
+PERF_OVERLAY_FRAMES = 30
+# How often the menu checks whether the background imports are done
+WARM_UP_POLL_MS = 20
+
+# Imported in the background at startup, see ``warm_up_engine``
+ENGINE_MODULES = (
+    "simulation", "rendering", "level_pack", "replay", "player_controller",
+)
+
+
+def warm_up_engine(modules=ENGINE_MODULES) -> Dict[str, float]:
+    """Import ``modules`` and return how many seconds each import took.
+
+    Modules that cannot be imported are skipped; a broken gameplay module
+    will raise again when a level starts.
+    """
+    timings = {}
+    for name in modules:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        timings[name] = time.perf_counter() - started
+    return timings
 
 
 class SwordGameApp(tk.Tk):
     """Main application window.
 
-    ``SwordGameApp`` handles the game loop, user interaction and ties together
-    the helper modules.  For brevity only a subset of the original game's
-    behaviour is implemented here, but the structure mirrors that of a larger
-    Tkinter program.
+    ``SwordGameApp`` drives the game loop, handles user interaction and draws
+    the state of the running :class:`~simulation.Simulation`.  For brevity
+    only a subset of the original game's behaviour is implemented here, but
+    the structure mirrors that of a larger Tkinter program.
     """
 
     def __init__(self) -> None:
@@ -48,63 +97,90 @@ class SwordGameApp(tk.Tk):
         self.resizable(False, False)
 
         self.level: int | None = None
-        self.lives = START_LIVES
-        self.base_x = WIDTH // 2
-        self.base_y = HEIGHT - 20
+        self.sim: Simulation | None = None
+        self.running = False
 
-        self._music_playing = False
+        # The mixer starts and the music is read while the menu is shown
+        self.audio = AudioManager({DEFAULT_TRACK: MUSIC_FILE})
+        self.audio.start()
 
-        # Load player profile for level unlocking
+        # Load player profile for level unlocking; changes are written in
+        # the background so saving never holds up a frame
         self.profile = load_profile()
+        self.profile_writer = ProfileWriter()
 
         # Start screen with level selection ---------------------------------
         self.start_frame = tk.Frame(self)
         self.start_frame.pack()
         tk.Label(self.start_frame, text="Select Level").pack(pady=10)
-
-        level_buttons = tk.Frame(self.start_frame)
-        level_buttons.pack()
         self.level_buttons = []
-        for i in range(1, 21):
-            btn = tk.Button(level_buttons, text=str(i), width=3,
-                            command=lambda lvl=i: self.start_game(lvl))
-            btn.grid(row=(i - 1) // 10, column=(i - 1) % 10, padx=2, pady=2)
-            self.level_buttons.append(btn)
-
-        self.update_level_buttons()
+        # The buttons are added once the window is on screen
+        self.after_idle(self.build_level_buttons)
 
         # These attributes are created when a level starts
         _game_attrs = [
-            "game_frame", "canvas", "sword", "player",
-            "lives_label", "fruits", "sword_active",
+            "game_frame", "canvas", "renderer", "controller", "lives_label",
+            "timer_label", "profiler", "fruit_sprites",
         ]
         for name in _game_attrs:
             setattr(self, name, None)
 
+        # Import the gameplay modules while the menu is shown
+        self.engine_ready = threading.Event()
+        self.engine_timings: Dict[str, float] = {}
+        threading.Thread(target=self._warm_up, name="engine-warm-up",
+                         daemon=True).start()
+        self.after_idle(self.prepare_level_assets)
+
+    def _warm_up(self) -> None:
+        self.engine_timings = warm_up_engine()
+        self.engine_ready.set()
+
+    def prepare_level_assets(self) -> None:
+        """Create the frame profiler and fruit pictures while in the menu.
+
+        Waits for the background imports first so the menu never blocks on
+        them, then draws the pictures in one go.
+        """
+        if self.fruit_sprites is not None:
+            return
+        if not self.engine_ready.is_set():
+            self.after(WARM_UP_POLL_MS, self.prepare_level_assets)
+            return
+        from fruit import make_fruit_sprites
+        from perf import FrameProfiler
+
+        # Frame phase timings; switched on together with the overlay
+        self.profiler = FrameProfiler()
+        # One ready-made picture per fruit colour, drawn only once
+        self.fruit_sprites = make_fruit_sprites(self)
+
     def start_background_music(self) -> None:
-        """Play background music if available."""
-        try:
-            import pygame
-            if not pygame.mixer.get_init():
-                pygame.mixer.init()
-            pygame.mixer.music.load(str(MUSIC_FILE))
-            pygame.mixer.music.play(-1)
-            self._music_playing = True
-        except Exception:
-            self._music_playing = False
+        """Play background music if available, without waiting for it.
+
+        Levels without a track of their own use the default music.
+        """
+        self.audio.play(f"level{self.level}")
 
     def stop_background_music(self) -> None:
         """Stop playing background music."""
-        if getattr(self, "_music_playing", False):
-            try:
-                import pygame
-                pygame.mixer.music.stop()
-            except Exception:
-                pass
-            self._music_playing = False
+        self.audio.stop()
+
     # ------------------------------------------------------------------
     # Menu handling
     # ------------------------------------------------------------------
+    def build_level_buttons(self) -> None:
+        """Add one button per level to the start screen."""
+        level_buttons = tk.Frame(self.start_frame)
+        level_buttons.pack()
+        for i in range(1, 21):
+            btn = tk.Button(level_buttons, text=str(i), width=3,
+                            command=lambda lvl=i: self.start_game(lvl))
+            btn.grid(row=(i - 1) // 10, column=(i - 1) % 10, padx=2, pady=2)
+            self.level_buttons.append(btn)
+
+        self.update_level_buttons()
+
     def update_level_buttons(self) -> None:
         """Enable only the levels that have been unlocked."""
         highest = self.profile.get("highest_level", 1)
@@ -117,23 +193,35 @@ class SwordGameApp(tk.Tk):
     # ------------------------------------------------------------------
     def start_game(self, level: int) -> None:
         """Begin the selected level."""
+        # Only blocks if the level was picked before the warm-up thread
+        # finished importing the engine; afterwards the imports below are
+        # free and ``prepare_level_assets`` does not postpone itself.
+        self.engine_ready.wait()
+        from level_pack import load_level
+        from map_loader import draw_map
+        from player_controller import DIRECTIONS, PlayerController
+        from rendering import Renderer
+        from replay import InputRecorder
+        from simulation import (
+            INPUT_QUIT, PLAYER_RADIUS, START_LIVES, SWORD_WIDTH, Simulation,
+            World,
+        )
+
+        # Usually done already while the menu was shown
+        self.prepare_level_assets()
+
         self.level = level
         self.start_frame.pack_forget()
         self.running = True
         self.start_background_music()
 
-        # reset lives and player position
-        self.lives = START_LIVES
-        self.base_x = WIDTH // 2
-        self.base_y = HEIGHT - 20
-
         self.game_frame = tk.Frame(self)
         self.game_frame.pack()
 
         # top bar showing lives and remaining time
         info_frame = tk.Frame(self.game_frame)
         info_frame.pack(fill="x")
-        self.lives_label = tk.Label(info_frame, text=f"Lives: {self.lives}")
+        self.lives_label = tk.Label(info_frame, text=f"Lives: {START_LIVES}")
         self.lives_label.pack(side="left")
         self.timer_label = tk.Label(info_frame, text="Time: 01:00")
         self.timer_label.pack(side="right")
@@ -143,224 +231,177 @@ class SwordGameApp(tk.Tk):
         self.canvas.pack()
 
         # draw level obstacles from map file
-        start_pos, end_pos, self.walls = load_map(
-            self.canvas, MAP_FILES.get(level, f"maps/example_map{level}.txt")
-        )
-        self.end_pos = end_pos
-        if start_pos:
-            self.base_x, self.base_y = start_pos
-
-        # player represented as circle
-        self.player = self.canvas.create_oval(
-            self.base_x - 10, self.base_y - 10, self.base_x + 10, self.base_y + 10,
-            fill="blue",
-        )
-
-        # sword represented as line from base to mouse
-        self.sword = self.canvas.create_line(
-            self.base_x, self.base_y, self.base_x, self.base_y - 100, width=5,
-            fill="gray",
-        )
+        map_path = MAP_FILES.get(level, f"maps/example_map{level}.txt")
+        map_data = load_level(map_path)
+        draw_map(self.canvas, map_data)
+        seed = random.getrandbits(63)
+        self.recorder = InputRecorder(level, seed, WIDTH, HEIGHT, map_path)
+        # Input is gathered here and applied once per simulation tick
+        self.controller = PlayerController()
+        self.sim = Simulation(World.from_map(map_data, WIDTH, HEIGHT), level,
+                              seed=seed, recorder=self.recorder,
+                              profiler=self.profiler,
+                              controller=self.controller)
+        self.renderer = Renderer(self.canvas, self.sim, self.fruit_sprites,
+                                 PLAYER_RADIUS, SWORD_WIDTH,
+                                 pool_size=FRUIT_POOL_SIZE)
         # Bind input events
         self.bind("<Motion>", self.move_sword)
         self.bind("<Button-1>", self.swing_sword)
-        self.bind("<Left>", lambda e: self.move_player(-MOVE_SPEED, 0))
-        self.bind("<Right>", lambda e: self.move_player(MOVE_SPEED, 0))
-        self.bind("<Up>", lambda e: self.move_player(0, -MOVE_SPEED))
-        self.bind("<Down>", lambda e: self.move_player(0, MOVE_SPEED))
+        for key in DIRECTIONS:
+            self.bind(f"<KeyPress-{key}>", self.press_key)
+            self.bind(f"<KeyRelease-{key}>", self.release_key)
+        self.bind("<FocusOut>", lambda e: self.controller.release_all())
         self.bind("<space>", lambda e: self.lose_life())
-        self.bind("<Escape>", lambda e: self.end_game("quit"))
+        self.bind("<Escape>", lambda e: self.sim.apply_input(INPUT_QUIT))
+        self.bind("<F3>", lambda e: self.toggle_perf_overlay())
+        self.bind("<F4>", lambda e: self.profiler.dump(PERF_DUMP_FILE))
+
+        self._lives_text = self._timer_text = None
+        self.perf_overlay = self.canvas.create_text(
+            10, 10, anchor="nw", font=("Courier", 10), fill="black",
+            state="normal" if self.profiler.enabled else "hidden",
+        )
+        self._frame_count = 0
+        self.render()
 
-        self.fruits: list[Fruit] = []
-        self.sword_active = False
-        self.spawn_fruit()
-        self.remaining_ms = DURATION_MS
-        self.update_timer()
+        # Kick off the single game loop callback
+        self._last_frame_time = time.monotonic()
+        self.after(FRAME_MS, self.run_frame)
 
     # ------------------------------------------------------------------
-    # Timer and status updates
+    # Game loop
     # ------------------------------------------------------------------
-    def update_timer(self) -> None:
-        """Update the countdown timer displayed on screen."""
-        if not self.__dict__.get("running", True):
+    def run_frame(self) -> None:
+        """Advance the simulation and redraw the canvas.
+
+        This is the only recurring Tk callback while a level is running.  The
+        real time since the last frame is measured with a monotonic clock and
+        handed to :meth:`Simulation.advance`, which runs the fixed ticks.
+        """
+        if not self.running:
             return
-        if self.remaining_ms <= 0:
-            self.end_game()
+        started = self.profiler.start()
+        now = time.monotonic()
+        self.sim.advance((now - self._last_frame_time) * 1000)
+        self._last_frame_time = now
+        self.render()
+        self.profiler.stop("frame", started)
+        if self.check_outcome():
             return
-        total_seconds = self.remaining_ms // 1000
+        self._frame_count += 1
+        if (self.profiler.enabled and
+                self._frame_count % PERF_OVERLAY_FRAMES == 0):
+            self.canvas.itemconfig(
+                self.perf_overlay,
+                text="\n".join(self.profiler.report_lines()))
+        self.after(FRAME_MS, self.run_frame)
+
+    def toggle_perf_overlay(self) -> None:
+        """Show or hide the frame timings and switch timing on or off."""
+        profiler = self.profiler
+        profiler.enabled = not profiler.enabled
+        if profiler.enabled:
+            profiler.reset()
+        self.canvas.itemconfig(
+            self.perf_overlay,
+            state="normal" if profiler.enabled else "hidden",
+            text="\n".join(profiler.report_lines()),
+        )
+        self.canvas.tag_raise(self.perf_overlay)
+
+    def check_outcome(self) -> bool:
+        """React to the end of the level; return ``True`` if it ended."""
+        outcome = self.sim.outcome
+        if outcome is None:
+            return False
+        if outcome == "complete":
+            self.complete_level()
+        else:
+            self.end_game(outcome)
+        return True
+
+    # ------------------------------------------------------------------
+    # Drawing
+    # ------------------------------------------------------------------
+    def render(self) -> None:
+        """Bring the canvas and labels in line with the simulation."""
+        started = self.profiler.start()
+        self.renderer.sync(self.sim)
+        self.profiler.stop("render", started)
+
+        self.update_hud()
+
+    def update_hud(self) -> None:
+        """Refresh the lives and time labels if their text changed."""
+        started = self.profiler.start()
+        lives_text = f"Lives: {self.sim.lives}"
+        if lives_text != self._lives_text:
+            self.lives_label.config(text=lives_text)
+            self._lives_text = lives_text
+
+        # Round up so the display only reads 00:00 once time has run out
+        total_seconds = -(-self.sim.remaining_ms // 1000)
         mins, secs = divmod(total_seconds, 60)
-        self.timer_label.config(text=f"Time: {mins:02d}:{secs:02d}")
-        self.remaining_ms -= 1000
-        self.after(1000, self.update_timer)
+        timer_text = f"Time: {mins:02d}:{secs:02d}"
+        if timer_text != self._timer_text:
+            self.timer_label.config(text=timer_text)
+            self._timer_text = timer_text
+        self.profiler.stop("hud", started)
 
     # ------------------------------------------------------------------
-    # Player movement
+    # Player input
     # ------------------------------------------------------------------
-    def move_player(self, dx: int, dy: int) -> None:
-        """Move the player and keep the sword aligned."""
-        if not self.__dict__.get("running", True):
-            return
+    # The handlers only note the input in ``self.controller``; the
+    # simulation picks it up at the start of its next tick.
+    def press_key(self, event: tk.Event) -> None:
+        """Start moving the player in the direction of an arrow key."""
+        self.controller.key_down(event.keysym)
 
-        # Calculate new base position with margins so the whole player stays
-        margin = 10
-        old_x, old_y = self.base_x, self.base_y
-        new_x = max(margin, min(WIDTH - margin, self.base_x + dx))
-        new_y = max(margin, min(HEIGHT - margin, self.base_y + dy))
-
-        # Collision detection against walls
-        walls = self.__dict__.get("walls", [])
-        new_bbox = [new_x - 10, new_y - 10, new_x + 10, new_y + 10]
-        for x1, y1, x2, y2 in walls:
-            if not (new_bbox[2] <= x1 or new_bbox[0] >= x2 or
-                    new_bbox[3] <= y1 or new_bbox[1] >= y2):
-                return
-
-        self.base_x, self.base_y = new_x, new_y
-
-        # Determine the actual distance moved (may be less than dx/dy at edges)
-        actual_dx = self.base_x - old_x
-        actual_dy = self.base_y - old_y
-        self.canvas.move(self.player, actual_dx, actual_dy)
-
-        # Move sword tip by the same amount to keep orientation
-        x1, y1, x2, y2 = self.canvas.coords(self.sword)
-        self.canvas.coords(
-            self.sword,
-            self.base_x,
-            self.base_y,
-            x2 + actual_dx,
-            y2 + actual_dy,
-        )
+    def release_key(self, event: tk.Event) -> None:
+        self.controller.key_up(event.keysym)
 
-        self.check_level_complete()
+    def move_sword(self, event: tk.Event) -> None:
+        """Point the sword towards the mouse."""
+        self.controller.pointer(event.x, event.y)
 
-    def check_level_complete(self) -> None:
-        """Check whether the player reached the end of the level."""
-        end_pos = self.__dict__.get("end_pos")
-        if not end_pos:
-            return
-        ex, ey = end_pos
-        if (abs(self.base_x - ex) <= CELL_SIZE // 2 and
-                abs(self.base_y - ey) <= CELL_SIZE // 2):
-            self.complete_level()
+    def swing_sword(self, event: tk.Event) -> None:
+        """Activate the sword briefly when clicked."""
+        self.controller.click()
+
+    def lose_life(self) -> None:
+        from simulation import INPUT_LOSE_LIFE
+        self.sim.apply_input(INPUT_LOSE_LIFE)
+
+    # ------------------------------------------------------------------
+    # Level completion and game termination
+    # ------------------------------------------------------------------
+    def save_recording(self) -> None:
+        """Store the inputs of the level that just ended, if possible."""
+        try:
+            self.recorder.save(RECORDING_FILE)
+        except OSError:
+            pass
 
     def complete_level(self) -> None:
         """Handle level completion: unlock the next level and return to menu."""
         self.running = False
+        self.save_recording()
         self.stop_background_music()
         messagebox.showinfo("Level Complete", f"Level {self.level} complete!")
         unlock_next_level(self.profile, self.level)
-        save_profile(self.profile)
+        self.profile_writer.save(self.profile)
         if self.game_frame:
             self.game_frame.destroy()
         self.start_frame.pack()
         self.update_level_buttons()
 
-    # ------------------------------------------------------------------
-    # Sword interaction
-    # ------------------------------------------------------------------
-    def move_sword(self, event: tk.Event) -> None:
-        """Update sword line to point towards the mouse."""
-        self.canvas.coords(self.sword, self.base_x, self.base_y, event.x, event.y)
-
-    def swing_sword(self, event: tk.Event) -> None:
-        """Activate the sword briefly when clicked."""
-        self.sword_active = True
-        self.canvas.itemconfig(self.sword, fill="red")
-        self.after(100, self.deactivate_sword)
-
-    def deactivate_sword(self) -> None:
-        self.sword_active = False
-        self.canvas.itemconfig(self.sword, fill="gray")
-
-    # ------------------------------------------------------------------
-    # Player health
-    # ------------------------------------------------------------------
-    def lose_life(self) -> None:
-        if self.lives <= 0:
-            return
-        self.lives -= 1
-        self.lives_label.config(text=f"Lives: {self.lives}")
-        if self.lives <= 0:
-            self.end_game(reason="out of lives")
-
-    # ------------------------------------------------------------------
-    # Fruit mechanics
-    # ------------------------------------------------------------------
-    def spawn_fruit(self) -> None:
-        """Create a new fruit at the finish point and schedule the next spawn."""
-        if not self.__dict__.get("running", True):
-            return
-        remaining = self.__dict__.get("remaining_ms", DURATION_MS)
-        if remaining < 10_000:
-            return
-        if self.end_pos:
-            x, y = self.end_pos
-        else:
-            x, y = WIDTH // 2, 0
-        color, hits = self.choose_fruit_type()
-        fruit = Fruit(self.canvas, self.level, x, y, color=color, hits=hits)
-        self.fruits.append(fruit)
-        self.move_fruit(fruit)
-        # spawn frequency increases with level but never faster than every 200ms
-        interval = max(1000 - self.level * 50, 200)
-        self.after(interval, self.spawn_fruit)
-
-    def move_fruit(self, fruit: Fruit) -> None:
-        """Move fruit toward the player and handle collisions."""
-        if not self.__dict__.get("running", True):
-            return
-        fruit.move(self.base_x, self.base_y)
-        if self.check_sword_hit(fruit):
-            fruit.delete()
-            if fruit in self.fruits:
-                self.fruits.remove(fruit)
-            return
-        x1, y1, x2, y2 = self.canvas.coords(fruit.id)
-        overlapping = self.canvas.find_overlapping(x1, y1, x2, y2)
-        if self.player in overlapping:
-            fruit.delete()
-            if fruit in self.fruits:
-                self.fruits.remove(fruit)
-            self.lose_life()
-            return
-        if (x2 < 0 or x1 > WIDTH or y2 < 0 or y1 > HEIGHT):
-            fruit.delete()
-            if fruit in self.fruits:
-                self.fruits.remove(fruit)
-            return
-        self.after(50, lambda: self.move_fruit(fruit))
-
-    def check_sword_hit(self, fruit: Fruit) -> bool:
-        """Return ``True`` if the sword hits the fruit and it is destroyed."""
-        if not self.sword_active:
-            return False
-        x1, y1, x2, y2 = self.canvas.coords(fruit.id)
-        overlapping = self.canvas.find_overlapping(x1, y1, x2, y2)
-        if self.sword in overlapping:
-            fruit.hp -= 1
-            if fruit.hp <= 0:
-                return True
-        return False
-
-    def choose_fruit_type(self) -> tuple[str, int]:
-        probs = spawn_probabilities(self.level)
-        roll = random.uniform(0, 100)
-        cumulative = 0
-        for color in ("black", "red", "purple", "orange"):
-            cumulative += probs.get(color, 0)
-            if roll < cumulative:
-                hits = {"black": 5, "red": 3, "purple": 2, "orange": 2}[color]
-                return color, hits
-        return "green", 1
-
-    # ------------------------------------------------------------------
-    # Game termination
-    # ------------------------------------------------------------------
     def end_game(self, reason: str = "time") -> None:
-        if not self.__dict__.get("running", True):
+        if not self.running:
             return
         self.running = False
+        self.sim.finish(reason)
+        self.save_recording()
         self.stop_background_music()
         if reason == "out of lives":
             msg = f"Out of lives! Level {self.level} over."
@@ -368,3 +409,13 @@ class SwordGameApp(tk.Tk):
             msg = f"Time's up! Level {self.level} over."
         messagebox.showinfo("Game Over", msg)
         self.destroy()
+
+    def destroy(self) -> None:
+        """Close the window after the profile has reached the disk."""
+        writer = getattr(self, "profile_writer", None)
+        if writer is not None:
+            writer.close()
+        audio = getattr(self, "audio", None)
+        if audio is not None:
+            audio.close()
+        super().destroy()
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+"""Compiled, memory-mapped level pack.
+
+Parsing a text map character by character every time a level starts is
+wasteful, so this module compiles a whole directory of maps into one binary
+file (``levels.pack`` next to the maps).  The pack stores for every map its
+occupancy grid, start/exit cells and the merged wall rectangles.  At run time
+the pack is opened with :mod:`mmap` and the grid bytes are handed out as
+``memoryview`` slices, so loading a level copies almost nothing.
+
+Every entry remembers the modification time, size and SHA-1 hash of its text
+file.  :func:`open_pack` notices edited, added or removed maps and rebuilds
+the pack automatically; a changed modification time alone only triggers a
+hash comparison, after which the new time is written into the pack so the
+file is not hashed again.
+
+Run ``python level_pack.py [maps_dir]`` to build the pack by hand.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from map_loader import CELL_SIZE, MapData, OccupancyGrid, parse_map
+
+PACK_NAME = "levels.pack"
+MAGIC = b"SWPK"
+VERSION = 1
+
+# magic, version, cell size, number of levels
+_HEADER = struct.Struct("<4sHHI")
+# name length, mtime in ns, file size, sha1, data offset, data length
+_ENTRY = struct.Struct("<HqQ20sQQ")
+# cols, rows, start col/row, end col/row, number of wall rectangles
+_LEVEL = struct.Struct("<IIiiiiI")
+_RECT = struct.Struct("<iiii")
+
+
+@dataclass
+class PackEntry:
+    """Index entry describing one compiled map inside a pack."""
+
+    name: str
+    mtime_ns: int
+    size: int
+    sha1: bytes
+    offset: int
+    length: int
+    # position of the entry in the pack's index
+    index_pos: int = 0
+
+
+def _file_sha1(path: str) -> bytes:
+    with open(path, "rb") as fh:
+        return hashlib.sha1(fh.read()).digest()
+
+
+def _map_files(maps_dir: str) -> List[str]:
+    return sorted(name for name in os.listdir(maps_dir)
+                  if name.endswith(".txt"))
+
+
+def _cell_of(pos: Tuple[int, int] | None) -> Tuple[int, int]:
+    if pos is None:
+        return -1, -1
+    return pos[0] // CELL_SIZE, pos[1] // CELL_SIZE
+
+
+def _encode_level(data: MapData) -> bytes:
+    grid = data.grid
+    parts = [_LEVEL.pack(grid.cols, grid.rows, *_cell_of(data.start),
+                         *_cell_of(data.end), len(data.walls))]
+    parts.extend(_RECT.pack(*rect) for rect in data.walls)
+    parts.append(bytes(grid.cells))
+    return b"".join(parts)
+
+
+def compile_pack(maps_dir: str, pack_path: str | None = None) -> str:
+    """Compile every ``*.txt`` map in ``maps_dir`` into a level pack.
+
+    The pack is written to a temporary file of its own first and then
+    renamed into place, so readers never see a half written pack and several
+    processes may compile the same pack at once.  Returns the path of the
+    pack.
+    """
+
+    pack_path = pack_path or os.path.join(maps_dir, PACK_NAME)
+    names = _map_files(maps_dir)
+    blobs = []
+    entries = []
+    index_size = _HEADER.size + sum(
+        _ENTRY.size + len(name.encode("utf-8")) for name in names)
+    offset = index_size
+    for name in names:
+        path = os.path.join(maps_dir, name)
+        stat = os.stat(path)
+        blob = _encode_level(parse_map(path, merge=True))
+        entries.append((name.encode("utf-8"), _ENTRY.pack(
+            len(name.encode("utf-8")), stat.st_mtime_ns, stat.st_size,
+            _file_sha1(path), offset, len(blob))))
+        blobs.append(blob)
+        offset += len(blob)
+
+    handle, tmp_path = tempfile.mkstemp(
+        prefix=PACK_NAME, suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(pack_path)))
+    try:
+        with os.fdopen(handle, "wb") as fh:
+            fh.write(_HEADER.pack(MAGIC, VERSION, CELL_SIZE, len(names)))
+            for encoded_name, entry in entries:
+                fh.write(entry)
+                fh.write(encoded_name)
+            for blob in blobs:
+                fh.write(blob)
+        # mkstemp only lets the owner read the file
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, pack_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return pack_path
+
+
+class LevelPack:
+    """Read-only view of a compiled level pack.
+
+    ``ValueError`` is raised when the file is not a pack of the current
+    format, for example after the format version changed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, version, cell_size, count = _HEADER.unpack_from(self._view)
+        if (magic, version, cell_size) != (MAGIC, VERSION, CELL_SIZE):
+            raise ValueError(f"{path} is not a level pack of this version")
+        self.entries: Dict[str, PackEntry] = {}
+        pos = _HEADER.size
+        for _ in range(count):
+            index_pos = pos
+            name_len, mtime_ns, size, sha1, offset, length = \
+                _ENTRY.unpack_from(self._view, pos)
+            pos += _ENTRY.size
+            name = bytes(self._view[pos:pos + name_len]).decode("utf-8")
+            pos += name_len
+            self.entries[name] = PackEntry(name, mtime_ns, size, sha1,
+                                           offset, length, index_pos)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def get(self, name: str) -> MapData:
+        """Return the map compiled from the file called ``name``.
+
+        The grid cells are a zero-copy slice of the memory-mapped pack.
+        """
+        entry = self.entries[name]
+        view = self._view
+        cols, rows, sc, sr, ec, er, n_rects = _LEVEL.unpack_from(
+            view, entry.offset)
+        pos = entry.offset + _LEVEL.size
+        walls = [rect for rect in _RECT.iter_unpack(
+            view[pos:pos + n_rects * _RECT.size])]
+        pos += n_rects * _RECT.size
+        data = MapData(walls=walls,
+                       grid=OccupancyGrid(cols, rows,
+                                          view[pos:pos + cols * rows]))
+        half = CELL_SIZE // 2
+        if sc >= 0:
+            data.start_cell = (sc * CELL_SIZE, sr * CELL_SIZE,
+                               (sc + 1) * CELL_SIZE, (sr + 1) * CELL_SIZE)
+            data.start = (sc * CELL_SIZE + half, sr * CELL_SIZE + half)
+        if ec >= 0:
+            data.end_cell = (ec * CELL_SIZE, er * CELL_SIZE,
+                             (ec + 1) * CELL_SIZE, (er + 1) * CELL_SIZE)
+            data.end = (ec * CELL_SIZE + half, er * CELL_SIZE + half)
+        return data
+
+    def is_stale(self, maps_dir: str) -> bool:
+        """Return ``True`` if the maps in ``maps_dir`` differ from the pack.
+
+        A map whose modification time changed but whose content did not gets
+        its new time recorded, so it is only hashed once.
+        """
+        names = _map_files(maps_dir)
+        if set(names) != set(self.entries):
+            return True
+        for name in names:
+            entry = self.entries[name]
+            stat = os.stat(os.path.join(maps_dir, name))
+            if stat.st_size != entry.size:
+                return True
+            if stat.st_mtime_ns != entry.mtime_ns:
+                if _file_sha1(os.path.join(maps_dir, name)) != entry.sha1:
+                    return True
+                self._record_mtime(entry, stat.st_mtime_ns)
+        return False
+
+    def _record_mtime(self, entry: PackEntry, mtime_ns: int) -> None:
+        """Remember a new modification time for ``entry``, also on disk."""
+        entry.mtime_ns = mtime_ns
+        try:
+            with open(self.path, "r+b") as fh:
+                # the time follows the name length at the start of the entry
+                fh.seek(entry.index_pos + struct.calcsize("<H"))
+                fh.write(struct.pack("<q", mtime_ns))
+        except OSError:  # read only; other processes will hash it again
+            pass
+
+
+# Packs opened so far, by maps directory
+_open_packs: Dict[str, LevelPack] = {}
+
+
+def open_pack(maps_dir: str) -> LevelPack:
+    """Return the level pack for ``maps_dir``, (re)building it if needed."""
+
+    maps_dir = os.path.abspath(maps_dir)
+    pack = _open_packs.get(maps_dir)
+    if pack is None:
+        pack_path = os.path.join(maps_dir, PACK_NAME)
+        try:
+            pack = LevelPack(pack_path)
+        except (OSError, ValueError, struct.error):
+            pack = None
+    if pack is None or pack.is_stale(maps_dir):
+        # Old views stay valid; the previous mapping is freed once unused.
+        pack = LevelPack(compile_pack(maps_dir))
+    _open_packs[maps_dir] = pack
+    return pack
+
+
+def load_level(path: str) -> MapData:
+    """Return the map at ``path``, served from its directory's level pack.
+
+    If the pack cannot be built (for example because the directory is read
+    only) the text file is simply parsed instead.
+    """
+
+    maps_dir, name = os.path.split(path)
+    try:
+        pack = open_pack(maps_dir or ".")
+    except OSError:
+        return parse_map(path, merge=True)
+    if name not in pack:
+        return parse_map(path, merge=True)
+    return pack.get(name)
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "maps"
+    print("Wrote", compile_pack(target))
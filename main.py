@@ -3,16 +3,56 @@
 The bulk of the implementation now lives in dedicated modules such as
 :mod:`game`, :mod:`fruit` and :mod:`profile`.  Keeping this file tiny makes it
 clear where new programmers should look for the actual logic.
+
+Run ``python main.py --startup-profile`` to print how long the imports, the
+window and the first drawn frame took, and how long the background warm-up
+of the gameplay modules needed.  The program quits once everything is
+reported, so the numbers can be compared between versions.
 """
 
-import tkinter as tk
+import time
 
-from game import SwordGameApp
+STARTED = time.perf_counter()
 
+import sys  # noqa: E402
+import tkinter as tk  # noqa: E402
 
-if __name__ == "__main__":
+
+def report_startup(app, imported: float, created: float) -> None:
+    """Print the startup timings once the first frame has been drawn."""
+    app.update_idletasks()
+    drawn = time.perf_counter()
+    print(f"import game      {(imported - STARTED) * 1000:8.1f} ms")
+    print(f"window created   {(created - STARTED) * 1000:8.1f} ms")
+    print(f"first frame      {(drawn - STARTED) * 1000:8.1f} ms")
+
+    def wait_for_engine() -> None:
+        if not app.engine_ready.is_set():
+            app.after(10, wait_for_engine)
+            return
+        print(f"engine warm-up   {(time.perf_counter() - STARTED) * 1000:8.1f}"
+              " ms")
+        for name, seconds in app.engine_timings.items():
+            print(f"  {name:16s}{seconds * 1000:8.1f} ms")
+        app.destroy()
+
+    wait_for_engine()
+
+
+def main(argv) -> None:
     try:
+        from game import SwordGameApp
+        imported = time.perf_counter()
         app = SwordGameApp()
+        if "--startup-profile" in argv:
+            created = time.perf_counter()
+            # after_idle callbacks run in order, so the level buttons exist
+            # by the time this one runs
+            app.after_idle(report_startup, app, imported, created)
         app.mainloop()
     except tk.TclError as exc:
         print("Unable to start the graphical interface:", exc)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
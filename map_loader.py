@@ -3,22 +3,175 @@ from __future__ import annotations
 """Utility helpers for loading ASCII maps.
 
 Each map is a simple text file where ``#`` denotes a wall, ``S`` the player
-start position and ``E`` the exit.  The function returns both coordinates and a
-list of rectangles representing the walls so that the game can perform
-collision checks.
+start position and ``E`` the exit.  :func:`parse_map` turns such a file into a
+:class:`MapData` object holding both coordinates and a list of rectangles
+representing the walls.  It also contains an :class:`OccupancyGrid` with one
+entry per map cell so that collision checks only need to look at the cells
+near the player instead of at every wall.  Parsing does not need a display;
+:func:`draw_map` and :func:`load_map` take care of putting the map on a
+Tkinter canvas.
 """
 
-from typing import List, Tuple
-import tkinter as tk
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover - only needed for type hints
+    import tkinter as tk
 
 # Size of a single map cell in pixels.  Using a constant makes it easy to
 # tweak the map scale later and keeps this module self contained.
 CELL_SIZE = 40
 
+Rect = Tuple[int, int, int, int]
+
+
+class OccupancyGrid:
+    """Which map cells are walls, stored as one byte per cell.
+
+    ``cells`` holds ``rows * cols`` bytes in row order; a non-zero byte marks
+    a wall.  Everything outside the grid counts as free space, just like the
+    area beyond the end of a map line.
+    """
+
+    def __init__(self, cols: int, rows: int, cells: bytes | None = None,
+                 cell_size: int = CELL_SIZE) -> None:
+        self.cols = cols
+        self.rows = rows
+        self.cell_size = cell_size
+        self.cells = cells if cells is not None else bytearray(cols * rows)
+
+    def is_wall(self, col: int, row: int) -> bool:
+        """Return ``True`` if the cell at ``(col, row)`` is a wall."""
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return bool(self.cells[row * self.cols + col])
+        return False
+
+    def overlaps(self, x1: float, y1: float, x2: float, y2: float) -> bool:
+        """Return ``True`` if the box ``(x1, y1, x2, y2)`` touches a wall.
+
+        The result is the same as testing the box against every wall
+        rectangle with the usual "edges may touch" overlap rule, but only the
+        few cells covered by the box are looked at.
+        """
+        size = self.cell_size
+        # A cell overlaps when x1 < right edge and x2 > left edge
+        col1 = max(int(x1 // size), 0)
+        col2 = min(-int(-x2 // size) - 1, self.cols - 1)
+        row1 = max(int(y1 // size), 0)
+        row2 = min(-int(-y2 // size) - 1, self.rows - 1)
+        cells, cols = self.cells, self.cols
+        for row in range(row1, row2 + 1):
+            start = row * cols
+            if any(cells[start + col1:start + col2 + 1]):
+                return True
+        return False
+
+
+@dataclass
+class MapData:
+    """Everything :func:`parse_map` found in a map file.
+
+    ``start`` and ``end`` are the player start and exit positions in canvas
+    coordinates (or ``None`` if the map does not define them).  ``walls`` is a
+    list of rectangles (``x1, y1, x2, y2``) representing impassable areas and
+    ``grid`` marks the same walls cell by cell.
+    """
+
+    start: Tuple[int, int] | None = None
+    end: Tuple[int, int] | None = None
+    walls: List[Rect] = field(default_factory=list)
+    start_cell: Rect | None = None
+    end_cell: Rect | None = None
+    grid: OccupancyGrid = field(default_factory=lambda: OccupancyGrid(0, 0))
+
 
-def load_map(canvas: tk.Canvas, path: str) -> Tuple[Tuple[int, int] | None,
-                                                    Tuple[int, int] | None,
-                                                    List[Tuple[int, int, int, int]]]:
+def merge_wall_cells(grid: OccupancyGrid) -> List[Rect]:
+    """Cover the wall cells of ``grid`` with as few rectangles as possible.
+
+    This is a greedy pass: every still uncovered wall cell starts a rectangle
+    which first grows to the right along its row and then grows downwards as
+    long as the whole span of the next row is made of uncovered walls.  The
+    rectangles never overlap and together cover exactly the wall cells.
+    """
+
+    cols, rows, size = grid.cols, grid.rows, grid.cell_size
+    cells = grid.cells
+    used = bytearray(cols * rows)
+    rects: List[Rect] = []
+    for row in range(rows):
+        col = 0
+        while col < cols:
+            index = row * cols + col
+            if not cells[index] or used[index]:
+                col += 1
+                continue
+            end = col + 1
+            while end < cols and cells[row * cols + end] \
+                    and not used[row * cols + end]:
+                end += 1
+            bottom = row + 1
+            while bottom < rows:
+                start = bottom * cols
+                span = range(start + col, start + end)
+                if not all(cells[i] and not used[i] for i in span):
+                    break
+                bottom += 1
+            for r in range(row, bottom):
+                used[r * cols + col:r * cols + end] = b"\x01" * (end - col)
+            rects.append((col * size, row * size, end * size, bottom * size))
+            col = end
+    return rects
+
+
+def parse_map(path: str, merge: bool = False) -> MapData:
+    """Read the map stored at ``path`` without drawing anything.
+
+    With ``merge=True`` neighbouring wall cells are combined by
+    :func:`merge_wall_cells` so ``walls`` holds far fewer rectangles covering
+    the same area.
+    """
+
+    data = MapData()
+    with open(path) as f:
+        lines = [line.rstrip("\n") for line in f]
+    cols = max((len(line) for line in lines), default=0)
+    cells = bytearray(cols * len(lines))
+    for row, line in enumerate(lines):
+        for col, char in enumerate(line):
+            x1 = col * CELL_SIZE
+            y1 = row * CELL_SIZE
+            x2 = x1 + CELL_SIZE
+            y2 = y1 + CELL_SIZE
+            if char == "#":
+                data.walls.append((x1, y1, x2, y2))
+                cells[row * cols + col] = 1
+            elif char == "S":
+                data.start_cell = (x1, y1, x2, y2)
+                data.start = (x1 + CELL_SIZE // 2, y1 + CELL_SIZE // 2)
+            elif char == "E":
+                data.end_cell = (x1, y1, x2, y2)
+                data.end = (x1 + CELL_SIZE // 2, y1 + CELL_SIZE // 2)
+    data.grid = OccupancyGrid(cols, len(lines), cells)
+    if merge:
+        data.walls = merge_wall_cells(data.grid)
+    return data
+
+
+def draw_map(canvas: tk.Canvas, data: MapData) -> None:
+    """Draw walls, start and exit cells of ``data`` onto ``canvas``."""
+
+    for x1, y1, x2, y2 in data.walls:
+        canvas.create_rectangle(x1, y1, x2, y2, fill="lightgray")
+    if data.start_cell:
+        canvas.create_rectangle(*data.start_cell, fill="lightgreen")
+    if data.end_cell:
+        canvas.create_rectangle(*data.end_cell, fill="pink")
+
+
+def load_map(canvas: tk.Canvas, path: str,
+             merge: bool = False) -> Tuple[Tuple[int, int] | None,
+                                           Tuple[int, int] | None,
+                                           List[Rect]]:
     """Draw the map from ``path`` onto ``canvas``.
 
     Returns a tuple ``(start, end, walls)`` where ``start`` and ``end`` are the
@@ -26,22 +179,6 @@ def load_map(canvas: tk.Canvas, path: str) -> Tuple[Tuple[int, int] | None,
     of rectangles (``x1, y1, x2, y2``) representing impassable areas.
     """
 
-    start = end = None
-    walls: List[Tuple[int, int, int, int]] = []
-    with open(path) as f:
-        for row, line in enumerate(f):
-            for col, char in enumerate(line.rstrip("\n")):
-                x1 = col * CELL_SIZE
-                y1 = row * CELL_SIZE
-                x2 = x1 + CELL_SIZE
-                y2 = y1 + CELL_SIZE
-                if char == "#":
-                    canvas.create_rectangle(x1, y1, x2, y2, fill="lightgray")
-                    walls.append((x1, y1, x2, y2))
-                elif char == "S":
-                    canvas.create_rectangle(x1, y1, x2, y2, fill="lightgreen")
-                    start = (x1 + CELL_SIZE // 2, y1 + CELL_SIZE // 2)
-                elif char == "E":
-                    canvas.create_rectangle(x1, y1, x2, y2, fill="pink")
-                    end = (x1 + CELL_SIZE // 2, y1 + CELL_SIZE // 2)
-    return start, end, walls
+    data = parse_map(path, merge=merge)
+    draw_map(canvas, data)
+    return data.start, data.end, data.walls
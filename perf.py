@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+"""Lightweight timing of the phases of a frame.
+
+:class:`FrameProfiler` keeps the most recent durations of every phase (input,
+spawning, movement, collision, rendering, HUD and the whole frame) in a ring
+buffer and reports rolling p50/p95/p99 values.  Timing is off by default and
+then costs one attribute check per measured phase, so the hooks can stay in
+the code permanently::
+
+    started = profiler.start()
+    do_movement()
+    profiler.stop("movement", started)
+"""
+
+import json
+import time
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+PHASES = ("input", "spawn", "movement", "collision", "render", "hud", "frame")
+
+
+class FrameProfiler:
+    """Rolling per-phase timings stored in fixed size ring buffers."""
+
+    def __init__(self, phases: Iterable[str] = PHASES, capacity: int = 600,
+                 enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.capacity = capacity
+        self._samples: Dict[str, np.ndarray] = {
+            phase: np.zeros(capacity) for phase in phases}
+        self._counts: Dict[str, int] = dict.fromkeys(self._samples, 0)
+
+    def start(self) -> int:
+        """Return a start timestamp, or ``0`` while disabled."""
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def stop(self, phase: str, started: int) -> None:
+        """Record the time since ``started`` for ``phase``."""
+        if not started:
+            return
+        count = self._counts[phase]
+        self._samples[phase][count % self.capacity] = \
+            (time.perf_counter_ns() - started) / 1e6
+        self._counts[phase] = count + 1
+
+    def reset(self) -> None:
+        """Forget all samples."""
+        for phase in self._counts:
+            self._counts[phase] = 0
+
+    def percentiles(self, phase: str) -> Dict[str, float]:
+        """Return count, p50, p95, p99 and max of ``phase`` in milliseconds."""
+        count = self._counts[phase]
+        samples = self._samples[phase][:min(count, self.capacity)]
+        if not len(samples):
+            return {"count": count, "p50": 0.0, "p95": 0.0, "p99": 0.0,
+                    "max": 0.0}
+        p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+        return {"count": count, "p50": float(p50), "p95": float(p95),
+                "p99": float(p99), "max": float(samples.max())}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return :meth:`percentiles` for every phase."""
+        return {phase: self.percentiles(phase) for phase in self._samples}
+
+    def report_lines(self) -> List[str]:
+        """Return one human readable line per phase for an overlay."""
+        lines = ["phase        p50    p95    p99 (ms)"]
+        for phase, stats in self.summary().items():
+            lines.append(f"{phase:10s} {stats['p50']:6.2f} {stats['p95']:6.2f} "
+                         f"{stats['p99']:6.2f}")
+        return lines
+
+    def dump(self, path: str) -> None:
+        """Write the summary and the raw recent samples as JSON."""
+        raw = {}
+        for phase, samples in self._samples.items():
+            count = self._counts[phase]
+            if count <= self.capacity:
+                recent = samples[:count]
+            else:
+                # oldest first
+                split = count % self.capacity
+                recent = np.concatenate((samples[split:], samples[:split]))
+            raw[phase] = recent.tolist()
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"summary": self.summary(), "samples_ms": raw}, fh,
+                      indent=2)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+"""Collect keyboard and mouse input and hand it to the simulation per tick.
+
+Tk reports every mouse movement and every key repeat as a separate event,
+often many of them between two simulation ticks.  Handling each of them
+right away would move the player once per key repeat (so the speed depended
+on the operating system's repeat rate) and aim the sword for every mouse
+event.  :class:`PlayerController` only *remembers* the input: which
+direction keys are held, where the pointer is and whether the mouse was
+clicked.  :meth:`PlayerController.poll` is called by
+:meth:`simulation.Simulation.advance` at the start of every tick and turns
+that state into at most one move, one aim and one swing.
+"""
+
+import math
+from typing import Dict, Set, Tuple
+
+from simulation import INPUT_AIM, INPUT_MOVE, INPUT_SWING, MOVE_SPEED
+
+# Direction of every movement key as (x, y)
+DIRECTIONS: Dict[str, Tuple[int, int]] = {
+    "Left": (-1, 0),
+    "Right": (1, 0),
+    "Up": (0, -1),
+    "Down": (0, 1),
+}
+
+
+class PlayerController:
+    """Latest input state, applied to a simulation once per tick.
+
+    The player moves ``speed`` pixels per tick while a direction key is held,
+    diagonally as fast as straight.  A key that was pressed and released
+    between two ticks still moves the player for one tick, so short taps are
+    never lost.
+    """
+
+    def __init__(self, speed: int = MOVE_SPEED) -> None:
+        self.speed = speed
+        # keys held down right now and keys pressed since the last tick
+        self._held: Set[str] = set()
+        self._pressed: Set[str] = set()
+        self._pointer: Tuple[int, int] | None = None
+        self._clicked = False
+
+    # ------------------------------------------------------------------
+    # Event handlers
+    # ------------------------------------------------------------------
+    def key_down(self, key: str) -> None:
+        if key in DIRECTIONS:
+            self._held.add(key)
+            self._pressed.add(key)
+
+    def key_up(self, key: str) -> None:
+        self._held.discard(key)
+
+    def release_all(self) -> None:
+        """Forget held keys, e.g. when the window loses the focus."""
+        self._held.clear()
+
+    def pointer(self, x: int, y: int) -> None:
+        self._pointer = (x, y)
+
+    def click(self) -> None:
+        self._clicked = True
+
+    # ------------------------------------------------------------------
+    # Once per tick
+    # ------------------------------------------------------------------
+    def velocity(self) -> Tuple[int, int]:
+        """Return the movement of one tick for the keys currently down."""
+        dx = dy = 0
+        for key in self._held | self._pressed:
+            kx, ky = DIRECTIONS[key]
+            dx += kx
+            dy += ky
+        if not (dx or dy):
+            return 0, 0
+        scale = self.speed / math.hypot(dx, dy)
+        return round(dx * scale), round(dy * scale)
+
+    def poll(self, sim) -> None:
+        """Apply the input gathered since the last tick to ``sim``."""
+        if self._pointer is not None:
+            sim.apply_input(INPUT_AIM, *self._pointer)
+            self._pointer = None
+        if self._clicked:
+            sim.apply_input(INPUT_SWING)
+            self._clicked = False
+        dx, dy = self.velocity()
+        self._pressed.clear()
+        if dx or dy:
+            sim.apply_input(INPUT_MOVE, dx, dy)
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+"""Many player profiles in one SQLite database.
+
+:mod:`profile_utils` keeps exactly one profile in a JSON file, which is fine
+at home but not on a cabinet that many people play on.  :class:`ProfileStore`
+keeps one row per player in a database file instead.  Its
+:meth:`~ProfileStore.load_profile`, :meth:`~ProfileStore.save_profile` and
+:meth:`~ProfileStore.unlock_next_level` behave like the functions of the
+same name in :mod:`profile_utils`, only with a player name added.  On top of
+that the store remembers every player's best time and score per level.
+
+Only the standard library is used.  The database runs in WAL mode, so a
+reader never waits for a writer, and every lookup goes through an index, so
+it stays fast with hundreds of thousands of players.
+
+``python profile_store.py DATABASE user_profile.json ...`` imports existing
+JSON profiles, using each file name (without ``.json``) as the player name.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+STORE_FILE = "profiles.sqlite3"
+# Same limit as ``profile_utils.unlock_next_level``
+LAST_LEVEL = 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    highest_level INTEGER NOT NULL DEFAULT 1,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS level_results (
+    player_id INTEGER NOT NULL REFERENCES players(id) ON DELETE CASCADE,
+    level INTEGER NOT NULL,
+    best_time_ms INTEGER NOT NULL,
+    best_score INTEGER NOT NULL,
+    plays INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (player_id, level)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS level_results_by_score
+    ON level_results (level, best_score DESC);
+CREATE INDEX IF NOT EXISTS level_results_by_time
+    ON level_results (level, best_time_ms);
+"""
+
+
+class ProfileStore:
+    """Player profiles and per-level records stored with :mod:`sqlite3`.
+
+    A profile is the same dictionary :func:`profile_utils.load_profile`
+    returns: it always has ``"highest_level"``, any other keys are kept as
+    they are.  Use the store as a context manager or call :meth:`close` when
+    done.
+    """
+
+    def __init__(self, path: str = STORE_FILE) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL a commit is still atomic with NORMAL; only the very last
+        # transactions may be lost on a power cut.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ProfileStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Profiles
+    # ------------------------------------------------------------------
+    def load_profile(self, name: str) -> dict:
+        """Return the profile of ``name``.
+
+        Unknown players get a fresh profile with only the first level
+        unlocked, just like a missing JSON file.
+        """
+        row = self._conn.execute(
+            "SELECT highest_level, extra FROM players WHERE name = ?",
+            (name,)).fetchone()
+        if row is None:
+            return {"highest_level": 1}
+        data = json.loads(row[1])
+        data["highest_level"] = row[0]
+        return data
+
+    def save_profile(self, data: dict, name: str) -> None:
+        """Store ``data`` as the profile of ``name``, replacing the old one."""
+        with self._conn:
+            self._save(data, name)
+
+    def _save(self, data: dict, name: str) -> None:
+        extra = {k: v for k, v in data.items() if k != "highest_level"}
+        self._conn.execute(
+            "INSERT INTO players (name, highest_level, extra) VALUES (?, ?, ?)"
+            " ON CONFLICT (name) DO UPDATE SET"
+            " highest_level = excluded.highest_level, extra = excluded.extra",
+            (name, data.get("highest_level", 1), json.dumps(extra)))
+
+    def unlock_next_level(self, name: str, current_level: int) -> int:
+        """Unlock the level after ``current_level`` for ``name``.
+
+        Follows the rules of :func:`profile_utils.unlock_next_level` and
+        returns the new highest unlocked level.  The comparison is done by
+        the database inside one transaction, so two cabinets finishing levels
+        at the same time cannot undo each other's progress.
+        """
+        unlocked = current_level + 1 if current_level < LAST_LEVEL else 1
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO players (name, highest_level) VALUES (?, ?)"
+                " ON CONFLICT (name) DO UPDATE SET"
+                " highest_level = MAX(highest_level, excluded.highest_level)",
+                (name, unlocked))
+            return self._conn.execute(
+                "SELECT highest_level FROM players WHERE name = ?",
+                (name,)).fetchone()[0]
+
+    def delete_profile(self, name: str) -> None:
+        """Forget ``name`` together with all their level records."""
+        with self._conn:
+            self._conn.execute("DELETE FROM players WHERE name = ?", (name,))
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Level records
+    # ------------------------------------------------------------------
+    def record_result(self, name: str, level: int, time_ms: int,
+                      score: int) -> None:
+        """Remember one finished ``level``, keeping the best time and score.
+
+        The player is created if they do not exist yet.
+        """
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO players (name) VALUES (?)"
+                " ON CONFLICT (name) DO NOTHING", (name,))
+            self._conn.execute(
+                "INSERT INTO level_results"
+                " (player_id, level, best_time_ms, best_score)"
+                " SELECT id, ?, ?, ? FROM players WHERE name = ?"
+                " ON CONFLICT (player_id, level) DO UPDATE SET"
+                " best_time_ms = MIN(best_time_ms, excluded.best_time_ms),"
+                " best_score = MAX(best_score, excluded.best_score),"
+                " plays = plays + 1",
+                (level, time_ms, score, name))
+
+    def best_results(self, name: str) -> Dict[int, Tuple[int, int]]:
+        """Return ``{level: (best time in ms, best score)}`` for ``name``."""
+        rows = self._conn.execute(
+            "SELECT r.level, r.best_time_ms, r.best_score"
+            " FROM level_results r JOIN players p ON p.id = r.player_id"
+            " WHERE p.name = ? ORDER BY r.level", (name,))
+        return {level: (time_ms, score) for level, time_ms, score in rows}
+
+    def leaderboard(self, level: int, limit: int = 10,
+                    by: str = "score") -> List[Tuple[str, int, int]]:
+        """Return the best ``limit`` players of ``level``.
+
+        ``by`` is ``"score"`` (highest first) or ``"time"`` (fastest first).
+        Rows are ``(name, best time in ms, best score)``.
+        """
+        order = {"score": "r.best_score DESC", "time": "r.best_time_ms"}[by]
+        return self._conn.execute(
+            "SELECT p.name, r.best_time_ms, r.best_score"
+            " FROM level_results r JOIN players p ON p.id = r.player_id"
+            f" WHERE r.level = ? ORDER BY {order} LIMIT ?",
+            (level, limit)).fetchall()
+
+    # ------------------------------------------------------------------
+    # Importing JSON profiles
+    # ------------------------------------------------------------------
+    def import_json(self, paths: Iterable[str],
+                    names: Iterable[str] | None = None) -> int:
+        """Copy JSON profiles into the store in one transaction.
+
+        ``names`` defaults to the file names without their extension.
+        Players that are already in the store are left alone, so running an
+        import twice does no harm.  Returns the number of imported profiles.
+
+        Unlike :func:`profile_utils.load_profile` a missing or broken file is
+        not treated as a fresh profile, which would lock that player out of
+        their levels for good.  ``ValueError`` names every such file and
+        nothing is imported; fix or remove them and run the import again.
+        """
+        paths = list(paths)
+        if names is None:
+            names = [os.path.splitext(os.path.basename(p))[0] for p in paths]
+        profiles = []
+        failed = []
+        for path, name in zip(paths, names):
+            exists = self._conn.execute(
+                "SELECT 1 FROM players WHERE name = ?", (name,)).fetchone()
+            if exists is not None:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError) as exc:
+                failed.append(f"{path}: {exc}")
+                continue
+            if not isinstance(data, dict):
+                failed.append(f"{path}: not a JSON object")
+                continue
+            profiles.append((data, name))
+        if failed:
+            raise ValueError("cannot import these profiles:\n"
+                             + "\n".join(failed))
+        with self._conn:
+            for data, name in profiles:
+                self._save(data, name)
+        return len(profiles)
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) < 3:
+        print("usage: python profile_store.py DATABASE PROFILE.json ...")
+        return 2
+    with ProfileStore(argv[1]) as store:
+        try:
+            imported = store.import_json(argv[2:])
+        except ValueError as exc:
+            print(exc)
+            return 1
+        print(f"imported {imported} of {len(argv) - 2} profiles, "
+              f"{store.count()} players in {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
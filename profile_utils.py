@@ -6,13 +6,24 @@ The original project stored a JSON file next to the game.  In this refactored
 version the behaviour is kept the same, but the functions live in their own
 module so that new programmers can clearly see what code is responsible for
 persistence.
+
+Profiles are always written atomically: a crash half way through a save
+leaves the previous file untouched.  :class:`ProfileWriter` additionally
+moves the writing onto a background thread so the game never waits for the
+disk.
 """
 
+import atexit
 import json
 import os
+import tempfile
+import threading
+import time
 
 # Default file name used by :func:`load_profile` and :func:`save_profile`.
 PROFILE_FILE = "user_profile.json"
+# Seconds :class:`ProfileWriter` waits for further changes before writing
+WRITE_DELAY = 0.5
 
 
 def load_profile(path: str = PROFILE_FILE) -> dict:
@@ -44,13 +55,142 @@ def load_profile(path: str = PROFILE_FILE) -> dict:
 def save_profile(data: dict, path: str = PROFILE_FILE) -> None:
     """Persist *data* as JSON at *path*.
 
-    The profile is very small so we simply dump it in one go.  Errors bubble
-    up to the caller which keeps this helper nice and short for beginners to
-    read.
+    The JSON is written to a temporary file next to *path*, flushed to disk
+    and then renamed over the old profile, so readers see either the old or
+    the new profile and never half of one.  Errors bubble up to the caller.
+    """
+
+    _write_atomic(path, json.dumps(data))
+
+
+def _write_atomic(path: str, text: str) -> None:
+    # Every writer gets its own temporary file, so two saves running at the
+    # same time (two threads or two games) cannot mix up their text.
+    path = os.fspath(path)
+    handle, tmp_path = tempfile.mkstemp(
+        prefix=os.path.basename(path), suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as fh:
+            fh.write(text)
+            fh.flush()
+            os.fsync(fh.fileno())
+        # mkstemp only lets the owner read the file
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+class ProfileWriter:
+    """Save profiles on a background thread.
+
+    :meth:`save` only takes a snapshot of the profile and returns at once.
+    The writer thread waits ``delay`` seconds for further changes and then
+    writes the newest snapshot with :func:`save_profile`, so a burst of
+    updates costs a single write.  :meth:`flush` waits until everything is
+    on disk; :meth:`close` does the same and stops the thread.  ``close`` is
+    also registered with :mod:`atexit`, so pending changes are written when
+    the program ends normally.
+
+    A failed write does not stop the thread; the exception is kept in
+    :attr:`error` and the next save tries again.
     """
 
-    with open(path, "w", encoding="utf-8") as fh:
-        json.dump(data, fh)
+    def __init__(self, path: str = PROFILE_FILE,
+                 delay: float = WRITE_DELAY) -> None:
+        self.path = path
+        self.delay = delay
+        self.writes = 0
+        self.error: OSError | None = None
+        self._cond = threading.Condition()
+        # JSON text waiting to be written and when it is due
+        self._pending: str | None = None
+        self._due = 0.0
+        self._writing = False
+        self._hurry = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run,
+                                        name="profile-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def save(self, data: dict) -> None:
+        """Schedule *data* to be written; later calls replace earlier ones."""
+        text = json.dumps(data)
+        with self._cond:
+            if self._closed:
+                self._write(text)
+                return
+            self._pending = text
+            self._due = time.monotonic() + self.delay
+            self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Write pending changes now and wait for them.
+
+        Returns ``True`` if everything was written successfully within
+        ``timeout`` seconds.
+        """
+        with self._cond:
+            self._hurry = True
+            self._cond.notify_all()
+            done = self._cond.wait_for(
+                lambda: self._pending is None and not self._writing, timeout)
+            self._hurry = False
+        return done and self.error is None
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Write pending changes and stop the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+        with self._cond:
+            # The thread did not get to it (e.g. it was stuck on the disk);
+            # make a last attempt on this thread rather than lose progress.
+            # A write that is still running is waited for first, otherwise
+            # its older snapshot could replace ours when it finishes.
+            self._cond.wait_for(lambda: not self._writing)
+            if self._pending is not None:
+                text, self._pending = self._pending, None
+                self._write(text)
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._pending is None:
+                        if self._closed:
+                            return
+                        self._cond.wait()
+                        continue
+                    wait = self._due - time.monotonic()
+                    if wait <= 0 or self._hurry or self._closed:
+                        break
+                    self._cond.wait(wait)
+                text, self._pending = self._pending, None
+                self._writing = True
+            self._write(text)
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+    def _write(self, text: str) -> None:
+        try:
+            _write_atomic(self.path, text)
+        except OSError as exc:
+            self.error = exc
+        else:
+            self.error = None
+            self.writes += 1
 
 
 def unlock_next_level(profile: dict, current_level: int) -> None:
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+"""Rays through the map grid: line of sight and camera obstruction.
+
+Testing a ray against every wall rectangle gets slow on big maps.  The
+functions here instead walk the cells of an :class:`~map_loader.OccupancyGrid`
+that a ray passes through, one cell at a time, and stop at the first wall
+(the "DDA" algorithm of Amanatides and Woo).  A ray therefore only costs as
+much as the number of cells it crosses.
+
+:func:`raycast` follows one ray in plain Python.  :func:`raycast_many`
+follows a whole batch, for example a fan of camera rays; large batches are
+walked in lockstep with NumPy, every round moving all unfinished rays into
+their next cell.
+Distances and positions are in map pixels; for 3D positions (see
+:mod:`transform`) pass ``x`` and ``z``.  Cells outside the grid are free.
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+from map_loader import OccupancyGrid
+
+# Below this many rays ``raycast_many`` calls ``raycast`` for each of them:
+# the lockstep loop costs a few NumPy calls per round no matter how few rays
+# are left, so it only pays off for large batches.
+SCALAR_RAYS = 1024
+
+
+def raycast(grid: OccupancyGrid, x: float, y: float, dx: float, dy: float,
+            max_distance: float = math.inf
+            ) -> Tuple[float, Tuple[int, int]] | None:
+    """Follow a ray from ``(x, y)`` in direction ``(dx, dy)``.
+
+    Returns the distance to the first wall and that wall's ``(col, row)``,
+    or ``None`` if no wall is closer than ``max_distance``.  A ray that
+    starts inside a wall hits it at distance ``0``.
+    """
+    length = math.hypot(dx, dy)
+    if length == 0:
+        return None
+    dx, dy = float(dx) / length, float(dy) / length
+    size, cols, rows = grid.cell_size, grid.cols, grid.rows
+    cells = grid.cells
+    col, row = math.floor(x / size), math.floor(y / size)
+    if 0 <= col < cols and 0 <= row < rows and cells[row * cols + col]:
+        return 0.0, (col, row)
+
+    step_col = (dx > 0) - (dx < 0)
+    step_row = (dy > 0) - (dy < 0)
+    # distance along the ray to the next vertical / horizontal cell border
+    # and between two such borders
+    if dx:
+        t_col = ((col + (dx > 0)) * size - x) / dx
+        delta_col = size / abs(dx)
+    else:
+        t_col = delta_col = math.inf
+    if dy:
+        t_row = ((row + (dy > 0)) * size - y) / dy
+        delta_row = size / abs(dy)
+    else:
+        t_row = delta_row = math.inf
+
+    while True:
+        if t_col < t_row:
+            t = t_col
+            col += step_col
+            t_col += delta_col
+        else:
+            t = t_row
+            row += step_row
+            t_row += delta_row
+        if t > max_distance:
+            return None
+        if 0 <= col < cols and 0 <= row < rows:
+            if cells[row * cols + col]:
+                return t, (col, row)
+        elif ((col < 0 and step_col <= 0) or (col >= cols and step_col >= 0)
+              or (row < 0 and step_row <= 0)
+              or (row >= rows and step_row >= 0)):
+            # outside the grid and moving away from it
+            return None
+
+
+def raycast_many(grid: OccupancyGrid, x, y, dx, dy,
+                 max_distance: float = math.inf
+                 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Follow many rays at once.
+
+    All arguments broadcast against each other, so one origin with many
+    directions (or the other way round) works.  Returns three arrays: the
+    distance to the first wall (``inf`` where nothing was hit within
+    ``max_distance``) and the column and row of that wall (``-1`` where
+    nothing was hit).  The results agree with :func:`raycast`.
+    """
+    x, y, dx, dy = (a.astype(np.float64).ravel() for a in
+                    np.broadcast_arrays(x, y, dx, dy))
+    n = len(x)
+    distance = np.full(n, np.inf)
+    hit_col = np.full(n, -1, dtype=np.int64)
+    hit_row = np.full(n, -1, dtype=np.int64)
+    if n < SCALAR_RAYS:
+        for i, ray in enumerate(zip(x.tolist(), y.tolist(), dx.tolist(),
+                                    dy.tolist())):
+            found = raycast(grid, *ray, max_distance)
+            if found is not None:
+                distance[i], (hit_col[i], hit_row[i]) = found
+        return distance, hit_col, hit_row
+
+    size, cols, rows = grid.cell_size, grid.cols, grid.rows
+    walls = np.frombuffer(grid.cells, dtype=np.uint8).reshape(rows, cols) != 0
+
+    length = np.hypot(dx, dy)
+    moving = length > 0
+    safe = np.where(moving, length, 1.0)
+    dx, dy = dx / safe, dy / safe
+    col = np.floor(x / size).astype(np.int64)
+    row = np.floor(y / size).astype(np.int64)
+
+    def inside(c, r):
+        return (c >= 0) & (c < cols) & (r >= 0) & (r < rows)
+
+    def wall_at(c, r, ok):
+        found = np.zeros(len(c), dtype=bool)
+        found[ok] = walls[r[ok], c[ok]]
+        return found
+
+    start_hit = moving & wall_at(col, row, inside(col, row))
+    distance[start_hit] = 0.0
+    hit_col[start_hit], hit_row[start_hit] = col[start_hit], row[start_hit]
+
+    step_col = np.sign(dx).astype(np.int64)
+    step_row = np.sign(dy).astype(np.int64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_col = np.where(dx != 0, ((col + (dx > 0)) * size - x) / dx, np.inf)
+        t_row = np.where(dy != 0, ((row + (dy > 0)) * size - y) / dy, np.inf)
+        delta_col = np.where(dx != 0, size / np.abs(dx), np.inf)
+        delta_row = np.where(dy != 0, size / np.abs(dy), np.inf)
+
+    # Only the unfinished rays are carried through the loop
+    active = np.flatnonzero(moving & ~start_hit)
+    c, r = col[active], row[active]
+    tc, tr = t_col[active], t_row[active]
+    while len(active):
+        across = tc < tr
+        t = np.where(across, tc, tr)
+        c = c + np.where(across, step_col[active], 0)
+        r = r + np.where(across, 0, step_row[active])
+        tc = tc + np.where(across, delta_col[active], 0)
+        tr = tr + np.where(across, 0, delta_row[active])
+
+        ok = inside(c, r)
+        hit = wall_at(c, r, ok) & (t <= max_distance)
+        done = hit.copy()
+        done |= t > max_distance
+        sc, sr = step_col[active], step_row[active]
+        done |= ~ok & (((c < 0) & (sc <= 0)) | ((c >= cols) & (sc >= 0)) |
+                       ((r < 0) & (sr <= 0)) | ((r >= rows) & (sr >= 0)))
+
+        finished = active[hit]
+        distance[finished] = t[hit]
+        hit_col[finished], hit_row[finished] = c[hit], r[hit]
+
+        keep = ~done
+        active, c, r, tc, tr = active[keep], c[keep], r[keep], tc[keep], \
+            tr[keep]
+    return distance, hit_col, hit_row
+
+
+def line_of_sight(grid: OccupancyGrid, ax: float, ay: float, bx, by
+                  ) -> np.ndarray:
+    """Return a mask of the points ``(bx, by)`` that can be seen from ``a``.
+
+    A point is visible when no wall cell lies on the straight line between
+    the two.  A point inside a wall is not visible.
+    """
+    bx, by = np.atleast_1d(bx).astype(np.float64), \
+        np.atleast_1d(by).astype(np.float64)
+    if not len(bx):
+        return np.zeros(0, dtype=bool)
+    dx, dy = bx - ax, by - ay
+    reach = np.hypot(dx, dy)
+    distance, _, _ = raycast_many(grid, ax, ay, dx, dy, float(reach.max()))
+    return distance > reach
+
+
+def spring_arm(grid: OccupancyGrid, x, y, dx, dy, length: float,
+               margin: float = 0.0) -> np.ndarray:
+    """Return how far a camera may sit from ``(x, y)`` along ``(dx, dy)``.
+
+    That is ``length``, shortened so that the camera stays ``margin`` in
+    front of the first wall on the way, but never below ``0``.  Passing
+    several directions gives one answer per direction.
+    """
+    distance, _, _ = raycast_many(grid, x, y, dx, dy, length + margin)
+    return np.clip(np.minimum(distance - margin, length), 0.0, None)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+"""Retained-mode drawing of a running simulation.
+
+The simulation only changes numbers; it never talks to the canvas.  Once per
+frame :meth:`Renderer.sync` compares the simulation with what was drawn last
+time and sends only the changes to the canvas.  Those changes are collected
+by a :class:`BatchedCanvas` and sent to Tk as a single script, so a frame
+costs one round-trip into Tcl no matter how many items moved.
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from fruit import FRUIT_COLORS, FruitPool
+
+if TYPE_CHECKING:  # pragma: no cover - only needed for type hints
+    import tkinter as tk
+
+    from simulation import Simulation
+
+# Positions are sent to Tk rounded to this many decimals; smaller changes do
+# not count as a change at all.
+PRECISION = 1
+
+
+class BatchedCanvas:
+    """Collect canvas updates and send them to Tk all at once.
+
+    ``coords``, ``itemconfig`` and ``delete`` are queued instead of executed.
+    Later updates of the same item replace earlier ones, so every item is
+    touched at most once per :meth:`flush`.  Creating items and reading
+    coordinates go straight to the real canvas.
+    """
+
+    def __init__(self, canvas: tk.Canvas) -> None:
+        self.canvas = canvas
+        self._coords: Dict[int, Tuple[float, ...]] = {}
+        self._options: Dict[int, Dict[str, object]] = {}
+        self._deleted: List[int] = []
+        self.flushes = 0
+
+    def __getattr__(self, name: str):
+        # create_* and anything else we do not batch
+        return getattr(self.canvas, name)
+
+    def coords(self, item: int, *coords: float):
+        if not coords:
+            return self.canvas.coords(item)
+        self._coords[item] = coords
+        return None
+
+    def itemconfig(self, item: int, **options) -> None:
+        self._options.setdefault(item, {}).update(options)
+
+    def delete(self, item: int) -> None:
+        self._coords.pop(item, None)
+        self._options.pop(item, None)
+        self._deleted.append(item)
+
+    def pending(self) -> int:
+        """Return the number of queued canvas commands."""
+        return len(self._coords) + len(self._options) + len(self._deleted)
+
+    def script(self) -> str:
+        """Return the queued commands as one Tcl script."""
+        path = str(self.canvas)
+        lines = []
+        for item, coords in self._coords.items():
+            lines.append(f"{path} coords {item} " +
+                         " ".join(f"{value:.{PRECISION}f}" for value in coords))
+        for item, options in self._options.items():
+            lines.append(f"{path} itemconfigure {item} " + " ".join(
+                f"-{key} {{{value}}}" for key, value in options.items()))
+        if self._deleted:
+            lines.append(f"{path} delete " +
+                         " ".join(str(item) for item in self._deleted))
+        return "\n".join(lines)
+
+    def flush(self) -> None:
+        """Send every queued command to the canvas."""
+        if not self.pending():
+            return
+        tk_app = getattr(self.canvas, "tk", None)
+        if tk_app is not None:
+            tk_app.eval(self.script())
+        else:
+            # Canvases without a Tcl interpreter (such as test doubles) get
+            # the same commands as ordinary method calls.
+            for item, coords in self._coords.items():
+                self.canvas.coords(item, *coords)
+            for item, options in self._options.items():
+                self.canvas.itemconfig(item, **options)
+            for item in self._deleted:
+                self.canvas.delete(item)
+        self._coords.clear()
+        self._options.clear()
+        self._deleted.clear()
+        self.flushes += 1
+
+
+class Renderer:
+    """Draws the player, the sword and all fruits of a simulation.
+
+    The renderer remembers the state it last sent for every entity and only
+    emits updates for entities that changed.  Fruit drawings come from a
+    :class:`~fruit.FruitPool` so that they are recycled.
+    """
+
+    def __init__(self, canvas: tk.Canvas, sim: Simulation, sprites,
+                 player_radius: int, sword_width: int,
+                 pool_size: int = 256) -> None:
+        self.canvas = BatchedCanvas(canvas)
+        self.player_radius = player_radius
+        r = player_radius
+        # player represented as circle
+        self.player = canvas.create_oval(
+            sim.base_x - r, sim.base_y - r, sim.base_x + r, sim.base_y + r,
+            fill="blue",
+        )
+        # sword represented as line from base to mouse
+        self.sword = canvas.create_line(
+            sim.base_x, sim.base_y, sim.sword_x, sim.sword_y,
+            width=sword_width, fill="gray",
+        )
+        self.fruit_pool = FruitPool(self.canvas, sprites, max_idle=pool_size)
+        self.fruit_pool.prefill(pool_size // 4)
+        # canvas item of every fruit on screen (by fruit id) and where it was
+        # drawn
+        self.fruit_items: Dict[int, Tuple[int, float, float]] = {}
+        self._player_state: tuple = ()
+        self._sword_state: tuple = ()
+        self._sword_color = "gray"
+        self.canvas.flush()
+
+    def sync(self, sim: Simulation) -> None:
+        """Send the changes since the last call to the canvas."""
+        canvas = self.canvas
+        digits = PRECISION
+
+        player = (round(sim.base_x, digits), round(sim.base_y, digits))
+        if player != self._player_state:
+            r = self.player_radius
+            x, y = player
+            canvas.coords(self.player, x - r, y - r, x + r, y + r)
+            self._player_state = player
+
+        sword = (player[0], player[1], round(sim.sword_x, digits),
+                 round(sim.sword_y, digits))
+        if sword != self._sword_state:
+            canvas.coords(self.sword, *sword)
+            self._sword_state = sword
+        color = "red" if sim.sword_active else "gray"
+        if color != self._sword_color:
+            canvas.itemconfig(self.sword, fill=color)
+            self._sword_color = color
+
+        pool = self.fruit_pool
+        items = self.fruit_items
+        for kind, fid in sim.drain_events():
+            if kind == "remove" and fid in items:
+                pool.release(items.pop(fid)[0])
+
+        store = sim.fruits
+        n = store.count
+        xs = store.x[:n].round(digits).tolist()
+        ys = store.y[:n].round(digits).tolist()
+        for fid, x, y, code in zip(store.ids[:n].tolist(), xs, ys,
+                                   store.color[:n].tolist()):
+            drawn = items.get(fid)
+            if drawn is None:
+                items[fid] = (pool.acquire(x, y, FRUIT_COLORS[code]), x, y)
+            elif drawn[1] != x or drawn[2] != y:
+                canvas.coords(drawn[0], x, y)
+                items[fid] = (drawn[0], x, y)
+
+        canvas.flush()
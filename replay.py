@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+"""Record player input and replay sessions without a display.
+
+A :class:`~simulation.Simulation` is fully determined by its level, map,
+random seed and the inputs it received on each tick.  :class:`InputRecorder`
+collects exactly that and stores it in a small binary file; :func:`replay`
+feeds a recording back into a fresh simulation as fast as the computer
+allows, without drawing anything.  This makes player reported bugs
+reproducible and gives a fixed workload for performance measurements.
+
+Run ``python replay.py session.rec`` to replay a recording and print how the
+session ended.
+"""
+
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from level_pack import load_level
+from simulation import Simulation, World
+
+MAGIC = b"SWRC"
+VERSION = 1
+
+# magic, version, level, seed, world width, world height, map path length
+_HEADER = struct.Struct("<4sHHqIIH")
+# tick, input kind, two arguments
+_EVENT = struct.Struct("<IBii")
+
+Event = Tuple[int, int, int, int]
+
+
+@dataclass
+class Recording:
+    """Everything needed to play a session again."""
+
+    level: int
+    seed: int
+    width: int
+    height: int
+    map_path: str
+    events: List[Event] = field(default_factory=list)
+
+    def save(self, path: str) -> None:
+        """Write the recording to ``path`` in the compact binary format."""
+        encoded_path = self.map_path.encode("utf-8")
+        with open(path, "wb") as fh:
+            fh.write(_HEADER.pack(MAGIC, VERSION, self.level, self.seed,
+                                  self.width, self.height, len(encoded_path)))
+            fh.write(encoded_path)
+            fh.write(b"".join(_EVENT.pack(*event) for event in self.events))
+
+
+class InputRecorder(Recording):
+    """A :class:`Recording` that grows while a simulation is played.
+
+    Pass it as ``recorder`` to :class:`~simulation.Simulation`; the
+    simulation calls :meth:`record` for every input it receives.
+    """
+
+    def record(self, tick: int, kind: int, a: int, b: int) -> None:
+        self.events.append((tick, kind, int(a), int(b)))
+
+
+def load_recording(path: str) -> Recording:
+    """Read a recording written by :meth:`Recording.save`.
+
+    ``ValueError`` is raised if the file is not a recording of this version.
+    """
+    with open(path, "rb") as fh:
+        data = fh.read()
+    magic, version, level, seed, width, height, path_len = \
+        _HEADER.unpack_from(data)
+    if (magic, version) != (MAGIC, VERSION):
+        raise ValueError(f"{path} is not a recording of this version")
+    pos = _HEADER.size
+    map_path = data[pos:pos + path_len].decode("utf-8")
+    pos += path_len
+    events = list(_EVENT.iter_unpack(data[pos:]))
+    return Recording(level, seed, width, height, map_path, events)
+
+
+def replay(recording: Recording, world: World | None = None) -> Simulation:
+    """Run ``recording`` to the end and return the finished simulation.
+
+    ``world`` defaults to the recorded map loaded at the recorded size.
+    Inputs are applied right before the tick they were recorded on.
+    """
+    if world is None:
+        world = World.from_map(load_level(recording.map_path),
+                               recording.width, recording.height)
+    sim = Simulation(world, recording.level, seed=recording.seed)
+    events = recording.events
+    i = 0
+    while sim.running:
+        while i < len(events) and events[i][0] <= sim.tick_count:
+            _, kind, a, b = events[i]
+            sim.apply_input(kind, a, b)
+            i += 1
+        sim.step()
+    return sim
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) != 2:
+        print("usage: python replay.py RECORDING")
+        return 2
+    recording = load_recording(argv[1])
+    started = time.perf_counter()
+    sim = replay(recording)
+    elapsed = time.perf_counter() - started
+    print(f"level {recording.level}, seed {recording.seed}: "
+          f"{sim.outcome} after {sim.tick_count} ticks, "
+          f"{sim.lives} lives left")
+    print(f"replayed {len(recording.events)} inputs in {elapsed:.3f}s "
+          f"({sim.tick_count / max(elapsed, 1e-9):.0f} ticks/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+"""Headless game engine for the sword game.
+
+All gameplay rules live here: moving the player, spawning and moving fruits,
+sword hits, lives and the level timer.  Nothing in this module touches
+Tkinter, so a :class:`Simulation` can be stepped thousands of times per second
+in tests, benchmarks or tuning scripts without opening a window.
+:class:`game.SwordGameApp` is only a thin view and input adapter on top.
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from collision import moving_circle_hits, swept_segment_circle_hits
+from combat import Weapon, fire
+from flow_field import FlowField
+from perf import FrameProfiler
+from fruit import (
+    FRUIT_BASE_SPEED, Fruit, FruitStore, SpawnSampler, spawn_sampler,
+)
+from map_loader import CELL_SIZE, MapData, OccupancyGrid, parse_map
+
+# ---------------------------------------------------------------------------
+# Configuration values
+# ---------------------------------------------------------------------------
+START_LIVES = 1000
+MOVE_SPEED = 20
+DURATION_MS = 60 * 1000  # 1 minute
+
+# The simulation advances in fixed steps of ``TICK_MS``.  ``advance`` never
+# runs more than ``MAX_CATCH_UP_TICKS`` steps in one call so that a long stall
+# does not turn into a burst of simulation work.
+TICK_MS = 50
+MAX_CATCH_UP_TICKS = 5
+SWORD_ACTIVE_MS = 100
+SWORD_LENGTH = 100
+SWORD_WIDTH = 5
+PLAYER_RADIUS = 10
+FRUIT_RADIUS = Fruit.radius
+# No new fruits are spawned during the last seconds of a level
+SPAWN_CUTOFF_MS = 10_000
+# Delay between two spawns: every level takes ``SPAWN_SPEEDUP_MS`` off
+# ``SPAWN_INTERVAL_MS``, but fruits never come faster than every
+# ``MIN_SPAWN_INTERVAL_MS``
+SPAWN_INTERVAL_MS = 1000
+SPAWN_SPEEDUP_MS = 50
+MIN_SPAWN_INTERVAL_MS = 200
+
+# Kinds of player input accepted by ``Simulation.apply_input``
+(INPUT_MOVE, INPUT_AIM, INPUT_SWING, INPUT_LOSE_LIFE, INPUT_QUIT, INPUT_FIRE,
+ INPUT_RELOAD) = range(7)
+
+
+@dataclass
+class World:
+    """Static description of a level: its size, walls, start and exit.
+
+    Worlds built from a map carry the map's :class:`OccupancyGrid`, which
+    makes :meth:`blocked` independent of the number of walls.  Hand-made
+    worlds without a grid fall back to checking every wall rectangle.
+    """
+
+    width: int
+    height: int
+    walls: List[Tuple[int, int, int, int]] = field(default_factory=list)
+    start: Tuple[int, int] | None = None
+    end: Tuple[int, int] | None = None
+    grid: OccupancyGrid | None = None
+
+    @classmethod
+    def from_map(cls, data: MapData, width: int, height: int) -> "World":
+        """Create a world of ``width`` x ``height`` pixels from map data."""
+        return cls(width, height, data.walls, data.start, data.end, data.grid)
+
+    @classmethod
+    def from_file(cls, path: str, width: int, height: int) -> "World":
+        """Parse the map at ``path`` and wrap it in a :class:`World`."""
+        return cls.from_map(parse_map(path), width, height)
+
+    def blocked(self, x1: float, y1: float, x2: float, y2: float) -> bool:
+        """Return ``True`` if the box ``(x1, y1, x2, y2)`` overlaps a wall."""
+        if self.grid is not None:
+            return self.grid.overlaps(x1, y1, x2, y2)
+        for wx1, wy1, wx2, wy2 in self.walls:
+            if not (x2 <= wx1 or x1 >= wx2 or y2 <= wy1 or y1 >= wy2):
+                return True
+        return False
+
+
+@dataclass(frozen=True)
+class Tuning:
+    """Difficulty settings that :mod:`batch_sim` can vary between sweeps.
+
+    The defaults are the values the game is played with.  ``fruit_speed``
+    replaces :data:`fruit.FRUIT_BASE_SPEED` (every level still adds one),
+    ``spawn_interval_ms`` replaces :data:`SPAWN_INTERVAL_MS`, and
+    ``spawn_weights``, if given, are used instead of
+    :func:`fruit.spawn_probabilities` on every level.
+    """
+
+    fruit_speed: float = FRUIT_BASE_SPEED
+    spawn_interval_ms: int = SPAWN_INTERVAL_MS
+    spawn_weights: Dict[str, float] | None = None
+
+
+class Simulation:
+    """State and rules of one running level.
+
+    The view feeds player input into :meth:`apply_input` and calls
+    :meth:`advance` with the real time that has passed.  All randomness comes
+    from :attr:`rng`, seeded with ``seed``, so the same seed and the same
+    inputs on the same ticks always replay the same session.  If a
+    ``recorder`` is given, every input is passed to its ``record(tick, kind,
+    a, b)`` method (see :mod:`replay`).  The input, spawn, movement and
+    collision phases are timed by :attr:`profiler`, which is switched off
+    unless a :class:`~perf.FrameProfiler` is passed in enabled.  A
+    ``controller`` (see :mod:`player_controller`) is polled at the start of
+    every tick run by :meth:`advance` so it can apply the input it gathered.
+    With a ``weapon`` (see :mod:`combat`) the player can also shoot in the
+    direction the sword points; without one the fire inputs do nothing.
+    ``tuning`` changes the fruit speed and spawn settings (see
+    :class:`Tuning`).
+    Fruits live in a :class:`FruitStore`; fruits that appear or disappear are
+    reported by id through :attr:`events` so a user interface can create and
+    delete the matching drawings.
+    """
+
+    def __init__(self, world: World, level: int, seed: int | None = None,
+                 recorder=None, profiler: FrameProfiler | None = None,
+                 controller=None, weapon: Weapon | None = None,
+                 tuning: Tuning | None = None) -> None:
+        self.world = world
+        self.level = level
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed)
+        self.recorder = recorder
+        self.controller = controller
+        self.weapon = weapon
+        self.profiler = profiler or FrameProfiler()
+        self.tuning = tuning or Tuning()
+        self.spawner = (SpawnSampler(self.tuning.spawn_weights)
+                        if self.tuning.spawn_weights else spawn_sampler(level))
+        self.lives = START_LIVES
+        self.base_x, self.base_y = world.start or (world.width // 2,
+                                                   world.height - 20)
+        self.sword_x = self.base_x
+        self.sword_y = self.base_y - SWORD_LENGTH
+        self.sword_active = False
+        self.sword_ms_left = 0
+        # Player and sword at the end of the last tick; collisions are tested
+        # along the way from there to the current position
+        self._last_pose = self.pose()
+        self.fruits = FruitStore()
+        # Worlds with a map grid let fruits path around walls
+        self.flow = (FlowField(world.grid, world.width, world.height)
+                     if world.grid is not None else None)
+        self.remaining_ms = DURATION_MS
+        self.running = True
+        # ``None`` while playing, otherwise "time", "out of lives", "quit" or
+        # "complete"
+        self.outcome: str | None = None
+        # ("spawn" | "remove", fruit id) pairs for the view, see
+        # ``drain_events``
+        self.events: List[Tuple[str, int]] = []
+        self.tick_count = 0
+        self._accumulator_ms = 0.0
+
+        self.spawn_fruit()
+        self.spawn_ms_left = self.spawn_interval()
+
+    # ------------------------------------------------------------------
+    # Time keeping
+    # ------------------------------------------------------------------
+    def advance(self, elapsed_ms: float) -> int:
+        """Run as many fixed ticks as fit into ``elapsed_ms``.
+
+        Leftover time is kept for the next call.  At most
+        ``MAX_CATCH_UP_TICKS`` are run and time beyond that is dropped.  The
+        :attr:`controller`, if any, is polled right before each tick.
+        Returns the number of ticks that were run.
+        """
+        self._accumulator_ms += elapsed_ms
+        steps = 0
+        while (self.running and self._accumulator_ms >= TICK_MS
+               and steps < MAX_CATCH_UP_TICKS):
+            self._accumulator_ms -= TICK_MS
+            steps += 1
+            if self.controller is not None:
+                self.controller.poll(self)
+            self.step()
+        if steps == MAX_CATCH_UP_TICKS:
+            self._accumulator_ms = min(self._accumulator_ms, TICK_MS)
+        return steps
+
+    def step(self) -> None:
+        """Run one fixed simulation step of ``TICK_MS`` milliseconds."""
+        if not self.running:
+            return
+        self.tick_count += 1
+        self.remaining_ms -= TICK_MS
+        if self.remaining_ms <= 0:
+            self.remaining_ms = 0
+            self.finish("time")
+            return
+
+        if self.sword_active:
+            self.sword_ms_left -= TICK_MS
+
+        self.spawn_ms_left -= TICK_MS
+        if self.spawn_ms_left <= 0:
+            started = self.profiler.start()
+            self.spawn_fruit()
+            self.spawn_ms_left += self.spawn_interval()
+            self.profiler.stop("spawn", started)
+
+        self.update_fruits()
+        if self.weapon is not None:
+            self.fire_weapon()
+
+        # The sword still cuts during the tick in which its time runs out,
+        # so a swing hits for the full ``SWORD_ACTIVE_MS``
+        if self.sword_active and self.sword_ms_left <= 0:
+            self.sword_active = False
+        self._last_pose = self.pose()
+
+    def finish(self, outcome: str) -> None:
+        """Stop the level, remembering why it ended."""
+        if self.running:
+            self.running = False
+            self.outcome = outcome
+
+    def drain_events(self) -> List[Tuple[str, int]]:
+        """Return and clear the spawn/remove events collected so far."""
+        events, self.events = self.events, []
+        return events
+
+    # ------------------------------------------------------------------
+    # Player
+    # ------------------------------------------------------------------
+    def apply_input(self, kind: int, a: int = 0, b: int = 0) -> None:
+        """Handle one player input and record it if a recorder is set.
+
+        ``a`` and ``b`` are the distance for ``INPUT_MOVE`` and the point to
+        aim at for ``INPUT_AIM``.  ``INPUT_FIRE`` pulls the trigger when
+        ``a`` is ``1`` and releases it when ``a`` is ``0``.  The other kinds
+        ignore them.
+        """
+        if not self.running:
+            return
+        started = self.profiler.start()
+        if self.recorder is not None:
+            self.recorder.record(self.tick_count, kind, a, b)
+        if kind == INPUT_MOVE:
+            self.move_player(a, b)
+        elif kind == INPUT_AIM:
+            self.aim_sword(a, b)
+        elif kind == INPUT_SWING:
+            self.swing_sword()
+        elif kind == INPUT_LOSE_LIFE:
+            self.lose_life()
+        elif kind == INPUT_QUIT:
+            self.finish("quit")
+        elif self.weapon is not None:
+            if kind == INPUT_FIRE:
+                self.weapon.trigger = bool(a)
+            elif kind == INPUT_RELOAD:
+                self.weapon.reload()
+        self.profiler.stop("input", started)
+
+    def move_player(self, dx: int, dy: int) -> None:
+        """Move the player and keep the sword aligned."""
+        if not self.running:
+            return
+
+        # Calculate new base position with margins so the whole player stays
+        margin = PLAYER_RADIUS
+        old_x, old_y = self.base_x, self.base_y
+        new_x = max(margin, min(self.world.width - margin, self.base_x + dx))
+        new_y = max(margin, min(self.world.height - margin, self.base_y + dy))
+
+        # Collision detection against walls
+        r = PLAYER_RADIUS
+        if self.world.blocked(new_x - r, new_y - r, new_x + r, new_y + r):
+            return
+
+        self.base_x, self.base_y = new_x, new_y
+        # Move sword tip by the same amount to keep orientation
+        self.sword_x += new_x - old_x
+        self.sword_y += new_y - old_y
+
+        self.check_level_complete()
+
+    def check_level_complete(self) -> None:
+        """Check whether the player reached the end of the level."""
+        if not self.world.end:
+            return
+        ex, ey = self.world.end
+        if (abs(self.base_x - ex) <= CELL_SIZE // 2 and
+                abs(self.base_y - ey) <= CELL_SIZE // 2):
+            self.finish("complete")
+
+    def lose_life(self) -> None:
+        if self.lives <= 0:
+            return
+        self.lives -= 1
+        if self.lives <= 0:
+            self.finish("out of lives")
+
+    # ------------------------------------------------------------------
+    # Sword
+    # ------------------------------------------------------------------
+    def aim_sword(self, x: float, y: float) -> None:
+        """Point the sword from the player towards ``(x, y)``."""
+        self.sword_x, self.sword_y = x, y
+
+    def swing_sword(self) -> None:
+        """Activate the sword for ``SWORD_ACTIVE_MS`` milliseconds."""
+        self.sword_active = True
+        self.sword_ms_left = SWORD_ACTIVE_MS
+
+    def pose(self) -> Tuple[float, float, float, float]:
+        """Return the sword as ``(base x, base y, tip x, tip y)``."""
+        return self.base_x, self.base_y, self.sword_x, self.sword_y
+
+    def sword_hits(self, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray,
+                   y1: np.ndarray) -> np.ndarray:
+        """Return a mask of the fruits the sword touched during this tick.
+
+        The fruits moved from ``x0, y0`` to ``x1, y1`` while the sword moved
+        from where it was at the end of the last tick to where it is now.
+        """
+        if not self.sword_active:
+            return np.zeros(len(x1), dtype=bool)
+        return swept_segment_circle_hits(self._last_pose, self.pose(),
+                                         x0, y0, x1, y1,
+                                         FRUIT_RADIUS + SWORD_WIDTH / 2)
+
+    # ------------------------------------------------------------------
+    # Gun
+    # ------------------------------------------------------------------
+    def fire_weapon(self) -> None:
+        """Fire the shots :attr:`weapon` releases during this tick.
+
+        Shots leave the player towards the point the sword aims at.  All
+        shots of a tick are resolved together against the fruit positions at
+        the end of the tick.
+        """
+        weapon = self.weapon
+        shots = weapon.tick(TICK_MS)
+        if not shots or not self.running:
+            return
+        started = self.profiler.start()
+        dx = np.full(shots, self.sword_x - self.base_x, dtype=np.float64)
+        dy = np.full(shots, self.sword_y - self.base_y, dtype=np.float64)
+        fire(self.fruits, self.world.grid, self.base_x, self.base_y, dx, dy,
+             weapon.max_range, weapon.damage)
+        for fid in self.fruits.remove_dead().tolist():
+            self.events.append(("remove", fid))
+        self.profiler.stop("collision", started)
+
+    # ------------------------------------------------------------------
+    # Fruit mechanics
+    # ------------------------------------------------------------------
+    def spawn_interval(self) -> int:
+        """Return the delay in milliseconds between two fruit spawns."""
+        # spawn frequency increases with level but never faster than every 200ms
+        return max(self.tuning.spawn_interval_ms
+                   - self.level * SPAWN_SPEEDUP_MS, MIN_SPAWN_INTERVAL_MS)
+
+    def spawn_fruit(self) -> int | None:
+        """Create a new fruit at the finish point and return its id."""
+        if not self.running or self.remaining_ms < SPAWN_CUTOFF_MS:
+            return None
+        x, y = self.world.end or (self.world.width // 2, 0)
+        color, hits = self.choose_fruit_type()
+        fruit = Fruit(self.level, x, y, color=color, hits=hits)
+        fruit.speed = self.tuning.fruit_speed + self.level
+        fid = self.fruits.add(fruit)
+        self.events.append(("spawn", fid))
+        return fid
+
+    def update_fruits(self, first: int = 0) -> None:
+        """Advance every live fruit from index ``first`` on by one tick.
+
+        Movement, sword hits, player hits and leaving the screen are handled
+        for all fruits at once using NumPy operations on :attr:`fruits`.  When
+        the world has a map grid, fruits follow :attr:`flow` around walls
+        instead of flying straight at the player.  Hits are tested along the
+        whole movement of the tick, so fast fruits cannot tunnel through the
+        sword or the player.
+        """
+        if not self.running:
+            return
+        store = self.fruits
+        n = store.count
+        if first >= n:
+            return
+        profiler = self.profiler
+        started = profiler.start()
+        live = slice(first, n)
+        x, y = store.x[live], store.y[live]
+        x0, y0 = x.copy(), y.copy()
+        if self.flow is not None:
+            self.flow.update(self.base_x, self.base_y)
+            target_x, target_y = self.flow.steer(x, y, self.base_x,
+                                                 self.base_y)
+        else:
+            target_x, target_y = self.base_x, self.base_y
+        store.move_towards(target_x, target_y, first)
+        profiler.stop("movement", started)
+
+        started = profiler.start()
+        hit = self.sword_hits(x0, y0, x, y)
+        hp = store.hp[live]
+        hp[hit] -= 1
+        dead = hit & (hp <= 0)
+
+        # Fruit movement relative to the (possibly moving) player
+        last_x, last_y = self._last_pose[:2]
+        touching = ~dead & moving_circle_hits(
+            x0 - last_x, y0 - last_y, x - self.base_x, y - self.base_y, 0, 0,
+            PLAYER_RADIUS + FRUIT_RADIUS)
+        fr = FRUIT_RADIUS
+        outside = ((x + fr < 0) | (x - fr > self.world.width) |
+                   (y + fr < 0) | (y - fr > self.world.height))
+        store.alive[live] = ~(dead | touching | outside)
+        for fid in store.remove_dead().tolist():
+            self.events.append(("remove", fid))
+        profiler.stop("collision", started)
+
+        for _ in range(int(np.count_nonzero(touching))):
+            self.lose_life()
+
+    def choose_fruit_type(self) -> tuple[str, int]:
+        return self.spawner.sample(self.rng)
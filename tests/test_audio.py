@@ -0,0 +1,99 @@
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from audio import DEFAULT_TRACK, AudioManager
+
+
+class FakeMusic:
+    def __init__(self):
+        self.calls = []
+        self.done = threading.Event()
+
+    def load(self, fileobj, hint):
+        self.calls.append(("load", fileobj.read(), hint))
+
+    def play(self, loops):
+        self.calls.append(("play", loops))
+        self.done.set()
+
+    def stop(self):
+        self.calls.append(("stop",))
+        self.done.set()
+
+
+class FakeMixer:
+    def __init__(self):
+        self.music = FakeMusic()
+
+
+class SlowAudio(AudioManager):
+    """Audio manager whose mixer only starts when ``release`` is set."""
+
+    def __init__(self, tracks):
+        super().__init__(tracks)
+        self.mixer = FakeMixer()
+        self.release = threading.Event()
+
+    def _open_mixer(self):
+        self.release.wait(5)
+        return self.mixer
+
+
+def test_requests_wait_for_loading_without_blocking(tmp_path):
+    track = tmp_path / "music.wav"
+    track.write_bytes(b"RIFF")
+    audio = SlowAudio({DEFAULT_TRACK: track})
+    audio.start()
+    audio.play("level3")  # returns at once although loading is not done
+    assert audio.state == "loading"
+    assert not audio.ready
+    audio.release.set()
+    assert audio.wait(5)
+    assert audio.mixer.music.done.wait(5)
+    assert audio.ready
+    assert audio.mixer.music.calls == [("load", b"RIFF", "wav"), ("play", -1)]
+    assert audio.playing == DEFAULT_TRACK
+    audio.close()
+
+
+def test_only_newest_request_runs(tmp_path):
+    audio = SlowAudio({DEFAULT_TRACK: tmp_path / "missing.ogg"})
+    audio.play()
+    audio.stop()
+    audio.release.set()
+    assert audio.mixer.music.done.wait(5)
+    assert audio.mixer.music.calls == [("stop",)]
+    # the missing file is reported but does not stop the manager
+    assert audio.ready
+    assert isinstance(audio.error, OSError)
+    audio.close()
+
+
+def test_without_pygame_audio_is_unavailable():
+    class NoMixer(AudioManager):
+        def _open_mixer(self):
+            raise ImportError("No module named 'pygame'")
+
+    audio = NoMixer({})
+    audio.play()
+    assert audio.wait(5)
+    assert audio.state == "unavailable"
+    audio.stop()
+    audio.close()
+
+
+def test_close_stops_the_music(tmp_path):
+    track = tmp_path / "music.wav"
+    track.write_bytes(b"RIFF")
+    audio = SlowAudio({DEFAULT_TRACK: track})
+    audio.release.set()
+    audio.play()
+    assert audio.mixer.music.done.wait(5)
+    audio.close()
+    audio._thread.join(5)
+    assert not audio._thread.is_alive()
+    assert audio.mixer.music.calls[1:] == [("play", -1), ("stop",)]
+    assert audio.playing is None
@@ -0,0 +1,88 @@
+import csv
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import batch_sim
+import simulation
+from level_pack import load_level
+
+
+def test_sessions_are_reproducible():
+    world = simulation.World.from_map(load_level(batch_sim.map_path(4)),
+                                      batch_sim.WIDTH, batch_sim.HEIGHT)
+    seed = batch_sim.session_seed(0, 4, 0)
+    first = batch_sim.run_session(world, 4, seed)
+    second = batch_sim.run_session(world, 4, seed)
+    first.pop("seconds")
+    second.pop("seconds")
+    assert first == second
+    assert first["ticks"] * simulation.TICK_MS == first["survival_ms"]
+    assert first["fruits_spawned"] >= first["peak_fruits"] > 0
+
+
+def test_sword_bot_loses_fewer_lives_than_idle_bot():
+    world = simulation.World.from_map(load_level(batch_sim.map_path(20)),
+                                      batch_sim.WIDTH, batch_sim.HEIGHT)
+    idle = batch_sim.run_session(world, 20, 5, bot="idle")
+    sword = batch_sim.run_session(world, 20, 5, bot="sword")
+    assert sword["lives_lost"] < idle["lives_lost"]
+
+
+def test_sweep_streams_sessions_and_summarizes_levels(tmp_path):
+    sessions, levels = [], []
+    rows = batch_sim.sweep([2, 1, 2], 3, seed=7, workers=2, chunk_size=2,
+                           on_session=sessions.append,
+                           on_level=levels.append)
+    assert [row["level"] for row in rows] == [2, 1]
+    assert sorted(row["level"] for row in levels) == [1, 2]
+    assert len(sessions) == 6
+    assert all(row["sessions"] == 3 for row in rows)
+    seeds = {row["seed"] for row in sessions if row["level"] == 1}
+    assert seeds == {batch_sim.session_seed(7, 1, i) for i in range(3)}
+
+    path = tmp_path / "stats.csv"
+    batch_sim.write_summary(rows, str(path))
+    with open(path, newline="") as fh:
+        written = list(csv.DictReader(fh))
+    assert [int(row["level"]) for row in written] == [2, 1]
+
+
+def test_parse_levels():
+    assert batch_sim.parse_levels("1-3,7") == [1, 2, 3, 7]
+
+
+def test_tuning_reaches_the_simulation_and_the_output(tmp_path):
+    world = simulation.World.from_map(load_level(batch_sim.map_path(4)),
+                                      batch_sim.WIDTH, batch_sim.HEIGHT)
+    seed = batch_sim.session_seed(0, 4, 0)
+    tuning = simulation.Tuning(fruit_speed=6, spawn_interval_ms=400,
+                               spawn_weights={"black": 100})
+    sim = simulation.Simulation(world, 4, seed=seed, tuning=tuning)
+    assert sim.fruits.speed[0] == 10
+    assert sim.spawn_interval() == 200
+    assert sim.choose_fruit_type() == ("black", 5)
+    normal = batch_sim.run_session(world, 4, seed, bot="idle")
+    tuned = batch_sim.run_session(world, 4, seed, bot="idle", tuning=tuning)
+    assert tuned["fruits_spawned"] > normal["fruits_spawned"]
+
+    path = tmp_path / "stats.json"
+    assert batch_sim.main(["--levels", "1", "--sessions", "2",
+                           "--workers", "1", "--fruit-speed", "3",
+                           "--spawn-weights", "red=40",
+                           "--output", str(path)]) == 0
+    row = json.loads(path.read_text())["levels"][0]
+    assert row["fruit_speed"] == 3
+    assert row["spawn_interval_ms"] == simulation.SPAWN_INTERVAL_MS
+    assert row["spawn_weights"] == "red=40,green=60"
+
+
+def test_parse_weights():
+    assert batch_sim.parse_weights("black=10,red=5") == {
+        "black": 10, "red": 5, "green": 85}
+    with pytest.raises(ValueError):
+        batch_sim.parse_weights("blue=10")
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.__main__ import compare, main, run_all
+
+
+def doc(**seconds):
+    return {"results": {key: {"seconds": value}
+                        for key, value in seconds.items()}}
+
+
+def test_compare_flags_only_large_slowdowns():
+    baseline = doc(a=1.0, b=1.0, c=1.0)
+    results = doc(a=1.1, b=1.5, d=9.0)
+    regressions = compare(results, baseline, threshold=20)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("b:")
+
+
+def test_run_all_produces_results_for_each_size():
+    results = run_all(quick=True, only="sample_codes", min_time=0.001)
+    assert list(results["results"]) == ["sample_codes[1000]"]
+    assert results["results"]["sample_codes[1000]"]["seconds"] > 0
+    assert "numpy" in results["meta"]
+
+
+def test_main_fails_against_much_faster_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text('{"results": {"sample_codes[1000]": '
+                        '{"seconds": 1e-12}}}')
+    output = tmp_path / "results.json"
+    args = ["--quick", "--filter", "sample_codes", "--min-time", "0.001",
+            "--output", str(output), "--baseline", str(baseline)]
+    assert main(args) == 1
+    assert output.exists()
@@ -0,0 +1,123 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+import collision
+import fruit
+import simulation
+
+
+def test_segment_hits_circle_near_its_middle_only():
+    cx = np.array([50.0, 50.0, 50.0])
+    cy = np.array([10.0, 20.0, -9.0])
+    hits = collision.segment_circle_hits(0, 0, 100, 0, cx, cy, 15)
+    assert hits.tolist() == [True, False, True]
+
+
+def test_segment_ignores_bounding_box_corner():
+    # The circle's bounding box touches the end of the segment but the
+    # circle itself is too far away.
+    cx = np.array([112.0])
+    cy = np.array([12.0])
+    assert not collision.segment_circle_hits(0, 0, 100, 0, cx, cy, 15)[0]
+    assert collision.segment_circle_hits(0, 0, 100, 0, cx - 3, cy - 3, 15)[0]
+
+
+def test_zero_length_segment_acts_like_a_point():
+    cx = np.array([3.0, 30.0])
+    cy = np.array([4.0, 0.0])
+    hits = collision.segment_circle_hits(0, 0, 0, 0, cx, cy, 10)
+    assert hits.tolist() == [True, False]
+
+
+def test_circles_touching_at_one_point_do_not_overlap():
+    cx = np.array([25.0, 24.9])
+    cy = np.array([0.0, 0.0])
+    hits = collision.circle_circle_hits(0, 0, 10, cx, cy, 15)
+    assert hits.tolist() == [False, True]
+
+
+def test_moving_circle_cannot_jump_over_a_point():
+    x0 = np.array([0.0, 0.0, 0.0, 30.0])
+    y0 = np.array([-40.0, -40.0, 30.0, 30.0])
+    x1 = np.array([0.0, 30.0, 0.0, 30.0])
+    y1 = np.array([40.0, 40.0, 40.0, 30.0])
+    hits = collision.moving_circle_hits(x0, y0, x1, y1, 0, 0, 25)
+    assert hits.tolist() == [True, True, False, False]
+    # only the end positions would have missed the first one
+    assert not collision.circle_circle_hits(0, 0, 0, x1, y1, 25)[0]
+
+
+def test_swept_segment_catches_fruit_passing_through():
+    # a fruit crosses a resting sword between two ticks
+    sword = (0, 0, 100, 0)
+    hits = collision.swept_segment_circle_hits(
+        sword, sword, np.array([50.0, 150.0]), np.array([-30.0, -30.0]),
+        np.array([50.0, 150.0]), np.array([30.0, 30.0]), 17.5)
+    assert hits.tolist() == [True, False]
+
+
+def test_swept_segment_catches_rotating_sword():
+    # the sword turns by 90 degrees over a fruit that does not move
+    x = np.array([60.0, -60.0])
+    y = np.array([-60.0, -60.0])
+    hits = collision.swept_segment_circle_hits(
+        (0, 0, 0, -100), (0, 0, 100, 0), x, y, x, y, 17.5)
+    assert hits.tolist() == [True, False]
+    assert not collision.segment_circle_hits(0, 0, 100, 0, x, y, 17.5)[0]
+
+
+def test_swept_segment_handles_no_circles_and_no_movement():
+    empty = np.zeros(0)
+    assert collision.swept_segment_circle_hits(
+        (0, 0, 1, 1), (0, 0, 1, 1), empty, empty, empty, empty, 5).size == 0
+    point = np.array([3.0])
+    hits = collision.swept_segment_circle_hits(
+        (0, 0, 0, 0), (0, 0, 0, 0), point, point * 0, point, point * 0, 5)
+    assert hits.tolist() == [True]
+
+
+def make_fast_fruit_sim(x, y, speed):
+    sim = simulation.Simulation(simulation.World(800, 600), level=20, seed=0)
+    sim.fruits.remove(0)
+    sim.drain_events()
+    sim.base_x, sim.base_y = 400, 300
+    sim.aim_sword(400, 200)
+    sim.step()  # settle the pose the next tick starts from
+    fid = sim.fruits.add(fruit.Fruit(level=20, x=x, y=y))
+    sim.fruits.speed[0] = speed
+    return sim, fid
+
+
+def test_fast_fruit_does_not_tunnel_through_player():
+    sim, _ = make_fast_fruit_sim(400, 240, 120)
+    lives = sim.lives
+    sim.update_fruits()
+    assert sim.fruits.count == 0
+    assert sim.lives == lives - 1
+
+
+def test_sword_hits_for_its_whole_active_time():
+    sim, fid = make_fast_fruit_sim(100, 100, 0)
+    sim.swing_sword()
+    sim.step()
+    assert sim.sword_active
+    # the second half of the swing still cuts
+    sim.fruits.x[0], sim.fruits.y[0] = 400, 250
+    sim.fruits.hp[0] = 1
+    sim.step()
+    assert ("remove", fid) in sim.drain_events()
+    assert not sim.sword_active
+
+
+def test_fast_wide_swing_does_not_skip_fruits():
+    # The tip flicks across the whole screen within one tick; every fruit
+    # just under the line it travels along must be hit.
+    cx = np.linspace(10, 1910, 200)
+    cy = np.full(200, 5.0)
+    hits = collision.swept_segment_circle_hits(
+        (960, 1000, 0, 0), (960, 1000, 1920, 0), cx, cy, cx, cy, 17.5)
+    assert hits.all()
@@ -0,0 +1,96 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+import combat
+import fruit
+import simulation
+from map_loader import OccupancyGrid
+
+
+def make_store(*positions, color="green"):
+    store = fruit.FruitStore()
+    for x, y in positions:
+        store.add(fruit.Fruit(1, x, y, color=color,
+                              hits=fruit.FRUIT_HITS[color]))
+    return store
+
+
+def test_weapon_keeps_its_fire_rate_and_reloads_when_empty():
+    weapon = combat.Weapon(interval_ms=20, magazine=6, reserve=4,
+                           reload_ms=100)
+    weapon.trigger = True
+    # 50 ms ticks with a shot every 20 ms: 3, 2, then the magazine is empty
+    assert [weapon.tick(50) for _ in range(3)] == [3, 2, 1]
+    assert weapon.ammo == 0 and weapon.reloading
+    assert weapon.tick(50) == 0
+    # the tick that finishes the reload shoots again
+    assert weapon.tick(50) == 3
+    assert weapon.ammo == 1 and weapon.reserve == 0
+    weapon.trigger = False
+    assert weapon.tick(50) == 0
+    assert not weapon.reload()
+
+
+def test_batched_shots_match_one_at_a_time():
+    rng = np.random.default_rng(3)
+    x, y = rng.uniform(0, 800, 300), rng.uniform(0, 600, 300)
+    ox, oy = rng.uniform(0, 800, 50), rng.uniform(0, 600, 50)
+    angle = rng.uniform(0, 2 * np.pi, 50)
+    dx, dy = np.cos(angle), np.sin(angle)
+    limit = rng.uniform(0, 500, 50)
+    hit, distance = combat.nearest_fruits(combat.FruitHash(x, y), x, y, ox,
+                                          oy, dx, dy, limit)
+    for i in range(50):
+        # brute force: every fruit against this shot
+        vx, vy = x - ox[i], y - oy[i]
+        along = vx * dx[i] + vy * dy[i]
+        miss2 = vx * vx + vy * vy - along * along
+        t = along - np.sqrt(np.maximum(15 ** 2 - miss2, 0))
+        t[vx * vx + vy * vy <= 15 ** 2] = 0
+        t[(miss2 > 15 ** 2) | (t < 0) | (t > limit[i])] = np.inf
+        if np.isfinite(t.min()):
+            # several fruits may be hit at the same distance
+            assert t[hit[i]] == t.min()
+            assert np.isclose(distance[i], t.min())
+        else:
+            assert hit[i] == -1 and distance[i] == limit[i]
+
+
+def test_shots_stop_at_walls_and_pass_destroyed_fruits():
+    # A wall in cell (3, 0) covers x = 120..160 at cell size 40
+    grid = OccupancyGrid(5, 1, bytearray([0, 0, 0, 1, 0]))
+    store = make_store((50, 20), (90, 20), (200, 20))
+    store.hp[0] = 2
+    hit, distance = combat.fire(store, grid, 0, 20, np.ones(4), 0)
+    # two shots destroy the first fruit, one the second, the last one hits
+    # the wall; the fruit behind the wall is safe
+    assert hit.tolist() == [0, 0, 1, -1]
+    assert distance[3] == 120
+    assert store.alive[:3].tolist() == [False, False, True]
+
+
+def test_simulation_shoots_where_the_sword_points():
+    world = simulation.World(800, 600)
+    sim = simulation.Simulation(world, level=1, seed=0,
+                                weapon=combat.Weapon(magazine=10))
+    sim.fruits = make_store((400, 100), color="red")
+    sim.events.clear()
+    sim.base_x, sim.base_y = 400, 500
+    sim.spawn_ms_left = 10_000
+    sim.apply_input(simulation.INPUT_AIM, 400, 0)
+    sim.apply_input(simulation.INPUT_FIRE, 1)
+    # a red fruit takes three shots, one every other tick
+    for _ in range(4):
+        sim.step()
+        sim.fruits.y[:sim.fruits.count] = 100
+    assert sim.fruits.count == 1 and sim.fruits.hp[0] == 1
+    sim.step()
+    assert sim.fruits.count == 0
+    assert sim.drain_events() == [("remove", 0)]
+    sim.apply_input(simulation.INPUT_FIRE, 0)
+    sim.step()
+    assert sim.weapon.shots_fired == 3
@@ -0,0 +1,80 @@
+import sys
+from collections import deque
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+import fruit
+import simulation
+from flow_field import FlowField
+from map_loader import CELL_SIZE, OccupancyGrid
+
+# A wall with a single gap at the bottom:
+#   . # .
+#   . # .
+#   . . .
+GRID = OccupancyGrid(3, 3, bytearray(b"\x00\x01\x00" * 2 + b"\x00\x00\x00"))
+
+
+def centre(col, row):
+    return (col + 0.5) * CELL_SIZE, (row + 0.5) * CELL_SIZE
+
+
+def test_field_leads_around_the_wall():
+    field = FlowField(GRID, 3 * CELL_SIZE, 3 * CELL_SIZE)
+    assert field.update(*centre(2, 0))
+    assert not field.update(*centre(2, 0))
+    assert field.distance[0, 0] == 6
+    # From the top left the way leads down, never through the wall
+    x, y = centre(0, 0)
+    tx, ty = field.steer(np.array([x]), np.array([y]), *centre(2, 0))
+    assert (tx[0], ty[0]) == centre(0, 1)
+    # Diagonal steps that would cut the wall's corner are not taken
+    nxt = field.next_cell.reshape(3, 3)
+    assert nxt[1, 0] == 2 * 3 + 0
+    assert nxt[2, 0] == 2 * 3 + 1
+    assert nxt[2, 1] == 2 * 3 + 2
+    assert nxt[2, 2] == 1 * 3 + 2
+
+
+def test_target_cell_and_outside_home_in_directly():
+    field = FlowField(GRID, 3 * CELL_SIZE, 3 * CELL_SIZE)
+    field.update(105, 15)
+    tx, ty = field.steer(np.array([100.0, -50.0]), np.array([20.0, 0.0]),
+                         105, 15)
+    assert tx.tolist() == [105, 105] and ty.tolist() == [15, 15]
+
+
+def test_fruits_follow_the_field_in_a_simulation():
+    world = simulation.World(3 * CELL_SIZE, 3 * CELL_SIZE, grid=GRID,
+                             start=centre(2, 0))
+    sim = simulation.Simulation(world, level=1)
+    sim.fruits = fruit.FruitStore()
+    sim.fruits.add(fruit.Fruit(level=1, x=centre(0, 0)[0], y=centre(0, 0)[1]))
+    sim.update_fruits()
+    assert sim.fruits.x[0] == centre(0, 0)[0]
+    assert sim.fruits.y[0] > centre(0, 0)[1]
+
+
+def test_distances_match_a_plain_breadth_first_search():
+    rng = np.random.default_rng(1)
+    cols, rows = 40, 30
+    walls = rng.random(rows * cols) < 0.3
+    walls[0] = False
+    grid = OccupancyGrid(cols, rows, bytearray(walls.astype(np.uint8)))
+    field = FlowField(grid, cols * CELL_SIZE, rows * CELL_SIZE)
+    field.update(*centre(0, 0))
+
+    expected = np.full((rows, cols), -1)
+    expected[0, 0] = 0
+    queue = deque([(0, 0)])
+    while queue:
+        c, r = queue.popleft()
+        for nc, nr in ((c + 1, r), (c - 1, r), (c, r + 1), (c, r - 1)):
+            if (0 <= nc < cols and 0 <= nr < rows and not walls[nr * cols + nc]
+                    and expected[nr, nc] < 0):
+                expected[nr, nc] = expected[r, c] + 1
+                queue.append((nc, nr))
+    assert (field.distance == expected).all()
@@ -1,28 +1,38 @@
+import random
+import struct
 import sys
+import zlib
 from pathlib import Path
 
 # Ensure the project root is on the Python path for imports.
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+import numpy as np
+
 import fruit
-import game
-from test_move_player import DummyCanvas
+import simulation
+
+
+def make_sim(level=1, **world_kwargs):
+    world = simulation.World(800, 600, **world_kwargs)
+    sim = simulation.Simulation(world, level=level)
+    sim.fruits = fruit.FruitStore()
+    sim.drain_events()
+    return sim
 
 
 def test_fruit_speed_increases_with_level():
-    canvas = DummyCanvas()
-    f1 = fruit.Fruit(canvas, level=1, x=50, y=0)
-    f2 = fruit.Fruit(canvas, level=5, x=50, y=0)
+    f1 = fruit.Fruit(level=1, x=50, y=0)
+    f2 = fruit.Fruit(level=5, x=50, y=0)
     assert f1.speed == fruit.FRUIT_BASE_SPEED + 1
     assert f2.speed == fruit.FRUIT_BASE_SPEED + 5
 
 
 def test_fruit_move_uses_speed():
-    canvas = DummyCanvas()
-    f = fruit.Fruit(canvas, level=2, x=0, y=0)
-    before = canvas.coords(f.id)
+    f = fruit.Fruit(level=2, x=0, y=0)
+    before = f.bbox()
     f.move(100, 0)
-    after = canvas.coords(f.id)
+    after = f.bbox()
     dx = after[0] - before[0]
     dy = after[1] - before[1]
     dist = (dx ** 2 + dy ** 2) ** 0.5
@@ -43,78 +53,195 @@ def test_spawn_probabilities_cap():
 
 
 def test_fruit_requires_multiple_hits():
-    canvas = DummyCanvas()
-    app = object.__new__(game.SwordGameApp)
-    app.canvas = canvas
-    app.sword = canvas.create_line(0, 0, 0, 0)
-    app.sword_active = True
-    fruit_obj = fruit.Fruit(canvas, level=1, x=0, y=0, color="purple", hits=2)
-    assert not game.SwordGameApp.check_sword_hit(app, fruit_obj)
-    assert fruit_obj.hp == 1
-    assert game.SwordGameApp.check_sword_hit(app, fruit_obj)
-    assert fruit_obj.hp == 0
-
-
-def test_fruit_has_sword_icon():
-    canvas = DummyCanvas()
-    f = fruit.Fruit(canvas, level=1, x=50, y=0)
-    assert len(f.icon_ids) == 2
-
-
-def test_fruit_icon_moves_with_fruit():
-    canvas = DummyCanvas()
-    f = fruit.Fruit(canvas, level=1, x=0, y=0)
-    before = [canvas.coords(i)[:] for i in f.icon_ids]
-    f.move(50, 0)
-    after = [canvas.coords(i)[:] for i in f.icon_ids]
-    for b, a in zip(before, after):
-        dx = a[0] - b[0]
-        dy = a[1] - b[1]
-        dist = (dx ** 2 + dy ** 2) ** 0.5
-        assert abs(dist - f.speed) < 1e-6
-        dx2 = a[2] - b[2]
-        dy2 = a[3] - b[3]
-        dist2 = (dx2 ** 2 + dy2 ** 2) ** 0.5
-        assert abs(dist2 - f.speed) < 1e-6
+    sim = make_sim()
+    sim.base_x, sim.base_y = 0, 100
+    sim.aim_sword(0, -100)
+    sim.swing_sword()
+    fid = sim.fruits.add(fruit.Fruit(level=1, x=0, y=0, color="purple", hits=2))
+    sim.update_fruits()
+    assert sim.fruits.count == 1
+    assert sim.fruits.hp[0] == 1
+    sim.update_fruits()
+    assert sim.fruits.count == 0
+    assert sim.drain_events() == [("remove", fid)]
 
 
 def test_spawn_fruit_stops_when_time_low():
-    app = object.__new__(game.SwordGameApp)
-    app.canvas = DummyCanvas()
-    app.level = 1
-    app.fruits = []
-    app.running = True
-    app.remaining_ms = 9000
-    app.after_called = False
-
-    def dummy_after(self, interval, callback):
-        self.after_called = True
-
-    app.after = dummy_after.__get__(app, game.SwordGameApp)
-    game.SwordGameApp.spawn_fruit(app)
-    assert app.fruits == []
-    assert not app.after_called
+    sim = make_sim()
+    sim.remaining_ms = 9000
+    assert sim.spawn_fruit() is None
+    assert sim.fruits.count == 0
+    assert sim.drain_events() == []
 
 
-class DummyLabel:
-    def config(self, **kwargs):
-        self.kwargs = kwargs
+def test_new_fruit_moves_once_on_its_spawn_tick():
+    world = simulation.World(800, 600)
+    sim = simulation.Simulation(world, level=20, seed=0)
+    sim.drain_events()
+    sim.spawn_ms_left = simulation.TICK_MS
+    sim.step()
+    (kind, fid), = sim.drain_events()
+    assert kind == "spawn"
+    i = sim.fruits.ids[:sim.fruits.count].tolist().index(fid)
+    assert sim.fruits.y[i] == sim.fruits.speed[i]
 
 
 def test_fruit_collision_loses_life():
-    app = object.__new__(game.SwordGameApp)
-    app.canvas = DummyCanvas()
-    app.base_x = 50
-    app.base_y = 50
-    app.player = app.canvas.create_oval(40, 40, 60, 60)
-    app.sword = app.canvas.create_line(0, 0, 0, 0)
-    app.sword_active = False
-    app.lives = 2
-    app.lives_label = DummyLabel()
-    app.fruits = []
-    app.running = True
-    fruit_obj = fruit.Fruit(app.canvas, level=1, x=50, y=50)
-    app.fruits.append(fruit_obj)
-    game.SwordGameApp.move_fruit(app, fruit_obj)
-    assert app.lives == 1
-    assert fruit_obj not in app.fruits
+    sim = make_sim()
+    sim.base_x = 50
+    sim.base_y = 50
+    sim.lives = 2
+    fid = sim.fruits.add(fruit.Fruit(level=1, x=50, y=50))
+    sim.update_fruits()
+    assert sim.lives == 1
+    assert sim.fruits.count == 0
+    assert sim.drain_events() == [("remove", fid)]
+
+
+def test_fruits_leaving_the_screen_are_removed():
+    sim = make_sim()
+    sim.base_x, sim.base_y = 400, 300
+    sim.fruits.add(fruit.Fruit(level=1, x=-100, y=300))
+    sim.fruits.add(fruit.Fruit(level=1, x=200, y=300))
+    sim.update_fruits()
+    assert sim.fruits.count == 1
+    assert sim.fruits.x[0] == 200 + sim.fruits.speed[0]
+
+
+def test_store_swap_remove_keeps_other_fruits():
+    store = fruit.FruitStore(capacity=2)
+    ids = [store.add(fruit.Fruit(level=1, x=i, y=0)) for i in range(5)]
+    assert store.capacity >= 5
+    store.alive[1] = store.alive[3] = False
+    removed = store.remove_dead()
+    assert sorted(removed.tolist()) == [ids[1], ids[3]]
+    assert store.count == 3
+    remaining = dict(zip(store.ids[:3].tolist(), store.x[:3].tolist()))
+    assert remaining == {ids[0]: 0, ids[2]: 2, ids[4]: 4}
+
+
+def test_store_moves_all_fruits_by_their_speed():
+    store = fruit.FruitStore()
+    store.add(fruit.Fruit(level=1, x=0, y=0))
+    store.add(fruit.Fruit(level=4, x=100, y=0))
+    store.move_towards(50, 0)
+    assert store.x[:2].tolist() == [3, 94]
+    assert store.get(1).color == "green"
+
+
+def test_step_spawns_fruit_on_interval():
+    sim = make_sim(level=1, end=(50, 20))
+    sim.base_x, sim.base_y = 50, 500
+    ticks = sim.spawn_interval() // simulation.TICK_MS
+    for _ in range(ticks - 1):
+        sim.step()
+    assert sim.fruits.count == 0
+    sim.step()
+    assert sim.fruits.count == 1
+    assert sim.remaining_ms == simulation.DURATION_MS - ticks * simulation.TICK_MS
+
+
+def test_advance_caps_catch_up_ticks():
+    sim = make_sim()
+    steps = sim.advance(10_000)  # a ten second stall
+    assert steps == simulation.MAX_CATCH_UP_TICKS
+    assert sim.tick_count == simulation.MAX_CATCH_UP_TICKS
+    assert sim._accumulator_ms <= simulation.TICK_MS
+
+
+def test_advance_keeps_leftover_time():
+    sim = make_sim()
+    assert sim.advance(simulation.TICK_MS * 1.5) == 1
+    assert sim.advance(simulation.TICK_MS * 0.5) == 1
+
+
+class RecordingCanvas:
+    """Just enough of a canvas to count item creation for the pool tests."""
+
+    def __init__(self):
+        self.items = {}
+        self.next_id = 1
+
+    def create_image(self, *coords, **options):
+        item = self.next_id
+        self.next_id += 1
+        self.items[item] = {"coords": list(coords), **options}
+        return item
+
+    def coords(self, item, *coords):
+        self.items[item]["coords"] = list(coords)
+
+    def itemconfig(self, item, **options):
+        self.items[item].update(options)
+
+    def delete(self, item):
+        del self.items[item]
+
+
+SPRITES = {color: f"sprite-{color}" for color in fruit.FRUIT_COLORS}
+
+
+def test_pool_reuses_released_fruits():
+    canvas = RecordingCanvas()
+    pool = fruit.FruitPool(canvas, SPRITES, max_idle=4)
+    first = pool.acquire(10, 10, "red")
+    pool.release(first)
+    assert canvas.items[first]["state"] == "hidden"
+    second = pool.acquire(50, 60, "black")
+    assert second == first
+    item = canvas.items[second]
+    assert item["image"] == "sprite-black" and item["state"] == "normal"
+    assert item["coords"] == [50, 60]
+    assert pool.stats() == {"created": 1, "reused": 1, "in_use": 1,
+                            "peak_in_use": 1, "idle": 0}
+
+
+def test_pool_prefill_and_size_limit():
+    canvas = RecordingCanvas()
+    pool = fruit.FruitPool(canvas, SPRITES, max_idle=2)
+    pool.prefill(10)
+    assert pool.created == 2
+    fruits = [pool.acquire(0, 0, "green") for _ in range(3)]
+    assert pool.created == 3 and pool.peak_in_use == 3
+    for item in fruits:
+        pool.release(item)
+    assert pool.stats()["idle"] == 2
+    assert len(canvas.items) == 2
+
+
+def read_png_pixels(data):
+    assert data.startswith(b"\x89PNG\r\n\x1a\n")
+    width, height = struct.unpack(">II", data[16:24])
+    idat = data.index(b"IDAT")
+    length = struct.unpack(">I", data[idat - 4:idat])[0]
+    raw = zlib.decompress(data[idat + 4:idat + 4 + length])
+    stride = width * 4 + 1
+    return width, height, lambda x, y: tuple(
+        raw[y * stride + 1 + x * 4:y * stride + 1 + x * 4 + 4])
+
+
+def test_fruit_sprite_has_transparent_corners_and_icon():
+    width, height, pixel = read_png_pixels(fruit.fruit_sprite_png((255, 0, 0)))
+    assert (width, height) == (31, 31)
+    assert pixel(0, 0)[3] == 0
+    assert pixel(7, 15) == (255, 0, 0, 255)
+    assert pixel(15, 15) == (0, 0, 0, 255)  # the blade
+
+
+def test_sampler_matches_spawn_probabilities():
+    probs = fruit.spawn_probabilities(10)
+    sampler = fruit.spawn_sampler(10)
+    assert fruit.spawn_sampler(10) is sampler
+    codes = sampler.sample_codes(200_000, np.random.default_rng(1))
+    counts = np.bincount(codes, minlength=len(fruit.FRUIT_COLORS))
+    for color, percent in probs.items():
+        share = counts[fruit.COLOR_CODES[color]] / len(codes) * 100
+        assert abs(share - percent) < 0.5
+
+
+def test_sampler_single_draws_return_hits():
+    sampler = fruit.SpawnSampler({"black": 0, "red": 1, "green": 3})
+    rng = random.Random(3)
+    draws = [sampler.sample(rng) for _ in range(4000)]
+    assert set(draws) == {("red", 3), ("green", 1)}
+    assert 800 < draws.count(("red", 3)) < 1200
@@ -0,0 +1,85 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import level_pack
+import map_loader
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def copy_maps(tmp_path):
+    maps_dir = tmp_path / "maps"
+    maps_dir.mkdir()
+    for name in ("example_map.txt", "example_map2.txt"):
+        shutil.copy(ROOT / "maps" / name, maps_dir / name)
+    return maps_dir
+
+
+def test_pack_matches_parsed_maps(tmp_path):
+    maps_dir = copy_maps(tmp_path)
+    pack = level_pack.LevelPack(level_pack.compile_pack(str(maps_dir)))
+    for name in ("example_map.txt", "example_map2.txt"):
+        parsed = map_loader.parse_map(str(maps_dir / name), merge=True)
+        packed = pack.get(name)
+        assert isinstance(packed.grid.cells, memoryview)
+        assert bytes(packed.grid.cells) == bytes(parsed.grid.cells)
+        assert (packed.grid.cols, packed.grid.rows) == (
+            parsed.grid.cols, parsed.grid.rows)
+        assert packed.walls == parsed.walls
+        assert (packed.start, packed.end) == (parsed.start, parsed.end)
+        assert (packed.start_cell, packed.end_cell) == (
+            parsed.start_cell, parsed.end_cell)
+
+
+def test_edited_map_rebuilds_pack(tmp_path):
+    maps_dir = copy_maps(tmp_path)
+    path = maps_dir / "example_map.txt"
+    assert level_pack.load_level(str(path)).walls
+    # touching the file without changing it keeps the pack
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert not level_pack.open_pack(str(maps_dir)).is_stale(str(maps_dir))
+
+    path.write_text("S..E\n")
+    data = level_pack.load_level(str(path))
+    assert data.walls == []
+    assert data.end == (3 * map_loader.CELL_SIZE + map_loader.CELL_SIZE // 2,
+                        map_loader.CELL_SIZE // 2)
+
+
+def test_touched_map_is_hashed_only_once(tmp_path, monkeypatch):
+    maps_dir = copy_maps(tmp_path)
+    pack = level_pack.LevelPack(level_pack.compile_pack(str(maps_dir)))
+    path = maps_dir / "example_map.txt"
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert not pack.is_stale(str(maps_dir))
+
+    hashed = []
+    monkeypatch.setattr(level_pack, "_file_sha1", hashed.append)
+    assert not pack.is_stale(str(maps_dir))
+    # the new time was also written into the pack for the next process
+    reopened = level_pack.LevelPack(pack.path)
+    assert not reopened.is_stale(str(maps_dir))
+    assert hashed == []
+
+
+def test_compilers_do_not_share_a_temporary_file(tmp_path, monkeypatch):
+    maps_dir = copy_maps(tmp_path)
+    used = []
+    real_replace = os.replace
+
+    def replace(src, dst):
+        used.append(src)
+        real_replace(src, dst)
+
+    monkeypatch.setattr(level_pack.os, "replace", replace)
+    level_pack.compile_pack(str(maps_dir))
+    level_pack.compile_pack(str(maps_dir))
+    assert len(set(used)) == 2
+    assert sorted(os.listdir(maps_dir)) == [
+        "example_map.txt", "example_map2.txt", level_pack.PACK_NAME]
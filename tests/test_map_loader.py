@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import map_loader
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_parse_map_reads_start_end_and_walls():
+    data = map_loader.parse_map(str(ROOT / "maps" / "example_map.txt"))
+    size = map_loader.CELL_SIZE
+    assert data.start == (size // 2, size // 2)
+    assert data.end == (18 * size + size // 2, size // 2)
+    assert (14 * size, 0, 15 * size, size) in data.walls
+    assert len(data.walls) == 18
+
+
+def test_grid_overlap_matches_wall_rectangles():
+    data = map_loader.parse_map(str(ROOT / "maps" / "example_map.txt"))
+    grid = data.grid
+    assert (grid.cols, grid.rows) == (19, 6)
+    assert grid.is_wall(7, 1) and not grid.is_wall(8, 2)
+    assert not grid.is_wall(-1, 0) and not grid.is_wall(100, 100)
+    size = map_loader.CELL_SIZE
+    for x in range(-size, 21 * size, 7):
+        for y in range(-size, 7 * size, 7):
+            box = (x - 10, y - 10, x + 10, y + 10)
+            expected = any(
+                not (box[2] <= x1 or box[0] >= x2 or
+                     box[3] <= y1 or box[1] >= y2)
+                for x1, y1, x2, y2 in data.walls
+            )
+            assert grid.overlaps(*box) == expected, box
+
+
+def covered_cells(rects):
+    size = map_loader.CELL_SIZE
+    cells = []
+    for x1, y1, x2, y2 in rects:
+        for col in range(x1 // size, x2 // size):
+            for row in range(y1 // size, y2 // size):
+                cells.append((col, row))
+    return cells
+
+
+def test_merged_walls_cover_the_same_area():
+    for path in sorted((ROOT / "maps").glob("*.txt")):
+        plain = map_loader.parse_map(str(path))
+        merged = map_loader.parse_map(str(path), merge=True)
+        cells = covered_cells(merged.walls)
+        # same cells and no cell covered twice
+        assert sorted(cells) == sorted(covered_cells(plain.walls))
+        assert len(cells) == len(set(cells))
+        assert len(merged.walls) <= len(plain.walls)
+
+
+def test_merge_turns_wall_column_into_one_rectangle():
+    grid = map_loader.OccupancyGrid(4, 3, bytearray(b"\x01\x01\x00\x01" * 3))
+    size = map_loader.CELL_SIZE
+    assert map_loader.merge_wall_cells(grid) == [
+        (0, 0, 2 * size, 3 * size),
+        (3 * size, 0, 4 * size, 3 * size),
+    ]
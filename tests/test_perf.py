@@ -0,0 +1,56 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import perf
+import simulation
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = perf.FrameProfiler()
+    started = profiler.start()
+    assert started == 0
+    profiler.stop("frame", started)
+    assert profiler.percentiles("frame")["count"] == 0
+
+
+def test_ring_buffer_keeps_latest_samples(tmp_path, monkeypatch):
+    now = 10**12
+    monkeypatch.setattr(perf.time, "perf_counter_ns", lambda: now)
+    profiler = perf.FrameProfiler(phases=["frame"], capacity=4, enabled=True)
+    for value in range(10):
+        # a phase that started ``value`` milliseconds ago
+        profiler.stop("frame", now - value * 1_000_000)
+    stats = profiler.percentiles("frame")
+    assert stats["count"] == 10
+    assert stats["max"] == 9 and stats["p50"] == 7.5
+    path = tmp_path / "perf.json"
+    profiler.dump(str(path))
+    assert json.loads(path.read_text())["samples_ms"]["frame"] == [6, 7, 8, 9]
+
+
+def test_simulation_reports_its_phases():
+    profiler = perf.FrameProfiler(enabled=True)
+    sim = simulation.Simulation(simulation.World(800, 600), level=20, seed=1,
+                                profiler=profiler)
+    sim.apply_input(simulation.INPUT_AIM, 10, 10)
+    for _ in range(20):
+        sim.step()
+    summary = profiler.summary()
+    for phase in ("input", "spawn", "movement", "collision"):
+        assert summary[phase]["count"] > 0, phase
+    assert len(profiler.report_lines()) == len(perf.PHASES) + 1
+
+
+def test_spawning_does_not_time_movement_twice():
+    profiler = perf.FrameProfiler(enabled=True)
+    sim = simulation.Simulation(simulation.World(800, 600), level=1, seed=1,
+                                profiler=profiler)
+    sim.spawn_ms_left = simulation.TICK_MS
+    sim.step()
+    summary = profiler.summary()
+    assert summary["spawn"]["count"] == 1
+    assert summary["movement"]["count"] == 1
+    assert summary["collision"]["count"] == 1
@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import simulation
+from player_controller import PlayerController
+
+WIDTH, HEIGHT = 800, 600
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def record(self, tick, kind, a, b):
+        self.events.append((tick, kind, a, b))
+
+
+def make_sim(controller, recorder=None):
+    world = simulation.World(WIDTH, HEIGHT)
+    sim = simulation.Simulation(world, level=1, seed=1, recorder=recorder,
+                                controller=controller)
+    sim.base_x, sim.base_y = WIDTH // 2, HEIGHT // 2
+    return sim
+
+
+def test_held_key_moves_once_per_tick():
+    controller = PlayerController(speed=20)
+    sim = make_sim(controller)
+    controller.key_down("Right")
+    # key repeat events between ticks change nothing
+    for _ in range(10):
+        controller.key_down("Right")
+    sim.advance(simulation.TICK_MS * 3)
+    assert sim.base_x == WIDTH // 2 + 60
+    controller.key_up("Right")
+    sim.advance(simulation.TICK_MS)
+    assert sim.base_x == WIDTH // 2 + 60
+
+
+def test_short_tap_still_moves_one_tick():
+    controller = PlayerController(speed=20)
+    sim = make_sim(controller)
+    controller.key_down("Up")
+    controller.key_up("Up")
+    sim.advance(simulation.TICK_MS * 2)
+    assert sim.base_y == HEIGHT // 2 - 20
+
+
+def test_diagonal_speed_matches_straight_speed():
+    controller = PlayerController(speed=20)
+    controller.key_down("Left")
+    controller.key_down("Down")
+    assert controller.velocity() == (-14, 14)
+    controller.key_down("Right")
+    assert controller.velocity() == (0, 20)
+    controller.release_all()
+    assert controller.velocity() == (0, 20)  # pressed since the last tick
+    controller.poll(make_sim(None))
+    assert controller.velocity() == (0, 0)
+
+
+def test_only_latest_pointer_is_recorded():
+    recorder = Recorder()
+    controller = PlayerController()
+    sim = make_sim(controller, recorder)
+    for x in range(100):
+        controller.pointer(x, 50)
+    controller.click()
+    controller.click()
+    sim.advance(simulation.TICK_MS)
+    assert (sim.sword_x, sim.sword_y) == (99, 50)
+    assert recorder.events == [(0, simulation.INPUT_AIM, 99, 50),
+                               (0, simulation.INPUT_SWING, 0, 0)]
+    sim.advance(simulation.TICK_MS)
+    assert len(recorder.events) == 2
@@ -1,6 +1,9 @@
 import sys
+import threading
 from pathlib import Path
 
+import pytest
+
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 import profile_utils as profile_mod
@@ -26,3 +29,94 @@ def test_unlock_next_level():
     # unlocking higher level updates accordingly
     profile_mod.unlock_next_level(prof, 2)
     assert prof["highest_level"] == 3
+
+
+def test_save_profile_keeps_old_file_if_writing_fails(tmp_path, monkeypatch):
+    path = tmp_path / "profile.json"
+    profile_mod.save_profile({"highest_level": 4}, path)
+
+    def broken_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(profile_mod.os, "replace", broken_replace)
+    with pytest.raises(OSError):
+        profile_mod.save_profile({"highest_level": 5}, path)
+    monkeypatch.undo()
+    assert profile_mod.load_profile(path)["highest_level"] == 4
+    assert [p.name for p in tmp_path.iterdir()] == ["profile.json"]
+
+
+def test_profile_writer_coalesces_saves(tmp_path):
+    path = tmp_path / "profile.json"
+    writer = profile_mod.ProfileWriter(path, delay=60)
+    prof = {"highest_level": 1}
+    for level in range(1, 10):
+        profile_mod.unlock_next_level(prof, level)
+        writer.save(prof)
+    # snapshots are taken at save time
+    prof["highest_level"] = 99
+    assert not path.exists()
+    assert writer.flush(timeout=5)
+    assert writer.writes == 1
+    assert profile_mod.load_profile(path)["highest_level"] == 10
+    writer.close()
+
+
+def test_profile_writer_close_writes_pending_changes(tmp_path):
+    path = tmp_path / "profile.json"
+    writer = profile_mod.ProfileWriter(path, delay=60)
+    writer.save({"highest_level": 7})
+    writer.close()
+    assert profile_mod.load_profile(path)["highest_level"] == 7
+    # saving after close still works, just without the thread
+    writer.save({"highest_level": 8})
+    assert profile_mod.load_profile(path)["highest_level"] == 8
+
+
+def test_profile_writer_reports_errors(tmp_path):
+    writer = profile_mod.ProfileWriter(tmp_path / "missing" / "p.json",
+                                       delay=0)
+    writer.save({"highest_level": 2})
+    assert not writer.flush(timeout=5)
+    assert isinstance(writer.error, OSError)
+    writer.close()
+
+
+def test_profile_writer_close_keeps_saves_made_during_a_slow_write(
+        tmp_path, monkeypatch):
+    path = tmp_path / "profile.json"
+    started, release = threading.Event(), threading.Event()
+    write_atomic = profile_mod._write_atomic
+
+    def slow_write(path, text):
+        if not started.is_set():
+            started.set()
+            release.wait(5)
+        write_atomic(path, text)
+
+    monkeypatch.setattr(profile_mod, "_write_atomic", slow_write)
+    writer = profile_mod.ProfileWriter(path, delay=0)
+    writer.save({"highest_level": 2})
+    assert started.wait(5)
+    writer.save({"highest_level": 3})
+    # the thread is still stuck when close gives up waiting for it
+    threading.Timer(0.2, release.set).start()
+    writer.close(timeout=0.01)
+    assert profile_mod.load_profile(path)["highest_level"] == 3
+    assert writer.writes == 2
+
+
+def test_saves_do_not_share_a_temporary_file(tmp_path, monkeypatch):
+    path = tmp_path / "profile.json"
+    used = []
+    real_replace = profile_mod.os.replace
+
+    def replace(src, dst):
+        used.append(src)
+        real_replace(src, dst)
+
+    monkeypatch.setattr(profile_mod.os, "replace", replace)
+    profile_mod.save_profile({"highest_level": 2}, path)
+    profile_mod.save_profile({"highest_level": 3}, path)
+    assert len(set(used)) == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["profile.json"]
@@ -0,0 +1,98 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import profile_utils
+from profile_store import ProfileStore
+
+
+def test_profiles_behave_like_json_profiles(tmp_path):
+    with ProfileStore(str(tmp_path / "p.db")) as store:
+        assert store.load_profile("ann") == {"highest_level": 1}
+        store.save_profile({"highest_level": 3, "sound": False}, "ann")
+        assert store.load_profile("ann") == {"highest_level": 3,
+                                             "sound": False}
+        assert store.unlock_next_level("ann", 3) == 4
+        # same rules as profile_utils.unlock_next_level
+        assert store.unlock_next_level("ann", 1) == 4
+        assert store.unlock_next_level("ann", 20) == 4
+        assert store.unlock_next_level("bob", 1) == 2
+        assert store.load_profile("ann")["highest_level"] == 4
+        assert store.count() == 2
+
+
+def test_best_results_and_leaderboard(tmp_path):
+    with ProfileStore(str(tmp_path / "p.db")) as store:
+        store.record_result("ann", 1, 40_000, 10)
+        store.record_result("ann", 1, 50_000, 30)
+        store.record_result("bob", 1, 30_000, 20)
+        store.record_result("bob", 2, 45_000, 5)
+        assert store.best_results("ann") == {1: (40_000, 30)}
+        assert store.leaderboard(1) == [("ann", 40_000, 30),
+                                        ("bob", 30_000, 20)]
+        assert [row[0] for row in store.leaderboard(1, by="time")] == \
+            ["bob", "ann"]
+        store.delete_profile("bob")
+        assert store.leaderboard(2) == []
+
+
+def test_data_survives_reopening_and_uses_wal(tmp_path):
+    path = str(tmp_path / "p.db")
+    with ProfileStore(path) as store:
+        store.save_profile({"highest_level": 7}, "ann")
+    with ProfileStore(path) as store:
+        assert store.load_profile("ann")["highest_level"] == 7
+        mode = store._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+
+def test_lookups_use_indexes(tmp_path):
+    with ProfileStore(str(tmp_path / "p.db")) as store:
+        queries = [
+            ("SELECT highest_level, extra FROM players WHERE name = ?",
+             ("x",)),
+            ("SELECT best_score FROM level_results WHERE level = ?"
+             " ORDER BY best_score DESC LIMIT 10", (1,)),
+        ]
+        for sql, args in queries:
+            plan = " ".join(row[-1] for row in store._conn.execute(
+                "EXPLAIN QUERY PLAN " + sql, args))
+            assert "INDEX" in plan
+            assert "TEMP B-TREE" not in plan
+
+
+def test_import_json_profiles_once(tmp_path):
+    paths = []
+    for name, level in (("ann", 5), ("bob", 2)):
+        path = tmp_path / f"{name}.json"
+        profile_utils.save_profile({"highest_level": level}, str(path))
+        paths.append(str(path))
+    with ProfileStore(str(tmp_path / "p.db")) as store:
+        assert store.import_json(paths) == 2
+        store.unlock_next_level("ann", 5)
+        assert store.import_json(paths) == 0
+        assert store.load_profile("ann")["highest_level"] == 6
+        assert json.loads(Path(paths[1]).read_text()) == {"highest_level": 2}
+
+
+def test_import_json_reports_broken_profiles(tmp_path):
+    good = tmp_path / "ann.json"
+    profile_utils.save_profile({"highest_level": 5}, str(good))
+    broken = tmp_path / "eve.json"
+    broken.write_text("{not json")
+    paths = [str(good), str(broken), str(tmp_path / "bob.json")]
+    with ProfileStore(str(tmp_path / "p.db")) as store:
+        with pytest.raises(ValueError) as error:
+            store.import_json(paths)
+        assert "eve.json" in str(error.value)
+        assert "bob.json" in str(error.value)
+        # nothing was imported as a fresh level 1 profile
+        assert store.count() == 0
+        # once fixed the import goes through
+        profile_utils.save_profile({"highest_level": 9}, str(broken))
+        assert store.import_json(paths[:2]) == 2
+        assert store.load_profile("eve")["highest_level"] == 9
@@ -0,0 +1,86 @@
+import math
+import random
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+import raycast
+from map_loader import OccupancyGrid
+
+
+def make_grid(rows):
+    cells = bytearray(ch == "#" for line in rows for ch in line)
+    return OccupancyGrid(len(rows[0]), len(rows), cells, cell_size=10)
+
+
+GRID = make_grid([
+    "#.....",
+    "......",
+    "..#...",
+    "......",
+    ".....#",
+])
+
+
+def test_single_ray_reports_distance_and_cell():
+    assert raycast.raycast(GRID, 5, 25, 1, 0) == (15.0, (2, 2))
+    assert raycast.raycast(GRID, 5, 25, 1, 0, max_distance=10) is None
+    assert raycast.raycast(GRID, 5, 35, 1, 0) is None
+    assert raycast.raycast(GRID, 5, 5, 0, 1) == (0.0, (0, 0))
+    assert raycast.raycast(GRID, 5, 5, 0, 0) is None
+    # starting outside the grid and coming in
+    assert raycast.raycast(GRID, -20, 25, 2, 0) == (40.0, (2, 2))
+    # diagonal towards the bottom right wall
+    distance, cell = raycast.raycast(GRID, 30, 15, 1, 1)
+    assert cell == (5, 4)
+    assert math.isclose(distance, 25 * math.sqrt(2))
+
+
+def test_batched_rays_match_single_rays(monkeypatch):
+    # use the NumPy walk even for this small batch
+    monkeypatch.setattr(raycast, "SCALAR_RAYS", 0)
+    rng = random.Random(3)
+    x = [rng.uniform(-15, 75) for _ in range(300)]
+    y = [rng.uniform(-15, 65) for _ in range(300)]
+    angles = [rng.uniform(0, 2 * math.pi) for _ in range(300)]
+    dx, dy = np.cos(angles), np.sin(angles)
+    dx[:4], dy[:4] = [1, 0, -1, 0], [0, 1, 0, -1]
+    distance, cols, rows = raycast.raycast_many(GRID, x, y, dx, dy, 50)
+    for i in range(300):
+        single = raycast.raycast(GRID, x[i], y[i], dx[i], dy[i], 50)
+        if single is None:
+            assert distance[i] == np.inf and cols[i] == rows[i] == -1
+        else:
+            assert math.isclose(distance[i], single[0], abs_tol=1e-9)
+            assert (cols[i], rows[i]) == single[1]
+
+
+def test_ray_stops_at_the_first_wall_a_fine_walk_finds():
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        x, y = rng.uniform(0, 60), rng.uniform(0, 50)
+        angle = rng.uniform(0, 2 * np.pi)
+        result = raycast.raycast(GRID, x, y, np.cos(angle), np.sin(angle))
+        t = np.arange(0, 100, 0.01)
+        px, py = x + t * np.cos(angle), y + t * np.sin(angle)
+        c, r = np.floor(px / 10).astype(int), np.floor(py / 10).astype(int)
+        ok = (c >= 0) & (c < 6) & (r >= 0) & (r < 5)
+        walls = np.zeros(len(t), dtype=bool)
+        walls[ok] = [GRID.is_wall(cc, rr) for cc, rr in zip(c[ok], r[ok])]
+        if not walls.any():
+            assert result is None
+        else:
+            first = np.argmax(walls)
+            assert abs(result[0] - t[first]) < 0.02
+
+
+def test_line_of_sight_and_spring_arm():
+    visible = raycast.line_of_sight(GRID, 5, 25, [15, 45, 25], [25, 25, 25])
+    assert visible.tolist() == [True, False, False]
+    arm = raycast.spring_arm(GRID, 5, 25, [1, 0], [0, 1], 12, margin=2)
+    assert arm.tolist() == [12, 12]
+    arm = raycast.spring_arm(GRID, 5, 25, [1, 0], [0, 1], 30, margin=2)
+    assert arm.tolist() == [13, 30]
@@ -0,0 +1,122 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import rendering
+import simulation
+from fruit import FRUIT_COLORS
+
+
+class FakeCanvas:
+    """Records the calls that reach the canvas."""
+
+    def __init__(self):
+        self.items = {}
+        self.calls = []
+        self.next_id = 1
+
+    def _create(self, *coords, **options):
+        item = self.next_id
+        self.next_id += 1
+        self.items[item] = {"coords": list(coords), **options}
+        self.calls.append("create")
+        return item
+
+    create_oval = create_line = create_image = _create
+
+    def coords(self, item, *coords):
+        self.calls.append("coords")
+        self.items[item]["coords"] = list(coords)
+
+    def itemconfig(self, item, **options):
+        self.calls.append("itemconfig")
+        self.items[item].update(options)
+
+    def delete(self, item):
+        self.calls.append("delete")
+        del self.items[item]
+
+
+SPRITES = {color: f"sprite-{color}" for color in FRUIT_COLORS}
+
+
+def make_renderer():
+    canvas = FakeCanvas()
+    sim = simulation.Simulation(simulation.World(800, 600), level=5, seed=3)
+    renderer = rendering.Renderer(canvas, sim, SPRITES, 10, 5, pool_size=8)
+    return canvas, sim, renderer
+
+
+def test_unchanged_scene_sends_nothing():
+    canvas, sim, renderer = make_renderer()
+    renderer.sync(sim)
+    canvas.calls.clear()
+    flushes = renderer.canvas.flushes
+    renderer.sync(sim)
+    assert canvas.calls == []
+    assert renderer.canvas.flushes == flushes
+
+
+def test_only_changed_entities_are_updated():
+    canvas, sim, renderer = make_renderer()
+    renderer.sync(sim)
+    canvas.calls.clear()
+    sim.move_player(20, 0)
+    renderer.sync(sim)
+    # player and sword moved; the fruit stayed where it was
+    assert canvas.calls == ["coords", "coords"]
+    x = sim.base_x
+    assert canvas.items[renderer.player]["coords"][0] == x - 10
+
+    canvas.calls.clear()
+    sim.step()
+    renderer.sync(sim)
+    fid = int(sim.fruits.ids[0])
+    item = renderer.fruit_items[fid][0]
+    assert canvas.items[item]["coords"] == [round(sim.fruits.x[0], 1),
+                                            round(sim.fruits.y[0], 1)]
+
+
+def test_updates_of_one_item_are_coalesced():
+    canvas = FakeCanvas()
+    item = canvas.create_line(0, 0, 1, 1)
+    batch = rendering.BatchedCanvas(canvas)
+    batch.coords(item, 1, 2, 3, 4)
+    batch.itemconfig(item, fill="red")
+    batch.coords(item, 5, 6, 7, 8)
+    batch.itemconfig(item, state="hidden")
+    assert batch.pending() == 2
+    canvas.calls.clear()
+    batch.flush()
+    assert canvas.calls == ["coords", "itemconfig"]
+    assert canvas.items[item]["coords"] == [5, 6, 7, 8]
+    assert canvas.items[item]["fill"] == "red"
+
+
+def test_flush_sends_one_tcl_script():
+    class FakeTk:
+        def __init__(self):
+            self.scripts = []
+
+        def eval(self, script):
+            self.scripts.append(script)
+
+    class TclCanvas(FakeCanvas):
+        def __str__(self):
+            return ".game.canvas"
+
+    canvas = TclCanvas()
+    canvas.tk = FakeTk()
+    batch = rendering.BatchedCanvas(canvas)
+    batch.coords(4, 1.25, 2)
+    batch.itemconfig(5, image="pyimage1", state="normal")
+    batch.delete(6)
+    batch.delete(7)
+    batch.flush()
+    assert canvas.tk.scripts == [
+        ".game.canvas coords 4 1.2 2.0\n"
+        ".game.canvas itemconfigure 5 -image {pyimage1} -state {normal}\n"
+        ".game.canvas delete 6 7"
+    ]
+    assert batch.pending() == 0
@@ -0,0 +1,51 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import replay
+import simulation
+from level_pack import load_level
+
+ROOT = Path(__file__).resolve().parents[1]
+MAP = str(ROOT / "maps" / "example_map5.txt")
+
+
+def play_session(seed, recorder=None):
+    world = simulation.World.from_map(load_level(MAP), 800, 600)
+    sim = simulation.Simulation(world, level=5, seed=seed, recorder=recorder)
+    inputs = random.Random(99)
+    for tick in range(400):
+        if tick % 3 == 0:
+            sim.apply_input(simulation.INPUT_MOVE,
+                            inputs.choice((-20, 0, 20)),
+                            inputs.choice((-20, 0, 20)))
+        if tick % 5 == 0:
+            sim.apply_input(simulation.INPUT_AIM, inputs.randrange(800),
+                            inputs.randrange(600))
+            sim.apply_input(simulation.INPUT_SWING)
+        sim.step()
+    sim.apply_input(simulation.INPUT_QUIT)
+    return sim
+
+
+def state(sim):
+    n = sim.fruits.count
+    return (sim.outcome, sim.tick_count, sim.lives, sim.base_x, sim.base_y,
+            sim.fruits.x[:n].tolist(), sim.fruits.hp[:n].tolist())
+
+
+def test_same_seed_gives_same_fruits():
+    assert state(play_session(7)) == state(play_session(7))
+
+
+def test_recording_round_trip_replays_session(tmp_path):
+    recorder = replay.InputRecorder(5, 1234, 800, 600, MAP)
+    original = play_session(1234, recorder)
+    path = tmp_path / "session.rec"
+    recorder.save(str(path))
+    loaded = replay.load_recording(str(path))
+    assert loaded.events == recorder.events
+    assert loaded.map_path == MAP
+    assert state(replay.replay(loaded)) == state(original)
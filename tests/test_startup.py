@@ -0,0 +1,22 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+
+def test_game_module_imports_without_numpy():
+    code = "import sys, game; print('numpy' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_warm_up_engine_reports_import_times():
+    import game
+
+    timings = game.warm_up_engine(("simulation", "no_such_module"))
+    assert list(timings) == ["simulation"]
+    assert timings["simulation"] >= 0
+    assert "numpy" in sys.modules
@@ -0,0 +1,122 @@
+import math
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pytest
+
+import transform
+from fruit import Fruit, FruitStore
+from map_loader import MapData
+
+
+def test_views_read_and_write_the_shared_arrays():
+    store = transform.TransformStore(capacity=1)
+    first = store.get(store.add((1, 2, 3)))
+    position = first.position
+    # growing the arrays must not leave the view behind
+    for _ in range(10):
+        store.add()
+    position.z = 9
+    assert store.position[first.index].tolist() == [1, 2, 9]
+    first.scale = (2, 2, 2)
+    assert first.scale == (2, 2, 2)
+    assert tuple(first.rotation) == (0, 0, 0)
+    assert len(store) == 11
+    with pytest.raises(AttributeError):
+        position.w = 1
+
+
+def test_rows_are_stable_and_reused():
+    store = transform.TransformStore(capacity=2)
+    rows = store.add_many(np.arange(12.0).reshape(4, 3))
+    assert rows.tolist() == [0, 1, 2, 3]
+    store.remove(1)
+    store.remove(3)
+    assert store.rows().tolist() == [0, 2]
+    again = store.add_many([[0, 0, 0], [1, 1, 1], [2, 2, 2]])
+    assert sorted(again.tolist()) == [1, 3, 4]
+    assert store.position[2].tolist() == [6, 7, 8]
+    assert len(store) == 5
+
+
+def test_translate_and_forward():
+    store = transform.TransformStore()
+    rows = store.add_many([[0, 0, 0], [1, 0, 1]])
+    store.translate((1, 0, 0))
+    store.translate([[0, 1, 0]], rows[:1])
+    assert store.position[rows].tolist() == [[1, 1, 0], [2, 0, 1]]
+    store.rotation[rows[1], 1] = math.pi / 2
+    forward = store.forward()
+    assert np.allclose(forward, [transform.FORWARD, transform.RIGHT])
+    store.rotation[rows[0], 0] = math.pi / 2
+    assert np.allclose(store.get(rows[0]).forward(), (0, -1, 0))
+
+
+def test_face_points_forward_at_target():
+    store = transform.TransformStore()
+    rows = store.add_many([[0, 0, 0], [5, 0, 5], [3, 4, 0]])
+    store.face((3, 4, 5))
+    direction = np.array([3, 4, 5]) - store.position[rows]
+    forward = store.forward(rows)
+    assert np.allclose(forward[:2], direction[:2] /
+                       np.linalg.norm(direction[:2], axis=1)[:, None])
+    assert np.allclose(forward[2], transform.FORWARD)
+
+
+def test_projections():
+    positions = np.array([[10.0, 0.0, 20.0], [0.0, 0.0, -5.0],
+                          [0.0, 2.0, 10.0]])
+    assert transform.top_down_to_screen(positions[:1], (5, 5), 2).tolist() \
+        == [[10, 30]]
+    screen = transform.perspective_to_screen(positions[1:], (0, 0, 0), 0, 0,
+                                             100, (400, 300))
+    assert np.isnan(screen[0]).all()  # behind the camera
+    assert screen[1].tolist() == [400, 280]
+    # turning the camera right moves a point straight ahead to the left
+    turned = transform.perspective_to_screen(positions[2:], (0, 0, 0),
+                                             0.1, 0, 100, (400, 300))
+    assert turned[0, 0] < 400
+
+
+def test_2d_adapters_follow_the_axis_remap():
+    assert transform.to_3d(3, 4) == (3.0, 0.0, 4.0)
+    data = MapData(start=(20, 60), end=(100, 20),
+                   walls=[(0, 0, 40, 40), (40, 80, 80, 120)])
+    world = transform.map_to_3d(data, scale=0.025)
+    assert world.start == (0.5, 0.0, 1.5)
+    assert np.allclose(world.walls[1], [[1, 0, 2], [2, 1, 3]])
+
+    fruits = FruitStore()
+    fruits.add(Fruit(1, 10, 20))
+    fruits.add(Fruit(1, 30, 40))
+    store = transform.TransformStore()
+    rows = transform.fruit_transforms(fruits, store)
+    assert store.position[rows].tolist() == [[10, 0, 20], [30, 0, 40]]
+    loose = transform.fruit_transforms([Fruit(1, 1, 2)], store)
+    assert store.get(int(loose[0])).position == (1, 0, 2)
+
+
+def test_fruit_transforms_follow_fruit_ids_after_removal():
+    fruits = FruitStore()
+    for x in (10, 20, 30):
+        fruits.add(Fruit(1, x, x))
+    store = transform.TransformStore()
+    table = transform.FruitTransforms(store)
+    first, middle, last = table.sync(fruits).tolist()
+    store.position[last, 1] = 7  # lifted off the ground
+
+    # removing the middle fruit moves the last one into its place
+    fruits.remove(1)
+    fruits.x[:2] += 5
+    rows = table.sync(fruits)
+    assert rows.tolist() == [first, last]
+    assert not store.alive[middle]
+    assert store.position[last].tolist() == [35, 7, 30]
+    assert table.rows_of([0, 1, 2]).tolist() == [first, -1, last]
+
+    fruits.add(Fruit(1, 50, 60))
+    rows = table.sync(fruits)
+    assert len(table) == 3 and store.position[rows[2]].tolist() == [50, 0, 60]
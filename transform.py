@@ -0,0 +1,447 @@
+from __future__ import annotations
+
+"""Positions, rotations and scales in 3D, stored for many entities at once.
+
+Phase 1 of the third person migration (see
+``docs/PHASE1_WORLD_COORDINATE_FOUNDATION.md``) gives every entity a
+transform made of a position, a rotation and a scale, each a ``Vec3``.
+Creating three small objects per fruit on every spawn would make the fruit
+code slower, so :class:`TransformStore` keeps the numbers of all entities in
+three shared ``(N, 3)`` NumPy arrays.  An entity only remembers its row
+number.  :class:`Transform` and :class:`Vec3` are light views on one row for
+code that wants to write ``transform.position.z = 3`` instead of indexing
+arrays; operations on many entities (moving all of them, turning yaw into
+forward vectors, projecting to the screen) work on the arrays directly.
+
+The axis conventions of the document are used throughout: right-handed,
+``+Y`` up, ``+Z`` forward and ``+X`` right.  Rotations are ``(pitch, yaw,
+roll)`` in radians.  The 2D game maps onto the ground plane: old ``x``
+becomes ``x``, old ``y`` becomes ``z`` and the height ``y`` is ``0``.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np
+
+from fruit import Fruit, FruitStore
+from map_loader import CELL_SIZE, MapData
+
+RIGHT = (1.0, 0.0, 0.0)
+UP = (0.0, 1.0, 0.0)
+FORWARD = (0.0, 0.0, 1.0)
+
+Vector = Tuple[float, float, float]
+
+
+class Vec3:
+    """A view on one row of a :class:`TransformStore` array.
+
+    Reading or writing ``x``, ``y`` and ``z`` goes straight to the array, so
+    the view never gets out of date, even after the store grows.
+    """
+
+    __slots__ = ("_store", "_column", "_index")
+
+    def __init__(self, store: TransformStore, column: str, index: int) -> None:
+        self._store = store
+        self._column = column
+        self._index = index
+
+    def _row(self) -> np.ndarray:
+        return getattr(self._store, self._column)[self._index]
+
+    @property
+    def x(self) -> float:
+        return float(self._row()[0])
+
+    @x.setter
+    def x(self, value: float) -> None:
+        self._row()[0] = value
+
+    @property
+    def y(self) -> float:
+        return float(self._row()[1])
+
+    @y.setter
+    def y(self, value: float) -> None:
+        self._row()[1] = value
+
+    @property
+    def z(self) -> float:
+        return float(self._row()[2])
+
+    @z.setter
+    def z(self, value: float) -> None:
+        self._row()[2] = value
+
+    def to_tuple(self) -> Vector:
+        x, y, z = self._row().tolist()
+        return x, y, z
+
+    def __iter__(self):
+        return iter(self.to_tuple())
+
+    def __eq__(self, other) -> bool:
+        try:
+            return self.to_tuple() == tuple(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self) -> str:
+        return "Vec3(%g, %g, %g)" % self.to_tuple()
+
+
+class Transform:
+    """Position, rotation and scale of one entity in a store."""
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store: TransformStore, index: int) -> None:
+        self.store = store
+        self.index = index
+
+    @property
+    def position(self) -> Vec3:
+        return Vec3(self.store, "position", self.index)
+
+    @position.setter
+    def position(self, value: Sequence[float]) -> None:
+        self.store.position[self.index] = tuple(value)
+
+    @property
+    def rotation(self) -> Vec3:
+        """``(pitch, yaw, roll)`` in radians."""
+        return Vec3(self.store, "rotation", self.index)
+
+    @rotation.setter
+    def rotation(self, value: Sequence[float]) -> None:
+        self.store.rotation[self.index] = tuple(value)
+
+    @property
+    def scale(self) -> Vec3:
+        return Vec3(self.store, "scale", self.index)
+
+    @scale.setter
+    def scale(self, value: Sequence[float]) -> None:
+        self.store.scale[self.index] = tuple(value)
+
+    def forward(self) -> Vector:
+        x, y, z = self.store.forward(np.array([self.index]))[0].tolist()
+        return x, y, z
+
+    def __repr__(self) -> str:
+        return (f"Transform({self.position!r}, {self.rotation!r}, "
+                f"{self.scale!r})")
+
+
+class TransformStore:
+    """Transforms of many entities kept in shared ``(N, 3)`` arrays.
+
+    :meth:`add` returns the row of a new entity.  Rows stay the same for the
+    whole life of an entity; rows of removed entities are reused by later
+    ones.  ``alive`` marks the rows in use.  Batch methods take an array of
+    rows and default to every live row.
+    """
+
+    _COLUMNS = ("position", "rotation", "scale", "alive")
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.position = np.zeros((capacity, 3))
+        self.rotation = np.zeros((capacity, 3))
+        self.scale = np.ones((capacity, 3))
+        self.alive = np.zeros(capacity, dtype=bool)
+        self._free: list[int] = []
+        # rows below ``_used`` have been handed out at least once
+        self._used = 0
+
+    def __len__(self) -> int:
+        return self._used - len(self._free)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.alive)
+
+    def _grow(self, needed: int) -> None:
+        """Enlarge every array to hold at least ``needed`` rows."""
+        size = self.capacity
+        while size < needed:
+            size *= 2
+        for name in self._COLUMNS:
+            old = getattr(self, name)
+            new = (np.ones if name == "scale" else np.zeros)(
+                (size,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, position: Sequence[float] = (0.0, 0.0, 0.0),
+            rotation: Sequence[float] = (0.0, 0.0, 0.0),
+            scale: Sequence[float] = (1.0, 1.0, 1.0)) -> int:
+        """Add one entity and return its row."""
+        if self._free:
+            index = self._free.pop()
+        else:
+            if self._used == self.capacity:
+                self._grow(self._used + 1)
+            index = self._used
+            self._used += 1
+        self.position[index] = position
+        self.rotation[index] = rotation
+        self.scale[index] = scale
+        self.alive[index] = True
+        return index
+
+    def add_many(self, positions: np.ndarray) -> np.ndarray:
+        """Add one entity per row of ``positions`` and return their rows.
+
+        The new entities get no rotation and a scale of one.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        count = len(positions)
+        reused = self._free[-count:] if count else []
+        del self._free[len(self._free) - len(reused):]
+        fresh = count - len(reused)
+        if self._used + fresh > self.capacity:
+            self._grow(self._used + fresh)
+        rows = np.array(reused[::-1] + list(range(self._used,
+                                                  self._used + fresh)),
+                        dtype=np.int64)
+        self._used += fresh
+        self.position[rows] = positions
+        self.rotation[rows] = 0.0
+        self.scale[rows] = 1.0
+        self.alive[rows] = True
+        return rows
+
+    def remove(self, index: int) -> None:
+        """Free the row of an entity so a later one can use it."""
+        if self.alive[index]:
+            self.alive[index] = False
+            self._free.append(index)
+
+    def get(self, index: int) -> Transform:
+        return Transform(self, index)
+
+    def rows(self) -> np.ndarray:
+        """Return the rows of all live entities."""
+        return np.flatnonzero(self.alive[:self._used])
+
+    def _select(self, rows: np.ndarray | None) -> np.ndarray:
+        return self.rows() if rows is None else np.asarray(rows)
+
+    # ------------------------------------------------------------------
+    # Batch operations
+    # ------------------------------------------------------------------
+    def translate(self, delta: Sequence[float] | np.ndarray,
+                  rows: np.ndarray | None = None) -> None:
+        """Move entities by ``delta``, one vector for all or one per row."""
+        rows = self._select(rows)
+        self.position[rows] += np.asarray(delta, dtype=np.float64)
+
+    def forward(self, rows: np.ndarray | None = None) -> np.ndarray:
+        """Return the unit vectors the entities face, one row each.
+
+        Yaw turns about ``+Y`` (a yaw of 90 degrees faces ``+X``) and pitch
+        about ``+X``, so a positive pitch looks down.  Roll does not change
+        the direction.
+        """
+        rows = self._select(rows)
+        pitch = self.rotation[rows, 0]
+        yaw = self.rotation[rows, 1]
+        cos_pitch = np.cos(pitch)
+        return np.column_stack((np.sin(yaw) * cos_pitch, -np.sin(pitch),
+                                np.cos(yaw) * cos_pitch))
+
+    def face(self, targets: Sequence[float] | np.ndarray,
+             rows: np.ndarray | None = None) -> None:
+        """Turn entities so that :meth:`forward` points at ``targets``.
+
+        Roll is left alone.  Entities standing on their target keep their
+        rotation.
+        """
+        rows = self._select(rows)
+        offset = np.asarray(targets, dtype=np.float64) - self.position[rows]
+        offset = np.broadcast_to(offset, (len(rows), 3))
+        flat = np.hypot(offset[:, 0], offset[:, 2])
+        moved = (flat > 0) | (offset[:, 1] != 0)
+        rows = rows[moved]
+        offset, flat = offset[moved], flat[moved]
+        self.rotation[rows, 0] = np.arctan2(-offset[:, 1], flat)
+        self.rotation[rows, 1] = np.arctan2(offset[:, 0], offset[:, 2])
+
+    def to_screen_top_down(self, rows: np.ndarray | None = None,
+                           origin: Tuple[float, float] = (0.0, 0.0),
+                           scale: float = 1.0) -> np.ndarray:
+        """Project entities straight down onto the 2D canvas.
+
+        This is the inverse of :func:`to_3d` and gives the ``(x, y)`` canvas
+        positions the current game draws at.
+        """
+        positions = self.position[self._select(rows)]
+        return top_down_to_screen(positions, origin, scale)
+
+
+# ---------------------------------------------------------------------------
+# Projection
+# ---------------------------------------------------------------------------
+def top_down_to_screen(positions: np.ndarray,
+                       origin: Tuple[float, float] = (0.0, 0.0),
+                       scale: float = 1.0) -> np.ndarray:
+    """Return canvas ``(x, y)`` of world ``positions`` seen from above."""
+    screen = np.empty((len(positions), 2))
+    screen[:, 0] = (positions[:, 0] - origin[0]) * scale
+    screen[:, 1] = (positions[:, 2] - origin[1]) * scale
+    return screen
+
+
+def perspective_to_screen(positions: np.ndarray, eye: Sequence[float],
+                          yaw: float, pitch: float, focal: float,
+                          center: Tuple[float, float],
+                          near: float = 0.1) -> np.ndarray:
+    """Project world ``positions`` through a pinhole camera at ``eye``.
+
+    The camera looks along the forward vector of ``yaw`` and ``pitch``
+    (same conventions as :meth:`TransformStore.forward`).  ``focal`` is the
+    distance to the image plane in pixels and ``center`` the screen point
+    the camera looks at.  Points closer than ``near`` in front of the
+    camera, or behind it, come back as ``nan``.
+    """
+    rel = np.asarray(positions, dtype=np.float64) - np.asarray(eye)
+    # Undo the camera's yaw (about +Y), then its pitch (about +X)
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    x = rel[:, 0] * cy - rel[:, 2] * sy
+    z = rel[:, 0] * sy + rel[:, 2] * cy
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    y = rel[:, 1] * cp + z * sp
+    z = z * cp - rel[:, 1] * sp
+    screen = np.full((len(rel), 2), np.nan)
+    visible = z > near
+    screen[visible, 0] = center[0] + focal * x[visible] / z[visible]
+    # Screen y grows downwards, world y upwards
+    screen[visible, 1] = center[1] - focal * y[visible] / z[visible]
+    return screen
+
+
+# ---------------------------------------------------------------------------
+# 2D -> 3D adapters
+# ---------------------------------------------------------------------------
+def to_3d(x, y, height: float = 0.0, scale: float = 1.0):
+    """Turn 2D game coordinates into 3D world coordinates.
+
+    Old ``x`` becomes ``x``, old ``y`` becomes ``z`` and ``height`` is the
+    new ``y``; both ground coordinates are multiplied by ``scale``.  Numbers
+    give a ``(x, y, z)`` tuple, arrays an ``(N, 3)`` array.
+    """
+    if np.ndim(x) == 0:
+        return float(x) * scale, float(height), float(y) * scale
+    points = np.empty((len(x), 3))
+    points[:, 0] = np.asarray(x) * scale
+    points[:, 1] = height
+    points[:, 2] = np.asarray(y) * scale
+    return points
+
+
+@dataclass
+class WorldMap3D:
+    """A :class:`~map_loader.MapData` moved into 3D.
+
+    ``walls`` holds one axis-aligned box per wall rectangle as an ``(N, 2,
+    3)`` array of minimum and maximum corners, standing on the ground and
+    ``wall_height`` tall.
+    """
+
+    start: Vector | None
+    end: Vector | None
+    walls: np.ndarray
+
+
+def map_to_3d(data: MapData, scale: float = 1.0,
+              wall_height: float | None = None) -> WorldMap3D:
+    """Convert parsed map data to 3D.
+
+    Walls are one map cell high unless ``wall_height`` says otherwise.
+    """
+    if wall_height is None:
+        wall_height = CELL_SIZE * scale
+    rects = np.array(data.walls, dtype=np.float64).reshape(-1, 4) * scale
+    walls = np.zeros((len(rects), 2, 3))
+    walls[:, 0, 0], walls[:, 0, 2] = rects[:, 0], rects[:, 1]
+    walls[:, 1, 0], walls[:, 1, 2] = rects[:, 2], rects[:, 3]
+    walls[:, 1, 1] = wall_height
+    start = to_3d(*data.start, scale=scale) if data.start else None
+    end = to_3d(*data.end, scale=scale) if data.end else None
+    return WorldMap3D(start, end, walls)
+
+
+def fruit_transforms(fruits: FruitStore | Iterable[Fruit],
+                     store: TransformStore, scale: float = 1.0) -> np.ndarray:
+    """Add a transform for every fruit and return the new rows.
+
+    ``fruits`` is either a :class:`~fruit.FruitStore`, whose arrays are
+    converted in one go, or any sequence of :class:`~fruit.Fruit` objects.
+    The rows are in the same order as the fruits.
+    """
+    if isinstance(fruits, FruitStore):
+        n = fruits.count
+        return store.add_many(to_3d(fruits.x[:n], fruits.y[:n], scale=scale))
+    fruits = list(fruits)
+    x = np.array([fruit.x for fruit in fruits], dtype=np.float64)
+    y = np.array([fruit.y for fruit in fruits], dtype=np.float64)
+    return store.add_many(to_3d(x, y, scale=scale))
+
+
+class FruitTransforms:
+    """Transform rows of the fruits of a :class:`~fruit.FruitStore`, by id.
+
+    Removing a fruit from the store moves the last fruit into its place, so
+    the index of a fruit changes during its life; its id does not.  This
+    table therefore keeps one transform row per fruit id.  :meth:`sync` adds
+    rows for new fruits, frees the rows of removed ones and copies the 2D
+    positions across.
+    """
+
+    def __init__(self, store: TransformStore, scale: float = 1.0) -> None:
+        self.store = store
+        self.scale = scale
+        # fruit ids in ascending order and the transform row of each
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.rows = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def rows_of(self, ids) -> np.ndarray:
+        """Return the transform rows of the fruits ``ids``, ``-1`` if unknown."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(ids.shape, -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        return np.where(self.ids[pos] == ids, self.rows[pos], -1)
+
+    def sync(self, fruits: FruitStore) -> np.ndarray:
+        """Match the transforms to the live fruits and copy their positions.
+
+        Returns the transform rows in the current order of the store, so
+        the result is only valid until fruits are removed again.  Heights
+        are kept, so fruits lifted off the ground stay where they are.
+        """
+        n = fruits.count
+        ids = fruits.ids[:n]
+        x, y = fruits.x[:n], fruits.y[:n]
+        kept = np.isin(self.ids, ids)
+        for row in self.rows[~kept].tolist():
+            self.store.remove(row)
+        self.ids, self.rows = self.ids[kept], self.rows[kept]
+
+        rows = self.rows_of(ids)
+        new = rows < 0
+        if new.any():
+            rows[new] = self.store.add_many(
+                to_3d(x[new], y[new], scale=self.scale))
+            all_ids = np.concatenate([self.ids, ids[new]])
+            all_rows = np.concatenate([self.rows, rows[new]])
+            order = np.argsort(all_ids)
+            self.ids, self.rows = all_ids[order], all_rows[order]
+        self.store.position[rows, 0] = x * self.scale
+        self.store.position[rows, 2] = y * self.scale
+        return rows